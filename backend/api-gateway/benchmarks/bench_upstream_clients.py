@@ -0,0 +1,91 @@
+"""
+Compare gateway -> upstream latency for a fresh httpx.AsyncClient per request
+(the old behaviour) against a single pooled keep-alive client.
+
+Runs a minimal keep-alive HTTP server on localhost so no services are needed:
+
+    python benchmarks/bench_upstream_clients.py --requests 2000 --concurrency 20
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+
+RESPONSE = (
+    b"HTTP/1.1 200 OK\r\n"
+    b"Content-Type: application/json\r\n"
+    b"Content-Length: 20\r\n"
+    b"\r\n"
+    b'{"status":"healthy"}'
+)
+
+async def handle_connection(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+    try:
+        while True:
+            request = await reader.readuntil(b"\r\n\r\n")
+            if not request:
+                break
+            writer.write(RESPONSE)
+            await writer.drain()
+    except (asyncio.IncompleteReadError, ConnectionResetError):
+        pass
+    finally:
+        writer.close()
+
+async def run_per_request(url: str, total: int, concurrency: int):
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one():
+        async with semaphore:
+            start = time.perf_counter()
+            async with httpx.AsyncClient(timeout=10.0) as client:
+                response = await client.get(url)
+                response.raise_for_status()
+            latencies.append(time.perf_counter() - start)
+
+    await asyncio.gather(*(one() for _ in range(total)))
+    return latencies
+
+async def run_pooled(url: str, total: int, concurrency: int):
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(timeout=10.0, limits=limits) as client:
+        async def one():
+            async with semaphore:
+                start = time.perf_counter()
+                response = await client.get(url)
+                response.raise_for_status()
+                latencies.append(time.perf_counter() - start)
+
+        await asyncio.gather(*(one() for _ in range(total)))
+    return latencies
+
+def report(name: str, latencies, elapsed: float):
+    ordered = sorted(latencies)
+    p50 = statistics.median(ordered) * 1000
+    p99 = ordered[int(len(ordered) * 0.99) - 1] * 1000
+    print(f"{name:<12} p50={p50:7.2f}ms  p99={p99:7.2f}ms  throughput={len(ordered) / elapsed:8.1f} req/s")
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=10)
+    args = parser.parse_args()
+
+    server = await asyncio.start_server(handle_connection, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    url = f"http://127.0.0.1:{port}/health"
+
+    async with server:
+        for name, runner in (("per-request", run_per_request), ("pooled", run_pooled)):
+            start = time.perf_counter()
+            latencies = await runner(url, args.requests, args.concurrency)
+            report(name, latencies, time.perf_counter() - start)
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -1,5 +1,7 @@
-from fastapi import FastAPI, HTTPException, UploadFile, File, Form, Header
+from fastapi import FastAPI, HTTPException, Header, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
 import httpx
 import aiofiles
 import os
@@ -28,6 +30,80 @@ TRANSCRIPTION_SERVICE = "http://transcription-service:8000"
 SUMMARIZATION_SERVICE = "http://summarization-service:8000"
 AUTH_SERVICE = "http://auth-service:8000"
 
+# Upstream connection pool settings
+UPSTREAM_MAX_CONNECTIONS = int(os.getenv("UPSTREAM_MAX_CONNECTIONS", "100"))
+UPSTREAM_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("UPSTREAM_MAX_KEEPALIVE_CONNECTIONS", "20"))
+UPSTREAM_KEEPALIVE_EXPIRY = float(os.getenv("UPSTREAM_KEEPALIVE_EXPIRY", "30.0"))
+UPSTREAM_HTTP2 = os.getenv("UPSTREAM_HTTP2", "false").lower() == "true"
+HEALTH_CHECK_TIMEOUT = float(os.getenv("HEALTH_CHECK_TIMEOUT", "10.0"))
+
+# Server-sent event streams hold a connection for as long as a transcription
+# runs, so they get a pool of their own rather than starving the request pool
+EVENT_STREAM_MAX_CONNECTIONS = int(os.getenv("EVENT_STREAM_MAX_CONNECTIONS", "1000"))
+# Longer than the transcription service's 15s keep-alive interval
+EVENT_STREAM_READ_TIMEOUT = float(os.getenv("EVENT_STREAM_READ_TIMEOUT", "60.0"))
+
+# Streaming upload settings
+UPLOAD_CHUNK_SIZE = int(os.getenv("UPLOAD_CHUNK_SIZE", str(1024 * 1024)))
+MAX_UPLOAD_SIZE = int(os.getenv("MAX_UPLOAD_SIZE", str(2 * 1024 * 1024 * 1024)))
+
+# Per-upstream (base URL, timeout in seconds)
+UPSTREAMS = {
+    "recording": (RECORDING_SERVICE, float(os.getenv("RECORDING_SERVICE_TIMEOUT", "10.0"))),
+    "transcription": (TRANSCRIPTION_SERVICE, float(os.getenv("TRANSCRIPTION_SERVICE_TIMEOUT", "30.0"))),
+    "summarization": (SUMMARIZATION_SERVICE, float(os.getenv("SUMMARIZATION_SERVICE_TIMEOUT", "60.0"))),
+    "auth": (AUTH_SERVICE, float(os.getenv("AUTH_SERVICE_TIMEOUT", "10.0"))),
+}
+
+# Long-lived clients, one per upstream, created at startup
+clients: Dict[str, httpx.AsyncClient] = {}
+# Clients for server-sent event streams, by upstream
+stream_clients: Dict[str, httpx.AsyncClient] = {}
+
+def create_upstream_client(base_url: str, timeout: float) -> httpx.AsyncClient:
+    """Create a pooled keep-alive client for a single upstream service"""
+    return httpx.AsyncClient(
+        base_url=base_url,
+        timeout=timeout,
+        limits=httpx.Limits(
+            max_connections=UPSTREAM_MAX_CONNECTIONS,
+            max_keepalive_connections=UPSTREAM_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=UPSTREAM_KEEPALIVE_EXPIRY,
+        ),
+        http2=UPSTREAM_HTTP2,
+    )
+
+def create_stream_client(base_url: str, timeout: float) -> httpx.AsyncClient:
+    """
+    Create a client for long-lived event streams: its own connection limit,
+    no wait limit for a free connection, and a read timeout that only trips
+    when the upstream stops sending keep-alives
+    """
+    return httpx.AsyncClient(
+        base_url=base_url,
+        timeout=httpx.Timeout(timeout, read=EVENT_STREAM_READ_TIMEOUT, pool=None),
+        limits=httpx.Limits(
+            max_connections=EVENT_STREAM_MAX_CONNECTIONS,
+            max_keepalive_connections=UPSTREAM_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=UPSTREAM_KEEPALIVE_EXPIRY,
+        ),
+        http2=UPSTREAM_HTTP2,
+    )
+
+@app.on_event("startup")
+async def startup_http_clients():
+    for name, (base_url, timeout) in UPSTREAMS.items():
+        clients[name] = create_upstream_client(base_url, timeout)
+    stream_clients["transcription"] = create_stream_client(*UPSTREAMS["transcription"])
+    logger.info(f"Upstream clients ready: {', '.join(clients)}")
+
+@app.on_event("shutdown")
+async def shutdown_http_clients():
+    for client in (*clients.values(), *stream_clients.values()):
+        await client.aclose()
+    clients.clear()
+    stream_clients.clear()
+
 @app.post("/api/v1/projects")
 async def create_project(
     project: Dict,
@@ -37,14 +113,13 @@ async def create_project(
     Create a new project
     """
     try:
-        async with httpx.AsyncClient(timeout=10.0) as client:
-            response = await client.post(
-                f"{RECORDING_SERVICE}/projects",
-                json=project,
-                headers={"Authorization": authorization}
-            )
-            response.raise_for_status()
-            return response.json()
+        response = await clients["recording"].post(
+            "/projects",
+            json=project,
+            headers={"Authorization": authorization}
+        )
+        response.raise_for_status()
+        return response.json()
     except httpx.HTTPStatusError as e:
         logger.error(f"Recording service error: {e.response.status_code} - {e.response.text}")
         raise HTTPException(
@@ -65,14 +140,13 @@ async def create_workspace(
     Create a new workspace in a project
     """
     try:
-        async with httpx.AsyncClient(timeout=10.0) as client:
-            response = await client.post(
-                f"{RECORDING_SERVICE}/projects/{project_id}/workspaces",
-                json=workspace,
-                headers={"Authorization": authorization}
-            )
-            response.raise_for_status()
-            return response.json()
+        response = await clients["recording"].post(
+            f"/projects/{project_id}/workspaces",
+            json=workspace,
+            headers={"Authorization": authorization}
+        )
+        response.raise_for_status()
+        return response.json()
     except httpx.HTTPStatusError as e:
         logger.error(f"Recording service error: {e.response.status_code} - {e.response.text}")
         raise HTTPException(
@@ -83,93 +157,284 @@ async def create_workspace(
         logger.error(f"Internal server error: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+class RequestBodyTooLarge(Exception):
+    """Raised while streaming when a request body exceeds MAX_UPLOAD_SIZE"""
+
+async def stream_request_body(request: Request, max_body_size: int):
+    """
+    Re-chunk the incoming request body into UPLOAD_CHUNK_SIZE pieces without
+    buffering more than one chunk. The upstream client pulls from this
+    generator, so a slow upstream slows down reads from the client.
+    """
+    received = 0
+    buffer = bytearray()
+    async for chunk in request.stream():
+        received += len(chunk)
+        if received > max_body_size:
+            raise RequestBodyTooLarge(f"Upload exceeds maximum size of {max_body_size} bytes")
+        buffer.extend(chunk)
+        while len(buffer) >= UPLOAD_CHUNK_SIZE:
+            yield bytes(buffer[:UPLOAD_CHUNK_SIZE])
+            del buffer[:UPLOAD_CHUNK_SIZE]
+    if buffer:
+        yield bytes(buffer)
+
 @app.post("/api/v1/meetings/record")
 async def start_recording(
-    file: UploadFile = File(...),
-    workspace_id: str = Form(...),
-    user_id: str = Form(...),
-    title: Optional[str] = Form(None),
-    description: Optional[str] = Form(None)
+    request: Request,
+    content_type: str = Header(...),
+    content_length: Optional[int] = Header(None)
 ) -> Dict:
     """
-    Handle file upload and forward to recording service
+    Stream the multipart upload (file, workspace_id, user_id, title,
+    description) to the recording service without buffering it in memory
     """
     try:
-        logger.info(f"Received file upload request: {file.filename}")
-        logger.info(f"Request data: workspace_id={workspace_id}, user_id={user_id}, title={title}")
-        
-        async with httpx.AsyncClient() as client:
-            # Create multipart form data
-            files = {"file": (file.filename, await file.read(), file.content_type)}
-            data = {
-                "workspace_id": workspace_id,
-                "user_id": user_id
-            }
-            
-            if title:
-                data["title"] = title
-            if description:
-                data["description"] = description
+        if not content_type.startswith("multipart/form-data"):
+            raise HTTPException(status_code=415, detail="Expected multipart/form-data")
+        if content_length is not None and content_length > MAX_UPLOAD_SIZE:
+            raise HTTPException(
+                status_code=413,
+                detail=f"Upload exceeds maximum size of {MAX_UPLOAD_SIZE} bytes"
+            )
 
-            logger.info(f"Forwarding request to recording service: {RECORDING_SERVICE}/upload")
-            try:
-                response = await client.post(
-                    f"{RECORDING_SERVICE}/upload",
-                    files=files,
-                    data=data
-                )
-                response.raise_for_status()
-                return response.json()
-                
-            except httpx.HTTPStatusError as e:
-                logger.error(f"Recording service error: {e.response.status_code} - {e.response.text}")
-                raise HTTPException(
-                    status_code=e.response.status_code,
-                    detail=e.response.text
-                )
-            except httpx.RequestError as e:
-                logger.error(f"Recording service connection error: {str(e)}")
-                raise HTTPException(
-                    status_code=503,
-                    detail=f"Recording service unavailable: {str(e)}"
-                )
+        logger.info(f"Received file upload request: content_length={content_length}")
+
+        headers = {"Content-Type": content_type}
+        if content_length is not None:
+            headers["Content-Length"] = str(content_length)
+
+        logger.info(f"Forwarding request to recording service: {RECORDING_SERVICE}/upload")
+        try:
+            response = await clients["recording"].post(
+                "/upload",
+                content=stream_request_body(request, MAX_UPLOAD_SIZE),
+                headers=headers
+            )
+            response.raise_for_status()
+            return response.json()
+            
+        except RequestBodyTooLarge as e:
+            logger.error(f"Upload rejected: {str(e)}")
+            raise HTTPException(status_code=413, detail=str(e))
+        except httpx.HTTPStatusError as e:
+            logger.error(f"Recording service error: {e.response.status_code} - {e.response.text}")
+            raise HTTPException(
+                status_code=e.response.status_code,
+                detail=e.response.text
+            )
+        except httpx.RequestError as e:
+            logger.error(f"Recording service connection error: {str(e)}")
+            raise HTTPException(
+                status_code=503,
+                detail=f"Recording service unavailable: {str(e)}"
+            )
     except HTTPException:
         raise
     except Exception as e:
         logger.error(f"Internal server error: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+async def forward_to_recording(method: str, path: str, **kwargs) -> Response:
+    """Forward a request to the recording service, passing status and body through"""
+    try:
+        response = await clients["recording"].request(method, path, **kwargs)
+    except RequestBodyTooLarge as e:
+        logger.error(f"Upload rejected: {str(e)}")
+        raise HTTPException(status_code=413, detail=str(e))
+    except httpx.RequestError as e:
+        logger.error(f"Recording service connection error: {str(e)}")
+        raise HTTPException(
+            status_code=503,
+            detail=f"Recording service unavailable: {str(e)}"
+        )
+    headers = {}
+    if "upload-offset" in response.headers:
+        headers["Upload-Offset"] = response.headers["upload-offset"]
+    return Response(
+        content=response.content,
+        status_code=response.status_code,
+        media_type=response.headers.get("content-type"),
+        headers=headers
+    )
+
+@app.post("/api/v1/meetings/uploads")
+async def create_upload_session(session: Dict) -> Response:
+    """
+    Start a resumable upload
+    """
+    return await forward_to_recording("POST", "/uploads", json=session)
+
+@app.get("/api/v1/meetings/uploads/{upload_id}")
+async def get_upload_offset(upload_id: str) -> Response:
+    """
+    Get the offset a resumable upload should continue from
+    """
+    return await forward_to_recording("GET", f"/uploads/{upload_id}")
+
+@app.patch("/api/v1/meetings/uploads/{upload_id}")
+async def append_upload_chunk(
+    upload_id: str,
+    request: Request,
+    upload_offset: int = Header(...),
+    content_length: Optional[int] = Header(None)
+) -> Response:
+    """
+    Stream one chunk of a resumable upload to the recording service
+    """
+    headers = {"Upload-Offset": str(upload_offset)}
+    if content_length is not None:
+        headers["Content-Length"] = str(content_length)
+    return await forward_to_recording(
+        "PATCH",
+        f"/uploads/{upload_id}",
+        content=stream_request_body(request, MAX_UPLOAD_SIZE),
+        headers=headers
+    )
+
+@app.post("/api/v1/meetings/uploads/{upload_id}/complete")
+async def complete_upload(upload_id: str) -> Response:
+    """
+    Finalize a resumable upload and create the recording
+    """
+    return await forward_to_recording("POST", f"/uploads/{upload_id}/complete")
+
+# Headers passed through for range-capable audio playback
+PLAYBACK_REQUEST_HEADERS = ("range", "if-range", "if-none-match")
+PLAYBACK_RESPONSE_HEADERS = ("accept-ranges", "content-length", "content-range", "content-type", "etag")
+
+@app.api_route("/api/v1/recordings/{recording_id}/audio", methods=["GET", "HEAD"])
+async def get_recording_audio(recording_id: str, request: Request) -> Response:
+    """
+    Stream recording audio from the recording service, passing Range and
+    conditional request headers through
+    """
+    headers = {
+        name: value for name, value in request.headers.items()
+        if name in PLAYBACK_REQUEST_HEADERS
+    }
+    client = clients["recording"]
+    upstream_request = client.build_request(
+        request.method,
+        f"/recordings/{recording_id}/audio",
+        headers=headers
+    )
+    try:
+        response = await client.send(upstream_request, stream=True)
+    except httpx.RequestError as e:
+        logger.error(f"Recording service connection error: {str(e)}")
+        raise HTTPException(
+            status_code=503,
+            detail=f"Recording service unavailable: {str(e)}"
+        )
+    return StreamingResponse(
+        response.aiter_raw(),
+        status_code=response.status_code,
+        headers={
+            name: value for name, value in response.headers.items()
+            if name in PLAYBACK_RESPONSE_HEADERS
+        },
+        background=BackgroundTask(response.aclose)
+    )
+
+async def forward_to_transcription(method: str, path: str, **kwargs) -> Response:
+    """Forward a request to the transcription service, passing status and body through"""
+    try:
+        response = await clients["transcription"].request(method, path, **kwargs)
+    except httpx.RequestError as e:
+        logger.error(f"Transcription service connection error: {str(e)}")
+        raise HTTPException(
+            status_code=503,
+            detail=f"Transcription service unavailable: {str(e)}"
+        )
+    return Response(
+        content=response.content,
+        status_code=response.status_code,
+        media_type=response.headers.get("content-type")
+    )
+
 @app.post("/api/v1/meetings/transcribe/{meeting_id}")
-async def transcribe_meeting(meeting_id: str) -> Dict:
-    async with httpx.AsyncClient() as client:
-        response = await client.post(
-            f"{TRANSCRIPTION_SERVICE}/transcribe/{meeting_id}"
+async def transcribe_meeting(
+    meeting_id: str,
+    model: Optional[str] = None,
+    precision: Optional[str] = None,
+    priority: Optional[str] = None
+) -> Response:
+    """
+    Queue a recording for transcription; returns the job to poll
+    """
+    params = {
+        name: value
+        for name, value in (("model", model), ("precision", precision), ("priority", priority))
+        if value
+    }
+    return await forward_to_transcription("POST", f"/transcribe/{meeting_id}", params=params or None)
+
+@app.get("/api/v1/meetings/transcribe/jobs/{job_id}")
+async def get_transcription_job(job_id: str) -> Response:
+    """
+    Status of a transcription job, with the transcript once completed
+    """
+    return await forward_to_transcription("GET", f"/status/{job_id}")
+
+@app.get("/api/v1/transcriptions/{transcription_id}/events")
+async def stream_transcription(transcription_id: str, request: Request) -> Response:
+    """
+    Server-sent events with a transcription's segments and progress as it
+    is transcribed
+    """
+    headers = {}
+    if "last-event-id" in request.headers:
+        headers["Last-Event-ID"] = request.headers["last-event-id"]
+    client = stream_clients["transcription"]
+    upstream_request = client.build_request(
+        "GET",
+        f"/transcriptions/{transcription_id}/events",
+        headers=headers
+    )
+    try:
+        response = await client.send(upstream_request, stream=True)
+    except httpx.RequestError as e:
+        logger.error(f"Transcription service connection error: {str(e)}")
+        raise HTTPException(
+            status_code=503,
+            detail=f"Transcription service unavailable: {str(e)}"
         )
-        return response.json()
+    return StreamingResponse(
+        response.aiter_raw(),
+        status_code=response.status_code,
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        media_type=response.headers.get("content-type"),
+        background=BackgroundTask(response.aclose)
+    )
 
 @app.get("/api/v1/meetings/{meeting_id}/summary")
 async def get_meeting_summary(meeting_id: str) -> Dict:
-    async with httpx.AsyncClient() as client:
-        response = await client.get(
-            f"{SUMMARIZATION_SERVICE}/summary/{meeting_id}"
-        )
-        return response.json()
+    response = await clients["summarization"].get(
+        f"/summary/{meeting_id}"
+    )
+    return response.json()
 
-@app.get("/api/v1/workspaces")
-async def get_user_workspaces(
-    authorization: str = Header(None)
+async def get_recording_service_page(
+    path: str,
+    authorization: Optional[str],
+    cursor: Optional[str],
+    limit: Optional[int]
 ) -> Dict:
-    """
-    Get all workspaces that the current user has access to
-    """
+    """Fetch one page of a paginated list from the recording service"""
     try:
-        async with httpx.AsyncClient(timeout=10.0) as client:
-            response = await client.get(
-                f"{RECORDING_SERVICE}/workspaces",
-                headers={"Authorization": authorization}
-            )
-            response.raise_for_status()
-            return response.json()
+        params = {}
+        if cursor:
+            params["cursor"] = cursor
+        if limit:
+            params["limit"] = limit
+        response = await clients["recording"].get(
+            path,
+            params=params,
+            headers={"Authorization": authorization}
+        )
+        response.raise_for_status()
+        return response.json()
     except httpx.HTTPStatusError as e:
         logger.error(f"Recording service error: {e.response.status_code} - {e.response.text}")
         raise HTTPException(
@@ -180,34 +445,72 @@ async def get_user_workspaces(
         logger.error(f"Internal server error: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/api/v1/projects")
+async def list_projects(
+    authorization: str = Header(None),
+    cursor: Optional[str] = None,
+    limit: Optional[int] = None
+) -> Dict:
+    """
+    Get the current user's projects, one page at a time
+    """
+    return await get_recording_service_page("/projects", authorization, cursor, limit)
+
+@app.get("/api/v1/projects/{project_id}/workspaces")
+async def list_project_workspaces(
+    project_id: str,
+    authorization: str = Header(None),
+    cursor: Optional[str] = None,
+    limit: Optional[int] = None
+) -> Dict:
+    """
+    Get the workspaces of a project, one page at a time
+    """
+    return await get_recording_service_page(f"/projects/{project_id}/workspaces", authorization, cursor, limit)
+
+@app.get("/api/v1/workspaces")
+async def get_user_workspaces(
+    authorization: str = Header(None),
+    cursor: Optional[str] = None,
+    limit: Optional[int] = None
+) -> Dict:
+    """
+    Get the workspaces that the current user has access to, one page at a time
+    """
+    return await get_recording_service_page("/workspaces", authorization, cursor, limit)
+
+@app.get("/api/v1/workspaces/{workspace_id}/recordings")
+async def list_workspace_recordings(
+    workspace_id: str,
+    authorization: str = Header(None),
+    cursor: Optional[str] = None,
+    limit: Optional[int] = None
+) -> Dict:
+    """
+    Get the recordings in a workspace, one page at a time
+    """
+    return await get_recording_service_page(f"/workspaces/{workspace_id}/recordings", authorization, cursor, limit)
+
 @app.get("/health")
 async def health_check():
     """
     Check health of all dependent services
     """
     try:
-        async with httpx.AsyncClient(timeout=10.0) as client:  # Increase timeout
-            services = {
-                "recording": RECORDING_SERVICE,
-                "transcription": TRANSCRIPTION_SERVICE,
-                "summarization": SUMMARIZATION_SERVICE,
-                "auth": AUTH_SERVICE
-            }
-            
-            status = {}
-            for name, url in services.items():
-                try:
-                    response = await client.get(f"{url}/health")
-                    status[name] = "healthy" if response.status_code == 200 else "unhealthy"
-                except Exception as e:
-                    logger.error(f"Health check failed for {name}: {str(e)}")
-                    status[name] = "unavailable"
+        status = {}
+        for name, client in clients.items():
+            try:
+                response = await client.get("/health", timeout=HEALTH_CHECK_TIMEOUT)
+                status[name] = "healthy" if response.status_code == 200 else "unhealthy"
+            except Exception as e:
+                logger.error(f"Health check failed for {name}: {str(e)}")
+                status[name] = "unavailable"
+        
+        # Return 503 only if all services are unavailable
+        if all(s == "unavailable" for s in status.values()):
+            raise HTTPException(status_code=503, detail="All services unavailable")
             
-            # Return 503 only if all services are unavailable
-            if all(s == "unavailable" for s in status.values()):
-                raise HTTPException(status_code=503, detail="All services unavailable")
-                
-            return status
+        return status
     except Exception as e:
         logger.error(f"Health check error: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e)) 
\ No newline at end of file
@@ -9,13 +9,15 @@ db = db.getSiblingDB('meeting_minutes');
 
 // Create collections with schema validation
 try {
-    // Helper function to create collection if it doesn't exist
+    // Helper function to create collection if it doesn't exist, or bring an
+    // existing collection's validator up to date
     function createCollectionIfNotExists(name, options) {
         if (!db.getCollectionNames().includes(name)) {
             print(`Creating collection: ${name}`);
             db.createCollection(name, options);
         } else {
-            print(`Collection ${name} already exists`);
+            print(`Collection ${name} already exists, updating its validator`);
+            db.runCommand({ collMod: name, validator: options.validator });
         }
     }
 
@@ -83,7 +85,12 @@ try {
                     title: { bsonType: 'string' },
                     description: { bsonType: 'string' },
                     duration: { bsonType: 'number' },
+                    sample_rate: { bsonType: ['int', 'null'] },
+                    channels: { bsonType: ['int', 'null'] },
+                    codec: { bsonType: ['string', 'null'] },
                     file_path: { bsonType: 'string' },
+                    file_size: { bsonType: ['long', 'int'] },
+                    sha256: { bsonType: 'string' },
                     status: { 
                         enum: ['pending', 'processing', 'completed', 'error'] 
                     },
@@ -94,6 +101,49 @@ try {
         }
     });
 
+    createCollectionIfNotExists('blobs', {
+        validator: {
+            $jsonSchema: {
+                bsonType: 'object',
+                required: ['file_path', 'size', 'ref_count', 'created_at'],
+                properties: {
+                    _id: { bsonType: 'string' },
+                    file_path: { bsonType: 'string' },
+                    size: { bsonType: ['long', 'int'] },
+                    ref_count: { bsonType: ['long', 'int'], minimum: 0 },
+                    reused_transcriptions: { bsonType: ['long', 'int'] },
+                    reused_summaries: { bsonType: ['long', 'int'] },
+                    created_at: { bsonType: 'date' },
+                    updated_at: { bsonType: 'date' }
+                }
+            }
+        }
+    });
+
+    createCollectionIfNotExists('upload_sessions', {
+        validator: {
+            $jsonSchema: {
+                bsonType: 'object',
+                required: ['workspace_id', 'user_id', 'filename', 'offset', 'part_path', 'status', 'created_at'],
+                properties: {
+                    workspace_id: { bsonType: 'objectId' },
+                    user_id: { bsonType: 'objectId' },
+                    filename: { bsonType: 'string' },
+                    title: { bsonType: ['string', 'null'] },
+                    description: { bsonType: ['string', 'null'] },
+                    total_size: { bsonType: ['long', 'int', 'null'] },
+                    offset: { bsonType: ['long', 'int'] },
+                    part_path: { bsonType: 'string' },
+                    status: {
+                        enum: ['uploading', 'completing']
+                    },
+                    created_at: { bsonType: 'date' },
+                    updated_at: { bsonType: 'date' }
+                }
+            }
+        }
+    });
+
     createCollectionIfNotExists('transcriptions', {
         validator: {
             $jsonSchema: {
@@ -101,12 +151,15 @@ try {
                 required: ['recording_id', 'status', 'created_at'],
                 properties: {
                     recording_id: { bsonType: 'objectId' },
-                    text: { bsonType: 'string' },
-                    language: { bsonType: 'string' },
-                    confidence: { bsonType: 'number' },
+                    text: { bsonType: ['string', 'null'] },
+                    language: { bsonType: ['string', 'null'] },
+                    confidence: { bsonType: ['number', 'null'] },
+                    model: { bsonType: ['string', 'null'] },
                     status: {
                         enum: ['pending', 'processing', 'completed', 'error']
                     },
+                    progress: { bsonType: 'number' },
+                    attempt: { bsonType: 'int' },
                     segments: {
                         bsonType: 'array',
                         items: {
@@ -126,14 +179,80 @@ try {
         }
     });
 
-    createCollectionIfNotExists('summaries', {
+    createCollectionIfNotExists('transcription_jobs', {
         validator: {
             $jsonSchema: {
                 bsonType: 'object',
-                required: ['transcription_id', 'created_at'],
+                required: ['recording_id', 'transcription_id', 'status', 'active', 'attempts', 'max_attempts', 'run_after', 'created_at'],
                 properties: {
+                    recording_id: { bsonType: 'objectId' },
                     transcription_id: { bsonType: 'objectId' },
-                    overview: { bsonType: 'string' },
+                    model: { bsonType: 'string' },
+                    duration: { bsonType: ['number', 'null'] },
+                    priority: { enum: ['interactive', 'backfill'] },
+                    workspace_id: { bsonType: ['objectId', 'null'] },
+                    status: {
+                        enum: ['pending', 'processing', 'completed', 'error']
+                    },
+                    active: { bsonType: 'bool' },
+                    attempts: { bsonType: 'int' },
+                    max_attempts: { bsonType: 'int' },
+                    run_after: { bsonType: 'date' },
+                    lease_owner: { bsonType: ['string', 'null'] },
+                    lease_expires_at: { bsonType: ['date', 'null'] },
+                    last_error: { bsonType: ['string', 'null'] },
+                    created_at: { bsonType: 'date' },
+                    updated_at: { bsonType: 'date' }
+                }
+            }
+        }
+    });
+
+    createCollectionIfNotExists('transcription_fair_share', {
+        validator: {
+            $jsonSchema: {
+                bsonType: 'object',
+                required: ['priority', 'virtual_time'],
+                properties: {
+                    _id: { bsonType: 'string' },
+                    priority: { enum: ['interactive', 'backfill'] },
+                    workspace_id: { bsonType: ['objectId', 'null'] },
+                    virtual_time: { bsonType: 'number' },
+                    weight: { bsonType: 'number' },
+                    updated_at: { bsonType: 'date' }
+                }
+            }
+        }
+    });
+
+    createCollectionIfNotExists('transcription_cache', {
+        validator: {
+            $jsonSchema: {
+                bsonType: 'object',
+                required: ['sha256', 'model', 'options', 'result', 'size', 'created_at', 'last_used_at'],
+                properties: {
+                    _id: { bsonType: 'string' },
+                    sha256: { bsonType: 'string' },
+                    model: { bsonType: 'string' },
+                    options: { bsonType: 'object' },
+                    result: { bsonType: 'object' },
+                    size: { bsonType: ['long', 'int'] },
+                    hits: { bsonType: ['long', 'int'] },
+                    created_at: { bsonType: 'date' },
+                    last_used_at: { bsonType: 'date' }
+                }
+            }
+        }
+    });
+
+    createCollectionIfNotExists('summaries', {
+        validator: {
+            $jsonSchema: {
+                bsonType: 'object',
+                required: ['created_at'],
+                properties: {
+                    transcription_id: { bsonType: ['objectId', 'null'] },
+                    overview: { bsonType: ['string', 'null'] },
                     key_points: { 
                         bsonType: 'array',
                         items: { bsonType: 'string' }
@@ -158,8 +277,17 @@ try {
                         bsonType: 'array',
                         items: { bsonType: 'string' }
                     },
+                    cache_key: { bsonType: ['string', 'null'] },
+                    text_sha256: { bsonType: ['string', 'null'] },
+                    model: { bsonType: ['string', 'null'] },
+                    precision: { bsonType: ['string', 'null'] },
+                    generation: { bsonType: 'object' },
+                    chunks: { bsonType: ['long', 'int'] },
+                    passes: { bsonType: ['long', 'int'] },
+                    hits: { bsonType: ['long', 'int'] },
                     created_at: { bsonType: 'date' },
-                    updated_at: { bsonType: 'date' }
+                    updated_at: { bsonType: 'date' },
+                    last_used_at: { bsonType: 'date' }
                 }
             }
         }
@@ -170,15 +298,36 @@ try {
     db.users.createIndex({ "email": 1 }, { unique: true, background: true });
     db.projects.createIndex({ "owner_id": 1 }, { background: true });
     db.projects.createIndex({ "created_at": 1 }, { background: true });
+    db.projects.createIndex({ "owner_id": 1, "created_at": 1, "_id": 1 }, { background: true });
     
     db.workspaces.createIndex({ "project_id": 1 }, { background: true });
+    db.workspaces.createIndex({ "project_id": 1, "created_at": 1, "_id": 1 }, { background: true });
     db.workspaces.createIndex({ "created_at": 1 }, { background: true });
     
     db.recordings.createIndex({ "workspace_id": 1 }, { background: true });
+    db.recordings.createIndex({ "workspace_id": 1, "created_at": 1, "_id": 1 }, { background: true });
     db.recordings.createIndex({ "user_id": 1 }, { background: true });
     db.recordings.createIndex({ "created_at": 1 }, { background: true });
+    db.recordings.createIndex({ "sha256": 1 }, { background: true });
+    db.upload_sessions.createIndex({ "updated_at": 1 }, { background: true });
     db.transcriptions.createIndex({ "recording_id": 1 }, { background: true });
+    db.transcription_jobs.createIndex({ "status": 1, "run_after": 1 }, { background: true });
+    db.transcription_jobs.createIndex({ "status": 1, "lease_expires_at": 1 }, { background: true });
+    db.transcription_jobs.createIndex({ "status": 1, "priority": 1, "workspace_id": 1, "run_after": 1 }, { background: true });
+    db.transcription_fair_share.createIndex({ "priority": 1, "workspace_id": 1 }, { background: true });
+    // At most one pending/processing job per recording
+    db.transcription_jobs.createIndex(
+        { "recording_id": 1 },
+        { unique: true, partialFilterExpression: { active: true }, background: true }
+    );
+    db.transcription_cache.createIndex({ "created_at": 1 }, { background: true });
+    db.transcription_cache.createIndex({ "last_used_at": 1 }, { background: true });
     db.summaries.createIndex({ "transcription_id": 1 }, { background: true });
+    db.summaries.createIndex(
+        { "cache_key": 1 },
+        { unique: true, partialFilterExpression: { cache_key: { $type: 'string' } }, background: true }
+    );
+    db.summaries.createIndex({ "created_at": 1 }, { background: true });
 
     // Create test user if it doesn't exist
     if (!db.users.findOne({ email: "test@example.com" })) {
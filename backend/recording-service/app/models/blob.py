@@ -0,0 +1,85 @@
+from datetime import datetime
+from pymongo import ReturnDocument
+
+class BlobService:
+    """
+    Reference-counted, content-addressed recording blobs. Each document is
+    keyed by the SHA-256 of the file contents, so identical uploads share
+    one file on disk.
+    """
+    def __init__(self, db):
+        self.db = db
+        self.collection = db.blobs
+
+    async def add_reference(self, sha256: str, file_path: str, size: int) -> bool:
+        """Count one more recording using this content; True if the blob is new"""
+        now = datetime.utcnow()
+        result = await self.collection.update_one(
+            {"_id": sha256},
+            {
+                "$inc": {"ref_count": 1},
+                "$set": {"updated_at": now},
+                "$setOnInsert": {
+                    "file_path": file_path,
+                    "size": size,
+                    "reused_transcriptions": 0,
+                    "reused_summaries": 0,
+                    "created_at": now
+                }
+            },
+            upsert=True
+        )
+        return result.upserted_id is not None
+
+    async def release(self, sha256: str):
+        """
+        Drop one reference. Returns the blob document once nothing references
+        it any more (the caller deletes the file), otherwise None.
+        """
+        blob = await self.collection.find_one_and_update(
+            {"_id": sha256, "ref_count": {"$gt": 0}},
+            {"$inc": {"ref_count": -1}, "$set": {"updated_at": datetime.utcnow()}},
+            return_document=ReturnDocument.AFTER
+        )
+        if blob and blob["ref_count"] == 0:
+            await self.collection.delete_one({"_id": sha256, "ref_count": 0})
+            return blob
+        return None
+
+    async def get_blob(self, sha256: str):
+        return await self.collection.find_one({"_id": sha256})
+
+    async def record_reuse(self, sha256: str, transcriptions: int = 0, summaries: int = 0):
+        await self.collection.update_one(
+            {"_id": sha256},
+            {"$inc": {"reused_transcriptions": transcriptions, "reused_summaries": summaries}}
+        )
+
+    async def get_stats(self) -> dict:
+        """Disk and inference work saved by deduplication"""
+        cursor = self.collection.aggregate([
+            {"$group": {
+                "_id": None,
+                "blobs": {"$sum": 1},
+                "references": {"$sum": "$ref_count"},
+                "stored_bytes": {"$sum": "$size"},
+                "logical_bytes": {"$sum": {"$multiply": ["$size", "$ref_count"]}},
+                "reused_transcriptions": {"$sum": "$reused_transcriptions"},
+                "reused_summaries": {"$sum": "$reused_summaries"}
+            }}
+        ])
+        stats = await cursor.to_list(length=1)
+        if not stats:
+            return {
+                "blobs": 0,
+                "references": 0,
+                "stored_bytes": 0,
+                "logical_bytes": 0,
+                "bytes_saved": 0,
+                "reused_transcriptions": 0,
+                "reused_summaries": 0
+            }
+        stats = stats[0]
+        stats.pop("_id")
+        stats["bytes_saved"] = stats["logical_bytes"] - stats["stored_bytes"]
+        return stats
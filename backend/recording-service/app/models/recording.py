@@ -2,6 +2,11 @@ from datetime import datetime
 from typing import Optional
 from pydantic import BaseModel, Field
 from bson import ObjectId
+from app.pagination import fetch_page
+
+# Summary fields used by the summarization service's cache, not copied
+# when a duplicate recording reuses another's summaries
+SUMMARY_CACHE_FIELDS = ("cache_key", "text_sha256", "hits", "last_used_at")
 
 # Custom type for handling MongoDB ObjectId
 class PyObjectId(ObjectId):
@@ -48,7 +53,12 @@ class RecordingModel(MongoBaseModel):
     title: Optional[str] = None
     description: Optional[str] = None
     duration: float = 0.0
+    sample_rate: Optional[int] = None
+    channels: Optional[int] = None
+    codec: Optional[str] = None
     file_path: str
+    file_size: Optional[int] = None
+    sha256: Optional[str] = None
     status: str = "pending"
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
@@ -61,6 +71,14 @@ class RecordingModel(MongoBaseModel):
             }
         }
 
+# Fields returned by list endpoints
+PROJECT_PROJECTION = {"name": 1, "owner_id": 1, "description": 1, "updated_at": 1}
+WORKSPACE_PROJECTION = {"name": 1, "project_id": 1, "description": 1, "updated_at": 1}
+RECORDING_PROJECTION = {
+    "workspace_id": 1, "user_id": 1, "filename": 1, "title": 1, "description": 1,
+    "duration": 1, "file_size": 1, "codec": 1, "status": 1, "updated_at": 1
+}
+
 class ProjectService:
     def __init__(self, db):
         self.db = db
@@ -70,9 +88,29 @@ class ProjectService:
         result = await self.collection.insert_one(project.dict())
         return result.inserted_id
 
-    async def get_user_projects(self, user_id: str):
-        cursor = self.collection.find({"owner_id": ObjectId(user_id)})
-        return await cursor.to_list(length=None)
+    async def get_user_projects(self, user_id: str, cursor: Optional[str] = None, limit: Optional[int] = None):
+        """One page of the user's projects in creation order: (projects, next_cursor)"""
+        return await fetch_page(
+            self.collection,
+            {"owner_id": ObjectId(user_id)},
+            cursor=cursor,
+            limit=limit,
+            projection=PROJECT_PROJECTION
+        )
+
+    async def is_project_owner(self, project_id: str, user_id: str) -> bool:
+        if not ObjectId.is_valid(user_id):
+            return False
+        project = await self.collection.find_one(
+            {"_id": ObjectId(project_id), "owner_id": ObjectId(user_id)},
+            {"_id": 1}
+        )
+        return project is not None
+
+    async def get_user_project_names(self, user_id: str) -> dict:
+        """Map of project _id -> name for every project the user owns"""
+        cursor = self.collection.find({"owner_id": ObjectId(user_id)}, {"name": 1})
+        return {project["_id"]: project["name"] async for project in cursor}
 
 class WorkspaceService:
     def __init__(self, db):
@@ -83,9 +121,25 @@ class WorkspaceService:
         result = await self.collection.insert_one(workspace.dict())
         return str(result.inserted_id)
 
-    async def get_project_workspaces(self, project_id: str):
-        cursor = self.collection.find({"project_id": ObjectId(project_id)})
-        return await cursor.to_list(length=None)
+    async def get_project_workspaces(self, project_id: str, cursor: Optional[str] = None, limit: Optional[int] = None):
+        """One page of a project's workspaces in creation order: (workspaces, next_cursor)"""
+        return await fetch_page(
+            self.collection,
+            {"project_id": ObjectId(project_id)},
+            cursor=cursor,
+            limit=limit,
+            projection=WORKSPACE_PROJECTION
+        )
+
+    async def get_workspaces_page(self, project_ids: list, cursor: Optional[str] = None, limit: Optional[int] = None):
+        """One page of the workspaces in any of project_ids, in creation order"""
+        return await fetch_page(
+            self.collection,
+            {"project_id": {"$in": project_ids}},
+            cursor=cursor,
+            limit=limit,
+            projection=WORKSPACE_PROJECTION
+        )
 
     async def get_workspace(self, workspace_id: str):
         """Get a workspace by ID"""
@@ -117,9 +171,58 @@ class RecordingService:
         result = await self.collection.insert_one(recording.dict())
         return str(result.inserted_id)
 
-    async def get_workspace_recordings(self, workspace_id: str):
-        cursor = self.collection.find({"workspace_id": ObjectId(workspace_id)})
-        return await cursor.to_list(length=None)
+    async def get_workspace_recordings(self, workspace_id: str, cursor: Optional[str] = None, limit: Optional[int] = None):
+        """One page of a workspace's recordings in creation order: (recordings, next_cursor)"""
+        return await fetch_page(
+            self.collection,
+            {"workspace_id": ObjectId(workspace_id)},
+            cursor=cursor,
+            limit=limit,
+            projection=RECORDING_PROJECTION
+        )
+
+    async def reuse_duplicate_results(self, recording_id: str, sha256: str) -> dict:
+        """
+        Copy the completed transcription, and any summaries of it, from an
+        earlier recording with the same content onto this recording.
+        Returns how many of each were copied.
+        """
+        reused = {"transcriptions": 0, "summaries": 0}
+        cursor = self.collection.find(
+            {"sha256": sha256, "_id": {"$ne": ObjectId(recording_id)}},
+            {"_id": 1}
+        )
+        duplicate_ids = [doc["_id"] for doc in await cursor.to_list(length=None)]
+        if not duplicate_ids:
+            return reused
+
+        transcription = await self.db.transcriptions.find_one(
+            {"recording_id": {"$in": duplicate_ids}, "status": "completed"},
+            sort=[("updated_at", -1)]
+        )
+        if not transcription:
+            return reused
+
+        now = datetime.utcnow()
+        source_transcription_id = transcription.pop("_id")
+        transcription.update(recording_id=ObjectId(recording_id), created_at=now, updated_at=now)
+        result = await self.db.transcriptions.insert_one(transcription)
+        reused["transcriptions"] = 1
+
+        summaries = await self.db.summaries.find(
+            {"transcription_id": source_transcription_id}
+        ).to_list(length=None)
+        for summary in summaries:
+            summary.pop("_id")
+            # Cache bookkeeping stays with the source; cache_key is unique
+            for field in SUMMARY_CACHE_FIELDS:
+                summary.pop(field, None)
+            summary.update(transcription_id=result.inserted_id, created_at=now, updated_at=now)
+            await self.db.summaries.insert_one(summary)
+        reused["summaries"] = len(summaries)
+
+        await self.update_recording(recording_id, {"status": "completed"})
+        return reused
 
     async def get_recording(self, recording_id: str):
         return await self.collection.find_one({"_id": ObjectId(recording_id)})
@@ -0,0 +1,66 @@
+from datetime import datetime
+from typing import Optional
+from pydantic import Field
+from bson import ObjectId
+from app.models.recording import MongoBaseModel, PyObjectId
+
+class UploadSessionModel(MongoBaseModel):
+    workspace_id: PyObjectId
+    user_id: PyObjectId
+    filename: str
+    title: Optional[str] = None
+    description: Optional[str] = None
+    total_size: Optional[int] = None
+    offset: int = 0
+    part_path: str
+    status: str = "uploading"
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
+
+class UploadSessionService:
+    def __init__(self, db):
+        self.db = db
+        self.collection = db.upload_sessions
+
+    async def create_session(self, session: UploadSessionModel):
+        result = await self.collection.insert_one(session.dict())
+        return str(result.inserted_id)
+
+    async def get_session(self, upload_id: str):
+        if not ObjectId.is_valid(upload_id):
+            return None
+        return await self.collection.find_one({"_id": ObjectId(upload_id)})
+
+    async def advance_offset(self, upload_id: str, expected_offset: int, new_offset: int) -> bool:
+        """Move the offset forward only if nobody else has moved it meanwhile"""
+        result = await self.collection.update_one(
+            {"_id": ObjectId(upload_id), "offset": expected_offset, "status": "uploading"},
+            {"$set": {"offset": new_offset, "updated_at": datetime.utcnow()}}
+        )
+        return result.modified_count == 1
+
+    async def mark_completing(self, upload_id: str) -> bool:
+        """Claim the session for completion; fails if another request already did"""
+        result = await self.collection.update_one(
+            {"_id": ObjectId(upload_id), "status": "uploading"},
+            {"$set": {"status": "completing", "updated_at": datetime.utcnow()}}
+        )
+        return result.modified_count == 1
+
+    async def release_completing(self, upload_id: str):
+        """Return a session whose completion failed to uploading, so it can be retried"""
+        await self.collection.update_one(
+            {"_id": ObjectId(upload_id), "status": "completing"},
+            {"$set": {"status": "uploading", "updated_at": datetime.utcnow()}}
+        )
+
+    async def delete_session(self, upload_id: str):
+        await self.collection.delete_one({"_id": ObjectId(upload_id)})
+
+    async def get_expired_sessions(self, cutoff: datetime):
+        """Sessions that have not received data since cutoff"""
+        cursor = self.collection.find(
+            {"updated_at": {"$lt": cutoff}},
+            {"part_path": 1}
+        )
+        return await cursor.to_list(length=None)
@@ -0,0 +1,81 @@
+"""
+Keyset pagination on (created_at, _id).
+
+Pages are fetched with a range condition on the last seen sort key rather
+than skip(), so with a matching compound index a deep page costs the same
+as the first one. Cursors are opaque to clients: base64 of the last
+document's sort key.
+"""
+import base64
+import json
+import os
+from datetime import datetime
+from typing import List, Optional, Tuple
+from bson import ObjectId
+
+DEFAULT_PAGE_SIZE = int(os.getenv("DEFAULT_PAGE_SIZE", "50"))
+MAX_PAGE_SIZE = int(os.getenv("MAX_PAGE_SIZE", "500"))
+
+SORT_ORDER = [("created_at", 1), ("_id", 1)]
+
+def encode_cursor(document: dict) -> str:
+    key = {"created_at": document["created_at"].isoformat(), "id": str(document["_id"])}
+    return base64.urlsafe_b64encode(json.dumps(key).encode()).decode()
+
+def decode_cursor(cursor: str) -> Tuple[datetime, ObjectId]:
+    """Raises ValueError for cursors that were not produced by encode_cursor"""
+    try:
+        key = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return datetime.fromisoformat(key["created_at"]), ObjectId(key["id"])
+    except Exception:
+        raise ValueError("Invalid pagination cursor")
+
+def clamp_page_size(limit: Optional[int]) -> int:
+    if not limit or limit < 1:
+        return DEFAULT_PAGE_SIZE
+    return min(limit, MAX_PAGE_SIZE)
+
+def after_cursor(query: dict, cursor: Optional[str]) -> dict:
+    """Add the keyset condition for documents after cursor to query"""
+    if not cursor:
+        return query
+    created_at, last_id = decode_cursor(cursor)
+    return {
+        "$and": [
+            query,
+            {"$or": [
+                {"created_at": {"$gt": created_at}},
+                {"created_at": created_at, "_id": {"$gt": last_id}}
+            ]}
+        ]
+    }
+
+async def fetch_page(
+    collection,
+    query: dict,
+    cursor: Optional[str] = None,
+    limit: Optional[int] = None,
+    projection: Optional[dict] = None
+) -> Tuple[List[dict], Optional[str]]:
+    """Return (documents, next_cursor); next_cursor is None on the last page"""
+    page_size = clamp_page_size(limit)
+    if projection is not None:
+        # The sort key is needed to build the next cursor
+        projection = {**projection, "created_at": 1}
+    documents = await collection.find(
+        after_cursor(query, cursor),
+        projection
+    ).sort(SORT_ORDER).limit(page_size + 1).to_list(length=page_size + 1)
+
+    next_cursor = None
+    if len(documents) > page_size:
+        documents = documents[:page_size]
+        next_cursor = encode_cursor(documents[-1])
+    return documents, next_cursor
+
+def serialize_document(document: dict) -> dict:
+    """Make a Mongo document JSON-friendly (ObjectIds as strings)"""
+    return {
+        key: str(value) if isinstance(value, ObjectId) else value
+        for key, value in document.items()
+    }
@@ -0,0 +1,302 @@
+"""
+Header-only audio probing.
+
+Reads just the container metadata needed for duration, sample rate, channel
+count and codec: the moov box of MP4/M4A, the fmt/data chunks of WAV, the
+first and last pages of Ogg (Opus/Vorbis), and the first frame plus any
+Xing/Info/VBRI header of MP3. Audio data is never decoded, and the bytes
+read stay small however long the recording is.
+"""
+import logging
+import os
+import struct
+from typing import BinaryIO, Iterator, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# How far to look for MP3 frame sync / the last Ogg page
+SCAN_SIZE = 64 * 1024
+
+MP4_CODECS = {
+    b"mp4a": "aac",
+    b"alac": "alac",
+    b"Opus": "opus",
+    b"fLaC": "flac",
+    b"ac-3": "ac3",
+    b"ec-3": "eac3",
+    b"samr": "amr_nb",
+    b"sawb": "amr_wb",
+    b".mp3": "mp3",
+}
+
+# Boxes on the path moov -> trak -> mdia -> minf -> stbl -> stsd
+MP4_CONTAINER_BOXES = {b"moov", b"trak", b"mdia", b"minf", b"stbl"}
+
+MP3_BITRATES = {
+    # (MPEG1?, layer) -> kbps by index
+    (True, 1): [0, 32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448],
+    (True, 2): [0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384],
+    (True, 3): [0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320],
+    (False, 1): [0, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256],
+    (False, 2): [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],
+    (False, 3): [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],
+}
+MP3_SAMPLE_RATES = {
+    3: [44100, 48000, 32000],  # MPEG1
+    2: [22050, 24000, 16000],  # MPEG2
+    0: [11025, 12000, 8000],   # MPEG2.5
+}
+
+def probe_audio(path: str) -> Optional[dict]:
+    """
+    Return {"duration", "sample_rate", "channels", "codec"} for a recording,
+    or None if the container is not recognised or its headers are broken.
+    """
+    try:
+        with open(path, "rb") as f:
+            head = f.read(12)
+            f.seek(0)
+            if head[:4] == b"RIFF" and head[8:12] == b"WAVE":
+                return _probe_wav(f)
+            if head[4:8] == b"ftyp":
+                return _probe_mp4(f)
+            if head[:4] == b"OggS":
+                return _probe_ogg(f)
+            if head[:3] == b"ID3" or (len(head) >= 2 and head[0] == 0xFF and head[1] & 0xE0 == 0xE0):
+                return _probe_mp3(f)
+    except (OSError, struct.error, ValueError, IndexError, ZeroDivisionError) as e:
+        logger.warning(f"Could not probe {path}: {str(e)}")
+    return None
+
+def _file_size(f: BinaryIO) -> int:
+    return os.fstat(f.fileno()).st_size
+
+def _iter_mp4_boxes(f: BinaryIO, start: int, end: int) -> Iterator[Tuple[bytes, int, int]]:
+    """Yield (type, payload_start, payload_end) for boxes in [start, end), reading headers only"""
+    offset = start
+    while offset + 8 <= end:
+        f.seek(offset)
+        size, box_type = struct.unpack(">I4s", f.read(8))
+        header = 8
+        if size == 1:
+            size = struct.unpack(">Q", f.read(8))[0]
+            header = 16
+        elif size == 0:
+            size = end - offset
+        if size < header:
+            raise ValueError(f"Invalid MP4 box size at offset {offset}")
+        yield box_type, offset + header, min(offset + size, end)
+        offset += size
+
+def _read_mp4_timing(f: BinaryIO, start: int) -> Tuple[int, int]:
+    """(timescale, duration) from an mvhd or mdhd payload"""
+    f.seek(start)
+    version = f.read(1)
+    if not version:
+        raise ValueError(f"Truncated MP4 header at offset {start}")
+    if version[0] == 1:
+        f.seek(start + 4 + 16)
+        return struct.unpack(">IQ", f.read(12))
+    f.seek(start + 4 + 8)
+    return struct.unpack(">II", f.read(8))
+
+def _probe_mp4(f: BinaryIO) -> Optional[dict]:
+    size = _file_size(f)
+    moov = next((box for box in _iter_mp4_boxes(f, 0, size) if box[0] == b"moov"), None)
+    if moov is None:
+        return None
+
+    result = {"duration": None, "sample_rate": None, "channels": None, "codec": None}
+
+    def walk(start: int, end: int, track: dict):
+        for box_type, payload_start, payload_end in _iter_mp4_boxes(f, start, end):
+            if box_type == b"mvhd":
+                timescale, duration = _read_mp4_timing(f, payload_start)
+                if timescale and result["duration"] is None:
+                    result["duration"] = duration / timescale
+            elif box_type == b"trak":
+                trak = {}
+                walk(payload_start, payload_end, trak)
+                if trak.get("handler") == b"soun" and result["codec"] is None:
+                    if trak.get("timescale"):
+                        result["duration"] = trak["duration"] / trak["timescale"]
+                    result.update(
+                        sample_rate=trak.get("sample_rate") or trak.get("timescale"),
+                        channels=trak.get("channels"),
+                        codec=trak.get("codec")
+                    )
+            elif box_type == b"mdhd":
+                track["timescale"], track["duration"] = _read_mp4_timing(f, payload_start)
+            elif box_type == b"hdlr":
+                f.seek(payload_start + 8)
+                track["handler"] = f.read(4)
+            elif box_type == b"stsd":
+                f.seek(payload_start + 8)
+                entry = f.read(36)
+                if len(entry) == 36:
+                    fourcc = entry[4:8]
+                    track["codec"] = MP4_CODECS.get(fourcc, fourcc.decode("latin-1").strip())
+                    track["channels"] = struct.unpack(">H", entry[24:26])[0]
+                    track["sample_rate"] = struct.unpack(">I", entry[32:36])[0] >> 16
+            elif box_type in MP4_CONTAINER_BOXES:
+                walk(payload_start, payload_end, track)
+
+    walk(moov[1], moov[2], {})
+    return result
+
+def _probe_wav(f: BinaryIO) -> Optional[dict]:
+    size = _file_size(f)
+    offset = 12
+    fmt = None
+    while offset + 8 <= size:
+        f.seek(offset)
+        chunk_id, chunk_size = struct.unpack("<4sI", f.read(8))
+        if chunk_id == b"fmt ":
+            fmt = struct.unpack("<HHIIHH", f.read(16))
+        elif chunk_id == b"data":
+            if fmt is None:
+                return None
+            audio_format, channels, sample_rate, byte_rate, _, bits = fmt
+            # Streamed WAVs leave the data size at 0 or 0xFFFFFFFF
+            data_size = chunk_size
+            if data_size in (0, 0xFFFFFFFF) or offset + 8 + data_size > size:
+                data_size = size - offset - 8
+            codec = {1: f"pcm_s{bits}le", 3: f"pcm_f{bits}le"}.get(audio_format, f"wav_0x{audio_format:04x}")
+            if audio_format == 1 and bits == 8:
+                codec = "pcm_u8"
+            return {
+                "duration": data_size / byte_rate if byte_rate else None,
+                "sample_rate": sample_rate,
+                "channels": channels,
+                "codec": codec
+            }
+        offset += 8 + chunk_size + (chunk_size & 1)
+    return None
+
+def _probe_ogg(f: BinaryIO) -> Optional[dict]:
+    header = f.read(27)
+    if len(header) < 27:
+        return None
+    serial = header[14:18]
+    segment_count = header[26]
+    payload_size = sum(f.read(segment_count))
+    packet = f.read(payload_size)
+
+    if packet.startswith(b"OpusHead") and len(packet) >= 19:
+        channels = packet[9]
+        pre_skip = struct.unpack("<H", packet[10:12])[0]
+        codec, sample_rate, skip = "opus", 48000, pre_skip
+    elif packet.startswith(b"\x01vorbis") and len(packet) >= 30:
+        channels = packet[11]
+        sample_rate = struct.unpack("<I", packet[12:16])[0]
+        codec, skip = "vorbis", 0
+    else:
+        return None
+
+    # Duration comes from the granule position of the stream's last page
+    size = _file_size(f)
+    f.seek(max(size - SCAN_SIZE, 0))
+    tail = f.read(SCAN_SIZE)
+    granule = None
+    index = tail.rfind(b"OggS")
+    while index != -1:
+        page = tail[index:index + 27]
+        if len(page) == 27 and page[14:18] == serial:
+            value = struct.unpack("<q", page[6:14])[0]
+            if value != -1:
+                granule = value
+                break
+        index = tail.rfind(b"OggS", 0, index)
+
+    return {
+        "duration": max(granule - skip, 0) / sample_rate if granule is not None and sample_rate else None,
+        "sample_rate": sample_rate,
+        "channels": channels,
+        "codec": codec
+    }
+
+def _parse_mp3_header(header: bytes) -> Optional[dict]:
+    if len(header) < 4 or header[0] != 0xFF or header[1] & 0xE0 != 0xE0:
+        return None
+    version = (header[1] >> 3) & 0x03
+    layer = 4 - ((header[1] >> 1) & 0x03)
+    bitrate_index = header[2] >> 4
+    rate_index = (header[2] >> 2) & 0x03
+    if version == 1 or layer == 4 or bitrate_index in (0, 15) or rate_index == 3:
+        return None
+    mpeg1 = version == 3
+    bitrate = MP3_BITRATES[(mpeg1, layer)][bitrate_index] * 1000
+    sample_rate = MP3_SAMPLE_RATES[version][rate_index]
+    padding = (header[2] >> 1) & 0x01
+    if layer == 1:
+        samples_per_frame = 384
+        frame_length = (12 * bitrate // sample_rate + padding) * 4
+    elif layer == 2 or mpeg1:
+        samples_per_frame = 1152
+        frame_length = 144 * bitrate // sample_rate + padding
+    else:
+        samples_per_frame = 576
+        frame_length = 72 * bitrate // sample_rate + padding
+    return {
+        "mpeg1": mpeg1,
+        "layer": layer,
+        "bitrate": bitrate,
+        "sample_rate": sample_rate,
+        "channels": 1 if header[3] >> 6 == 3 else 2,
+        "samples_per_frame": samples_per_frame,
+        "frame_length": frame_length
+    }
+
+def _probe_mp3(f: BinaryIO) -> Optional[dict]:
+    size = _file_size(f)
+    audio_start = 0
+    header = f.read(10)
+    if header[:3] == b"ID3" and len(header) == 10:
+        tag_size = (header[6] << 21) | (header[7] << 14) | (header[8] << 7) | header[9]
+        audio_start = 10 + tag_size + (10 if header[5] & 0x10 else 0)
+
+    f.seek(audio_start)
+    buffer = f.read(SCAN_SIZE)
+    frame = None
+    index = buffer.find(b"\xff")
+    while index != -1 and index + 4 <= len(buffer):
+        frame = _parse_mp3_header(buffer[index:index + 4])
+        if frame:
+            # Confirm the sync with the following frame header when it is in the buffer
+            next_index = index + frame["frame_length"]
+            if next_index + 4 > len(buffer) or _parse_mp3_header(buffer[next_index:next_index + 4]):
+                break
+        frame = None
+        index = buffer.find(b"\xff", index + 1)
+    if frame is None:
+        return None
+    audio_start += index
+    frame_data = buffer[index:index + frame["frame_length"]]
+
+    # VBR files carry a frame count in a Xing/Info or VBRI header in the first frame
+    frame_count = None
+    if frame["mpeg1"]:
+        side_info = 17 if frame["channels"] == 1 else 32
+    else:
+        side_info = 9 if frame["channels"] == 1 else 17
+    xing = frame_data[4 + side_info:4 + side_info + 12]
+    if xing[:4] in (b"Xing", b"Info") and struct.unpack(">I", xing[4:8])[0] & 0x01:
+        frame_count = struct.unpack(">I", xing[8:12])[0]
+    elif frame_data[36:40] == b"VBRI":
+        frame_count = struct.unpack(">I", frame_data[50:54])[0]
+
+    if frame_count:
+        duration = frame_count * frame["samples_per_frame"] / frame["sample_rate"]
+    else:
+        audio_end = size
+        f.seek(max(size - 128, 0))
+        if f.read(3) == b"TAG":
+            audio_end -= 128
+        duration = (audio_end - audio_start) * 8 / frame["bitrate"]
+
+    return {
+        "duration": duration,
+        "sample_rate": frame["sample_rate"],
+        "channels": frame["channels"],
+        "codec": "mp3" if frame["layer"] == 3 else f"mp{frame['layer']}"
+    }
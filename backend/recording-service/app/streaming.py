@@ -0,0 +1,89 @@
+from typing import Optional, Tuple
+from starlette.responses import Response
+
+class RangeNotSatisfiable(Exception):
+    pass
+
+def parse_range_header(range_header: str, size: int) -> Optional[Tuple[int, int]]:
+    """
+    Parse a single-range "bytes=" header into (start, length).
+    Returns None when the header should be ignored (other units or multiple
+    ranges, in which case the full file is served) and raises
+    RangeNotSatisfiable when the range lies outside the file.
+    """
+    unit, _, ranges = range_header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in ranges:
+        return None
+    start_text, sep, end_text = ranges.strip().partition("-")
+    if not sep:
+        return None
+    try:
+        if not start_text:
+            # Suffix range: the last N bytes
+            suffix = int(end_text)
+            if suffix <= 0:
+                raise RangeNotSatisfiable()
+            start = max(size - suffix, 0)
+            end = size - 1
+        else:
+            start = int(start_text)
+            end = int(end_text) if end_text else size - 1
+    except ValueError:
+        return None
+    if start >= size or end < start:
+        raise RangeNotSatisfiable()
+    end = min(end, size - 1)
+    return start, end - start + 1
+
+class StorageFileResponse(Response):
+    """
+    Send length bytes of a stored file starting at start. When the file is on
+    local disk and the ASGI server offers the zero-copy send extension, the
+    kernel copies the file straight to the socket. Otherwise only the
+    requested range is read, one chunk at a time, so memory stays bounded and
+    a seek never re-reads the rest of the file.
+    """
+    def __init__(
+        self,
+        storage,
+        key: str,
+        start: int,
+        length: int,
+        status_code: int = 200,
+        headers: Optional[dict] = None,
+        media_type: Optional[str] = None
+    ):
+        self.storage = storage
+        self.key = key
+        self.start = start
+        self.length = length
+        self.status_code = status_code
+        self.media_type = media_type
+        self.background = None
+        self.init_headers(headers)
+
+    async def __call__(self, scope, receive, send):
+        await send({
+            "type": "http.response.start",
+            "status": self.status_code,
+            "headers": self.raw_headers
+        })
+        if scope["method"] == "HEAD" or self.length == 0:
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+            return
+
+        local_path = self.storage.local_path(self.key)
+        if local_path and "http.response.zerocopysend" in scope.get("extensions", {}):
+            with open(local_path, "rb") as f:
+                await send({
+                    "type": "http.response.zerocopysend",
+                    "file": f.fileno(),
+                    "offset": self.start,
+                    "count": self.length,
+                    "more_body": False
+                })
+            return
+
+        async for chunk in self.storage.read_stream(self.key, self.start, self.length):
+            await send({"type": "http.response.body", "body": chunk, "more_body": True})
+        await send({"type": "http.response.body", "body": b"", "more_body": False})
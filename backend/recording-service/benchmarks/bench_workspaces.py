@@ -0,0 +1,105 @@
+"""
+Compare GET /workspaces data access before and after removing the N+1
+query: one workspaces query per project versus project names
+plus a single keyset-paginated $in query.
+
+Seeds a throwaway database on MONGODB_URI, so run it against a real MongoDB
+to include network round trips:
+
+    MONGODB_URI=mongodb://... python benchmarks/bench_workspaces.py --workspaces-per-project 3
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorClient
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from app.models.recording import ProjectService, WorkspaceService
+
+PROJECT_COUNTS = (10, 100, 1000)
+
+async def seed(db, user_id: ObjectId, projects: int, workspaces_per_project: int):
+    await db.projects.delete_many({})
+    await db.workspaces.delete_many({})
+    await db.projects.create_index("owner_id")
+    await db.workspaces.create_index([("project_id", 1), ("created_at", 1), ("_id", 1)])
+    start = datetime.utcnow()
+    project_docs = [
+        {"name": f"Project {i}", "owner_id": user_id, "created_at": start + timedelta(seconds=i)}
+        for i in range(projects)
+    ]
+    result = await db.projects.insert_many(project_docs)
+    await db.workspaces.insert_many([
+        {
+            "name": f"Workspace {i}.{j}",
+            "project_id": project_id,
+            "created_at": start + timedelta(seconds=i * workspaces_per_project + j)
+        }
+        for i, project_id in enumerate(result.inserted_ids)
+        for j in range(workspaces_per_project)
+    ])
+
+async def n_plus_one(db, user_id: str):
+    """The original implementation: one workspaces query per project"""
+    workspaces = []
+    projects = await db.projects.find({"owner_id": ObjectId(user_id)}).to_list(length=None)
+    for project in projects:
+        cursor = db.workspaces.find({"project_id": project["_id"]})
+        for workspace in await cursor.to_list(length=None):
+            workspace["project"] = {"id": str(project["_id"]), "name": project["name"]}
+            workspaces.append(workspace)
+    return workspaces
+
+async def keyset_first_page(db, user_id: str, limit: int):
+    project_names = await ProjectService(db).get_user_project_names(user_id)
+    page, _ = await WorkspaceService(db).get_workspaces_page(list(project_names), limit=limit)
+    return page
+
+async def keyset_all_pages(db, user_id: str, limit: int):
+    project_names = await ProjectService(db).get_user_project_names(user_id)
+    workspace_service = WorkspaceService(db)
+    workspaces, cursor = [], None
+    while True:
+        page, cursor = await workspace_service.get_workspaces_page(list(project_names), cursor=cursor, limit=limit)
+        workspaces.extend(page)
+        if cursor is None:
+            return workspaces
+
+async def time_it(runs: int, fn, *args):
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        await fn(*args)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings) * 1000
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workspaces-per-project", type=int, default=3)
+    parser.add_argument("--page-size", type=int, default=50)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    client = AsyncIOMotorClient(os.getenv("MONGODB_URI", "mongodb://localhost:27017"))
+    db = client.meeting_minutes_bench
+    user_id = ObjectId()
+    try:
+        print(f"{'projects':>8}  {'N+1 (all)':>12}  {'keyset page':>12}  {'keyset (all)':>13}")
+        for projects in PROJECT_COUNTS:
+            await seed(db, user_id, projects, args.workspaces_per_project)
+            old = await time_it(args.runs, n_plus_one, db, str(user_id))
+            first = await time_it(args.runs, keyset_first_page, db, str(user_id), args.page_size)
+            full = await time_it(args.runs, keyset_all_pages, db, str(user_id), args.page_size)
+            print(f"{projects:>8}  {old:>10.1f}ms  {first:>10.1f}ms  {full:>11.1f}ms")
+    finally:
+        await client.drop_database("meeting_minutes_bench")
+        client.close()
+
+if __name__ == "__main__":
+    asyncio.run(main())
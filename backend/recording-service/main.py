@@ -1,11 +1,21 @@
-from fastapi import FastAPI, UploadFile, File, HTTPException, Form, Header, Body
+from fastapi import FastAPI, UploadFile, File, HTTPException, Form, Header, Body, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
 from jose import JWTError, jwt
+import asyncio
 import aiofiles
+import aiofiles.os
+import hashlib
+import mimetypes
 import uuid
-from datetime import datetime
+from datetime import datetime, timedelta
 from shared.database import Database
+from shared.storage import get_storage, blob_key
 from app.models.recording import RecordingModel, RecordingService, ProjectModel, WorkspaceModel, ProjectService, WorkspaceService
+from app.models.upload_session import UploadSessionModel, UploadSessionService
+from app.models.blob import BlobService
+from app.pagination import serialize_document
+from app.probe import probe_audio
+from app.streaming import StorageFileResponse, RangeNotSatisfiable, parse_range_header
 from bson import ObjectId
 import logging
 from typing import Optional, Dict
@@ -26,13 +36,195 @@ app.add_middleware(
 )
 
 JWT_SECRET = os.getenv("JWT_SECRET", "your_secret_key")  # Should match auth service
+UPLOAD_CHUNK_SIZE = int(os.getenv("UPLOAD_CHUNK_SIZE", str(1024 * 1024)))
+
+# Resumable upload sessions
+UPLOAD_SESSION_DIR = os.getenv("UPLOAD_SESSION_DIR", "storage/uploads")
+UPLOAD_SESSION_TTL = int(os.getenv("UPLOAD_SESSION_TTL", str(24 * 60 * 60)))
+UPLOAD_GC_INTERVAL = int(os.getenv("UPLOAD_GC_INTERVAL", "600"))
+
+# Serialises PATCHes to the same upload session within this process
+upload_locks: Dict[str, asyncio.Lock] = {}
+
+async def write_upload(file: UploadFile, part_path: str):
+    """
+    Stream an upload to part_path in UPLOAD_CHUNK_SIZE pieces, hashing as it
+    goes. The part file is removed if the upload fails.
+    Returns (sha256 hex digest, size in bytes).
+    """
+    digest = hashlib.sha256()
+    bytes_written = 0
+    try:
+        async with aiofiles.open(part_path, "wb") as out_file:
+            while True:
+                chunk = await file.read(UPLOAD_CHUNK_SIZE)
+                if not chunk:
+                    break
+                digest.update(chunk)
+                await out_file.write(chunk)
+                bytes_written += len(chunk)
+    except BaseException:
+        if os.path.exists(part_path):
+            await aiofiles.os.remove(part_path)
+        raise
+    return digest.hexdigest(), bytes_written
+
+async def store_blob(db, part_path: str, sha256: str, size: int) -> str:
+    """
+    Move a fully written part file into content-addressed storage, or discard
+    it if the same content is already stored. Returns the blob's storage key.
+    """
+    storage = get_storage()
+    key = blob_key(sha256)
+    is_new = await BlobService(db).add_reference(sha256, key, size)
+    try:
+        if is_new or not await storage.exists(key):
+            await storage.put_file(key, part_path)
+        else:
+            logger.info(f"Duplicate content {sha256}, reusing stored blob")
+            await aiofiles.os.remove(part_path)
+    except Exception:
+        await release_blob(db, sha256)
+        raise
+    return key
+
+async def release_blob(db, sha256: str):
+    """Give back a reference taken by store_blob, deleting the file if it was the last"""
+    blob = await BlobService(db).release(sha256)
+    if blob:
+        await get_storage().delete(blob["file_path"])
+        logger.info(f"Deleted unreferenced blob {sha256}")
+
+def generate_filename() -> str:
+    """Unique storage filename: {timestamp}_{uuid}.m4a"""
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    return f"{timestamp}_{uuid.uuid4()}.m4a"
+
+def hash_file(file_path: str) -> str:
+    """SHA-256 of a file on disk, read in UPLOAD_CHUNK_SIZE pieces"""
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(UPLOAD_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+async def create_recording_entry(
+    db,
+    workspace_id: str,
+    user_id: str,
+    part_path: str,
+    file_size: int,
+    sha256: str,
+    title: Optional[str] = None,
+    description: Optional[str] = None,
+    keep_part_on_failure: bool = False
+) -> Dict:
+    """
+    Store a fully received upload and create its recording document. If the
+    same content was processed before, its transcription and summaries are
+    reused and the recording starts out completed. The part file is removed
+    if it cannot be stored, unless keep_part_on_failure is set, and the blob
+    reference is given back if the recording cannot be created.
+    """
+    filename = generate_filename()
+    try:
+        audio_info = await asyncio.to_thread(probe_audio, part_path) or {}
+        logger.info(f"Probed audio: {audio_info}")
+        file_path = await store_blob(db, part_path, sha256, file_size)
+    except Exception:
+        if not keep_part_on_failure and os.path.exists(part_path):
+            await aiofiles.os.remove(part_path)
+        raise
+
+    logger.info("Creating database entry")
+    recording_service = RecordingService(db)
+    recording = RecordingModel(
+        workspace_id=ObjectId(workspace_id),
+        user_id=ObjectId(user_id),
+        filename=filename,
+        title=title,
+        description=description,
+        file_path=file_path,
+        file_size=file_size,
+        sha256=sha256,
+        duration=audio_info.get("duration") or 0.0,
+        sample_rate=audio_info.get("sample_rate"),
+        channels=audio_info.get("channels"),
+        codec=audio_info.get("codec"),
+        status="pending"
+    )
+    
+    try:
+        recording_id = await recording_service.create_recording(recording)
+    except Exception:
+        await release_blob(db, sha256)
+        raise
+    logger.info(f"Recording created with ID: {recording_id}")
+
+    status = "pending"
+    reused = await recording_service.reuse_duplicate_results(recording_id, sha256)
+    if reused["transcriptions"]:
+        status = "completed"
+        await BlobService(db).record_reuse(sha256, reused["transcriptions"], reused["summaries"])
+        logger.info(f"Reused existing results for recording {recording_id}: {reused}")
+
+    return {
+        "recording_id": str(recording_id),
+        "filename": filename,
+        "status": status
+    }
+
+async def collect_abandoned_uploads():
+    """Periodically drop upload sessions idle for longer than UPLOAD_SESSION_TTL"""
+    while True:
+        await asyncio.sleep(UPLOAD_GC_INTERVAL)
+        try:
+            db = await Database.get_db()
+            session_service = UploadSessionService(db)
+            cutoff = datetime.utcnow() - timedelta(seconds=UPLOAD_SESSION_TTL)
+            for session in await session_service.get_expired_sessions(cutoff):
+                if os.path.exists(session["part_path"]):
+                    await aiofiles.os.remove(session["part_path"])
+                await session_service.delete_session(str(session["_id"]))
+                upload_locks.pop(str(session["_id"]), None)
+                logger.info(f"Removed abandoned upload session {session['_id']}")
+        except Exception as e:
+            logger.error(f"Upload session cleanup failed: {str(e)}")
+
+def get_current_user_id(authorization: Optional[str]) -> str:
+    """User ID from a "Bearer <JWT>" authorization header; raises 401 otherwise"""
+    if not authorization:
+        logger.error("No authorization header provided")
+        raise HTTPException(status_code=401, detail="No authorization header")
+        
+    if not authorization.startswith("Bearer "):
+        logger.error("Invalid authorization format")
+        raise HTTPException(status_code=401, detail="Invalid authorization format")
+        
+    token = authorization.split("Bearer ")[1]
+    try:
+        logger.info("Attempting to decode token")
+        payload = jwt.decode(token, JWT_SECRET, algorithms=["HS256"])
+        user_id = payload.get("sub")
+        if not user_id:
+            logger.error("No user ID in token")
+            raise HTTPException(status_code=401, detail="Invalid token: no user ID")
+        logger.info(f"Successfully decoded token for user {user_id}")
+    except JWTError as e:
+        logger.error(f"JWT decode error: {str(e)}")
+        raise HTTPException(status_code=401, detail="Invalid authentication token")
+    return user_id
 
 @app.on_event("startup")
 async def startup_db_client():
     await Database.connect_db()
+    os.makedirs(UPLOAD_SESSION_DIR, exist_ok=True)
+    app.state.upload_gc_task = asyncio.create_task(collect_abandoned_uploads())
 
 @app.on_event("shutdown")
 async def shutdown_db_client():
+    app.state.upload_gc_task.cancel()
+    await get_storage().close()
     await Database.close_db()
 
 @app.post("/projects")
@@ -122,46 +314,273 @@ async def upload_recording(
         if not workspace:
             raise HTTPException(status_code=404, detail="Workspace not found")
 
-        # Generate unique filename
-        recording_id = str(uuid.uuid4())
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = f"{timestamp}_{recording_id}.m4a"
-        
         # Save file
-        file_path = f"storage/{filename}"
-        logger.info(f"Saving file to: {file_path}")
-        async with aiofiles.open(file_path, "wb") as out_file:
-            content = await file.read()
-            await out_file.write(content)
-
-        # Create recording entry in MongoDB
-        logger.info("Creating database entry")
-        recording_service = RecordingService(db)
-        recording = RecordingModel(
-            workspace_id=ObjectId(workspace_id),
-            user_id=ObjectId(user_id),
-            filename=filename,
+        part_path = os.path.join(UPLOAD_SESSION_DIR, f"{uuid.uuid4()}.part")
+        logger.info(f"Saving upload to: {part_path}")
+        sha256, file_size = await write_upload(file, part_path)
+        logger.info(f"Saved {file_size} bytes (sha256={sha256})")
+
+        return await create_recording_entry(
+            db,
+            workspace_id=workspace_id,
+            user_id=user_id,
+            part_path=part_path,
+            file_size=file_size,
+            sha256=sha256,
             title=title or file.filename,
-            description=description,
-            file_path=file_path,
-            duration=0.0,
-            status="pending"
+            description=description
         )
-        
-        recording_id = await recording_service.create_recording(recording)
-        logger.info(f"Recording created with ID: {recording_id}")
-        
-        return {
-            "recording_id": str(recording_id),
-            "filename": filename,
-            "status": "pending"
-        }
     except HTTPException:
         raise
     except Exception as e:
         logger.error(f"Error processing upload: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/uploads")
+async def create_upload_session(session: Dict = Body(...)) -> Dict:
+    """Start a resumable upload; chunks are then sent with PATCH /uploads/{upload_id}"""
+    try:
+        workspace_id = session["workspace_id"]
+        user_id = session["user_id"]
+        if not ObjectId.is_valid(workspace_id):
+            raise HTTPException(status_code=422, detail="Invalid workspace_id format")
+        if not ObjectId.is_valid(user_id):
+            raise HTTPException(status_code=422, detail="Invalid user_id format")
+
+        db = await Database.get_db()
+        workspace_service = WorkspaceService(db)
+        if not await workspace_service.get_workspace(workspace_id):
+            raise HTTPException(status_code=404, detail="Workspace not found")
+
+        part_path = os.path.join(UPLOAD_SESSION_DIR, f"{uuid.uuid4()}.part")
+        async with aiofiles.open(part_path, "wb"):
+            pass
+
+        session_model = UploadSessionModel(
+            workspace_id=ObjectId(workspace_id),
+            user_id=ObjectId(user_id),
+            filename=session.get("filename", "recording.m4a"),
+            title=session.get("title"),
+            description=session.get("description"),
+            total_size=session.get("total_size"),
+            part_path=part_path
+        )
+        upload_id = await UploadSessionService(db).create_session(session_model)
+        logger.info(f"Created upload session {upload_id}")
+        return {"upload_id": upload_id, "offset": 0}
+    except KeyError as e:
+        raise HTTPException(status_code=422, detail=f"Missing required field: {str(e)}")
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error creating upload session: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/uploads/{upload_id}")
+async def get_upload_offset(upload_id: str, response: Response) -> Dict:
+    """Current offset of a resumable upload, i.e. where the next chunk must start"""
+    db = await Database.get_db()
+    session = await UploadSessionService(db).get_session(upload_id)
+    if not session:
+        raise HTTPException(status_code=404, detail="Upload session not found")
+    response.headers["Upload-Offset"] = str(session["offset"])
+    return {
+        "upload_id": upload_id,
+        "offset": session["offset"],
+        "total_size": session.get("total_size"),
+        "status": session["status"]
+    }
+
+@app.patch("/uploads/{upload_id}")
+async def append_upload_chunk(
+    upload_id: str,
+    request: Request,
+    response: Response,
+    upload_offset: int = Header(...)
+) -> Dict:
+    """
+    Append the request body at upload_offset. The offset must equal the
+    session's current offset; anything received before a dropped connection
+    is kept, so the client resumes from GET /uploads/{upload_id}.
+    """
+    lock = upload_locks.setdefault(upload_id, asyncio.Lock())
+    async with lock:
+        try:
+            db = await Database.get_db()
+            session_service = UploadSessionService(db)
+            session = await session_service.get_session(upload_id)
+            if not session:
+                raise HTTPException(status_code=404, detail="Upload session not found")
+            if session["offset"] != upload_offset:
+                raise HTTPException(
+                    status_code=409,
+                    detail=f"Upload-Offset mismatch: expected {session['offset']}"
+                )
+
+            total_size = session.get("total_size")
+            bytes_written = 0
+            try:
+                async with aiofiles.open(session["part_path"], "r+b") as part_file:
+                    # Discard anything written past the last recorded offset
+                    await part_file.truncate(upload_offset)
+                    await part_file.seek(upload_offset)
+                    async for chunk in request.stream():
+                        if total_size is not None and upload_offset + bytes_written + len(chunk) > total_size:
+                            raise HTTPException(status_code=413, detail="Chunk exceeds declared total_size")
+                        await part_file.write(chunk)
+                        bytes_written += len(chunk)
+            finally:
+                # Record whatever made it to disk, even if the client went away
+                new_offset = upload_offset + bytes_written
+                advanced = await session_service.advance_offset(upload_id, upload_offset, new_offset)
+            if not advanced:
+                raise HTTPException(status_code=409, detail="Upload session is no longer accepting data")
+
+            response.headers["Upload-Offset"] = str(new_offset)
+            return {"upload_id": upload_id, "offset": new_offset}
+        except HTTPException:
+            raise
+        except Exception as e:
+            logger.error(f"Error appending upload chunk: {str(e)}")
+            raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/uploads/{upload_id}/complete")
+async def complete_upload(upload_id: str) -> Dict:
+    """
+    Move a fully received upload into storage and create its recording
+    entry. If that fails the session goes back to uploading, so completion
+    can be retried.
+    """
+    lock = upload_locks.setdefault(upload_id, asyncio.Lock())
+    async with lock:
+        try:
+            db = await Database.get_db()
+            session_service = UploadSessionService(db)
+            session = await session_service.get_session(upload_id)
+            if not session:
+                raise HTTPException(status_code=404, detail="Upload session not found")
+            if session.get("total_size") is not None and session["offset"] != session["total_size"]:
+                raise HTTPException(
+                    status_code=409,
+                    detail=f"Upload incomplete: {session['offset']} of {session['total_size']} bytes received"
+                )
+
+            if not await session_service.mark_completing(upload_id):
+                raise HTTPException(status_code=409, detail="Upload is already being completed")
+
+            part_path = session["part_path"]
+            try:
+                # The offset is frozen once claimed; a PATCH on another replica may have moved it before
+                session = await session_service.get_session(upload_id)
+                await asyncio.to_thread(os.truncate, part_path, session["offset"])
+                sha256 = await asyncio.to_thread(hash_file, part_path)
+
+                result = await create_recording_entry(
+                    db,
+                    workspace_id=str(session["workspace_id"]),
+                    user_id=str(session["user_id"]),
+                    part_path=part_path,
+                    file_size=session["offset"],
+                    sha256=sha256,
+                    title=session.get("title") or session["filename"],
+                    description=session.get("description"),
+                    keep_part_on_failure=True
+                )
+            except Exception:
+                if os.path.exists(part_path):
+                    await session_service.release_completing(upload_id)
+                else:
+                    # The data already went to storage; nothing is left to retry
+                    await session_service.delete_session(upload_id)
+                    upload_locks.pop(upload_id, None)
+                raise
+
+            await session_service.delete_session(upload_id)
+            upload_locks.pop(upload_id, None)
+            return result
+        except HTTPException:
+            raise
+        except Exception as e:
+            logger.error(f"Error completing upload: {str(e)}")
+            raise HTTPException(status_code=500, detail=str(e))
+
+@app.api_route("/recordings/{recording_id}/audio", methods=["GET", "HEAD"])
+async def get_recording_audio(
+    recording_id: str,
+    range: Optional[str] = Header(None),
+    if_range: Optional[str] = Header(None),
+    if_none_match: Optional[str] = Header(None)
+):
+    """
+    Stream a recording's audio with support for Range requests and
+    conditional requests on the content hash ETag
+    """
+    try:
+        if not ObjectId.is_valid(recording_id):
+            raise HTTPException(status_code=422, detail="Invalid recording_id format")
+
+        db = await Database.get_db()
+        recording = await RecordingService(db).get_recording(recording_id)
+        if not recording:
+            raise HTTPException(status_code=404, detail="Recording not found")
+
+        storage = get_storage()
+        key = recording["file_path"]
+        size = recording.get("file_size")
+        if size is None:
+            size = await storage.size(key)
+
+        headers = {"Accept-Ranges": "bytes"}
+        etag = f'"{recording["sha256"]}"' if recording.get("sha256") else None
+        if etag:
+            headers["ETag"] = etag
+            if if_none_match and (
+                if_none_match.strip() == "*"
+                or etag in [tag.strip() for tag in if_none_match.split(",")]
+            ):
+                return Response(status_code=304, headers=headers)
+
+        media_type = mimetypes.guess_type(recording["filename"])[0] or "application/octet-stream"
+
+        byte_range = None
+        if range and (if_range is None or if_range.strip() == etag):
+            try:
+                byte_range = parse_range_header(range, size)
+            except RangeNotSatisfiable:
+                return Response(status_code=416, headers={"Content-Range": f"bytes */{size}"})
+
+        if byte_range is None:
+            headers["Content-Length"] = str(size)
+            return StorageFileResponse(storage, key, 0, size, headers=headers, media_type=media_type)
+
+        start, length = byte_range
+        headers["Content-Length"] = str(length)
+        headers["Content-Range"] = f"bytes {start}-{start + length - 1}/{size}"
+        return StorageFileResponse(
+            storage, key, start, length,
+            status_code=206,
+            headers=headers,
+            media_type=media_type
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error streaming recording audio: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/metrics")
+async def get_metrics() -> Dict:
+    """
+    Storage deduplication metrics: bytes saved on disk and transcriptions /
+    summaries reused instead of recomputed
+    """
+    try:
+        db = await Database.get_db()
+        return {"storage": await BlobService(db).get_stats()}
+    except Exception as e:
+        logger.error(f"Error collecting metrics: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 @app.get("/health")
 async def health_check():
     """
@@ -195,53 +614,137 @@ async def health_check():
             detail=f"Service unhealthy: {str(e)}"
         )
 
+@app.get("/projects")
+async def list_projects(
+    authorization: str = Header(None),
+    cursor: Optional[str] = None,
+    limit: Optional[int] = None
+) -> Dict:
+    """List the current user's projects, one page at a time"""
+    try:
+        user_id = get_current_user_id(authorization)
+        db = await Database.get_db()
+        try:
+            projects, next_cursor = await ProjectService(db).get_user_projects(user_id, cursor=cursor, limit=limit)
+        except ValueError as e:
+            raise HTTPException(status_code=422, detail=str(e))
+        return {
+            "projects": [serialize_document(project) for project in projects],
+            "next_cursor": next_cursor
+        }
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error listing projects: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/projects/{project_id}/workspaces")
+async def list_project_workspaces(
+    project_id: str,
+    authorization: str = Header(None),
+    cursor: Optional[str] = None,
+    limit: Optional[int] = None
+) -> Dict:
+    """List the workspaces of one of the current user's projects, one page at a time"""
+    try:
+        user_id = get_current_user_id(authorization)
+        if not ObjectId.is_valid(project_id):
+            raise HTTPException(status_code=422, detail="Invalid project_id format")
+
+        db = await Database.get_db()
+        if not await ProjectService(db).is_project_owner(project_id, user_id):
+            raise HTTPException(status_code=404, detail="Project not found")
+        try:
+            workspaces, next_cursor = await WorkspaceService(db).get_project_workspaces(
+                project_id, cursor=cursor, limit=limit
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=422, detail=str(e))
+        return {
+            "workspaces": [serialize_document(workspace) for workspace in workspaces],
+            "next_cursor": next_cursor
+        }
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error listing project workspaces: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/workspaces/{workspace_id}/recordings")
+async def list_workspace_recordings(
+    workspace_id: str,
+    authorization: str = Header(None),
+    cursor: Optional[str] = None,
+    limit: Optional[int] = None
+) -> Dict:
+    """List the recordings in a workspace the current user owns, one page at a time"""
+    try:
+        user_id = get_current_user_id(authorization)
+        if not ObjectId.is_valid(workspace_id):
+            raise HTTPException(status_code=422, detail="Invalid workspace_id format")
+
+        db = await Database.get_db()
+        workspace = await WorkspaceService(db).get_workspace(workspace_id)
+        if not workspace or not await ProjectService(db).is_project_owner(str(workspace["project_id"]), user_id):
+            raise HTTPException(status_code=404, detail="Workspace not found")
+        try:
+            recordings, next_cursor = await RecordingService(db).get_workspace_recordings(
+                workspace_id, cursor=cursor, limit=limit
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=422, detail=str(e))
+        return {
+            "recordings": [serialize_document(recording) for recording in recordings],
+            "next_cursor": next_cursor
+        }
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error listing workspace recordings: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 @app.get("/workspaces")
-async def get_user_workspaces(authorization: str = Header(None)) -> Dict:
+async def get_user_workspaces(
+    authorization: str = Header(None),
+    cursor: Optional[str] = None,
+    limit: Optional[int] = None
+) -> Dict:
     """
-    Get all workspaces that the current user has access to
+    Get the workspaces that the current user has access to, one page at a
+    time. Pass next_cursor back as cursor to get the following page.
     """
     try:
-        if not authorization:
-            logger.error("No authorization header provided")
-            raise HTTPException(status_code=401, detail="No authorization header")
-            
-        if not authorization.startswith("Bearer "):
-            logger.error("Invalid authorization format")
-            raise HTTPException(status_code=401, detail="Invalid authorization format")
-            
-        token = authorization.split("Bearer ")[1]
-        try:
-            logger.info("Attempting to decode token")
-            payload = jwt.decode(token, JWT_SECRET, algorithms=["HS256"])
-            user_id = payload.get("sub")
-            if not user_id:
-                logger.error("No user ID in token")
-                raise HTTPException(status_code=401, detail="Invalid token: no user ID")
-            logger.info(f"Successfully decoded token for user {user_id}")
-        except JWTError as e:
-            logger.error(f"JWT decode error: {str(e)}")
-            raise HTTPException(status_code=401, detail="Invalid authentication token")
+        user_id = get_current_user_id(authorization)
 
         db = await Database.get_db()
         workspace_service = WorkspaceService(db)
         project_service = ProjectService(db)
         
-        # Get all projects owned by the user
-        user_projects = await project_service.get_user_projects(user_id)
-        
-        # Get workspaces for each project
+        # Two round trips regardless of project count: project names, then one page of workspaces
+        project_names = await project_service.get_user_project_names(user_id)
+        if not project_names:
+            return {"workspaces": [], "next_cursor": None}
+
+        try:
+            page, next_cursor = await workspace_service.get_workspaces_page(
+                list(project_names), cursor=cursor, limit=limit
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=422, detail=str(e))
+
         workspaces = []
-        for project in user_projects:
-            project_workspaces = await workspace_service.get_project_workspaces(str(project["_id"]))
-            for workspace in project_workspaces:
-                workspace["project"] = {
-                    "id": str(project["_id"]),
-                    "name": project["name"]
-                }
-                workspaces.append(workspace)
+        for workspace in page:
+            workspace = serialize_document(workspace)
+            workspace["project"] = {
+                "id": workspace["project_id"],
+                "name": project_names[ObjectId(workspace["project_id"])]
+            }
+            workspaces.append(workspace)
         
-        return {"workspaces": workspaces}
+        return {"workspaces": workspaces, "next_cursor": next_cursor}
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error getting user workspaces: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e)) 
\ No newline at end of file
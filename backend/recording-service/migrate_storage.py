@@ -0,0 +1,96 @@
+"""
+Move recordings stored at flat paths (storage/{timestamp}_{uuid}.m4a or
+storage/blobs/{sha256}) into the sharded blob layout of the configured
+storage backend, and update file_path in the recordings collection.
+
+Duplicate content is stored once and reference-counted in the blobs
+collection, the same as new uploads. Safe to re-run; recordings already
+at their blob key are skipped.
+
+    python migrate_storage.py [--dry-run]
+"""
+import argparse
+import asyncio
+import hashlib
+import logging
+import os
+
+from shared.database import Database
+from shared.storage import get_storage, blob_key
+from app.models.blob import BlobService
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 1024 * 1024
+
+def hash_file(file_path: str) -> str:
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+async def migrate(dry_run: bool):
+    db = await Database.get_db()
+    storage = get_storage()
+    blob_service = BlobService(db)
+    migrated = skipped = missing = 0
+
+    cursor = db.recordings.find({}, {"file_path": 1, "sha256": 1})
+    async for recording in cursor:
+        source_path = recording.get("file_path")
+        sha256 = recording.get("sha256")
+        if sha256 and source_path == blob_key(sha256):
+            skipped += 1
+            continue
+
+        if not source_path or not os.path.exists(source_path):
+            # Either lost, or already moved while migrating a duplicate
+            if sha256 and await storage.exists(blob_key(sha256)):
+                source_path = None
+            else:
+                logger.warning(f"Recording {recording['_id']}: file not found at {source_path}")
+                missing += 1
+                continue
+
+        if source_path:
+            size = os.path.getsize(source_path)
+            if not sha256:
+                sha256 = await asyncio.to_thread(hash_file, source_path)
+        else:
+            size = await storage.size(blob_key(sha256))
+        key = blob_key(sha256)
+
+        logger.info(f"Recording {recording['_id']}: {source_path or '(already stored)'} -> {key}")
+        if dry_run:
+            migrated += 1
+            continue
+
+        # Recordings that already had a sha256 were counted in blobs at upload time
+        if recording.get("sha256"):
+            await db.blobs.update_one({"_id": sha256}, {"$set": {"file_path": key}})
+        else:
+            await blob_service.add_reference(sha256, key, size)
+
+        if source_path:
+            if await storage.exists(key):
+                os.remove(source_path)
+            else:
+                await storage.put_file(key, source_path)
+
+        await db.recordings.update_one(
+            {"_id": recording["_id"]},
+            {"$set": {"file_path": key, "sha256": sha256, "file_size": size}}
+        )
+        migrated += 1
+
+    logger.info(f"Migrated {migrated}, already migrated {skipped}, missing {missing}")
+    await storage.close()
+    await Database.close_db()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dry-run", action="store_true", help="Only log what would be moved")
+    args = parser.parse_args()
+    asyncio.run(migrate(args.dry_run))
@@ -0,0 +1,23 @@
+import asyncio
+
+from mongomock_motor import AsyncMongoMockClient
+
+from app.models.blob import BlobService
+
+SHA256 = "ab" * 32
+
+def test_release_returns_the_blob_once_unreferenced():
+    async def run():
+        service = BlobService(AsyncMongoMockClient()["test"])
+        assert await service.add_reference(SHA256, "blobs/ab/ab", 1000)
+        assert not await service.add_reference(SHA256, "blobs/ab/ab", 1000)
+        stats = await service.get_stats()
+        assert (stats["references"], stats["bytes_saved"]) == (2, 1000)
+
+        assert await service.release(SHA256) is None
+        released = await service.release(SHA256)
+        assert released["file_path"] == "blobs/ab/ab"
+        assert await service.get_blob(SHA256) is None
+        assert await service.release(SHA256) is None
+        assert (await service.get_stats())["references"] == 0
+    asyncio.run(run())
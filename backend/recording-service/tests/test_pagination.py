@@ -0,0 +1,58 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+from bson import ObjectId
+from mongomock_motor import AsyncMongoMockClient
+
+from app import pagination
+from app.pagination import after_cursor, clamp_page_size, decode_cursor, encode_cursor, fetch_page
+
+def test_cursor_round_trip():
+    document = {"_id": ObjectId(), "created_at": datetime(2024, 5, 1, 12, 30, 0, 123000)}
+    assert decode_cursor(encode_cursor(document)) == (document["created_at"], document["_id"])
+
+@pytest.mark.parametrize("cursor", ["", "not base64!", "eyJmb28iOiAxfQ=="])
+def test_invalid_cursors_raise_value_error(cursor):
+    with pytest.raises(ValueError):
+        decode_cursor(cursor)
+
+def test_page_size_is_clamped(monkeypatch):
+    monkeypatch.setattr(pagination, "DEFAULT_PAGE_SIZE", 50)
+    monkeypatch.setattr(pagination, "MAX_PAGE_SIZE", 500)
+    assert [clamp_page_size(limit) for limit in (None, 0, -1, 20, 10000)] == [50, 50, 50, 20, 500]
+
+def test_no_cursor_leaves_the_query_alone():
+    assert after_cursor({"owner_id": 1}, None) == {"owner_id": 1}
+
+def test_pages_cover_every_document_once():
+    async def run():
+        collection = AsyncMongoMockClient()["test"]["items"]
+        start = datetime(2024, 5, 1)
+        # Pairs share a created_at, so pages must break ties on _id
+        await collection.insert_many([
+            {"_id": ObjectId(), "created_at": start + timedelta(seconds=i // 2), "owner": i % 3 != 0}
+            for i in range(11)
+        ])
+
+        seen, cursor = [], None
+        while True:
+            documents, cursor = await fetch_page(collection, {"owner": True}, cursor, limit=2)
+            assert len(documents) <= 2
+            seen.extend(documents)
+            if cursor is None:
+                break
+
+        expected = await collection.find({"owner": True}).sort(pagination.SORT_ORDER).to_list(length=None)
+        assert [d["_id"] for d in seen] == [d["_id"] for d in expected]
+    asyncio.run(run())
+
+def test_projection_keeps_the_sort_key():
+    async def run():
+        collection = AsyncMongoMockClient()["test"]["items"]
+        await collection.insert_many([{"name": str(i), "created_at": datetime(2024, 5, 1, 0, i)} for i in range(3)])
+        documents, cursor = await fetch_page(collection, {}, limit=2, projection={"name": 1})
+        assert [d["name"] for d in documents] == ["0", "1"]
+        documents, cursor = await fetch_page(collection, {}, cursor, limit=2, projection={"name": 1})
+        assert [d["name"] for d in documents] == ["2"] and cursor is None
+    asyncio.run(run())
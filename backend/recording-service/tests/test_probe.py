@@ -0,0 +1,53 @@
+import struct
+
+import pytest
+
+from app.probe import probe_audio
+
+def write(tmp_path, data: bytes) -> str:
+    path = tmp_path / "upload.part"
+    path.write_bytes(data)
+    return str(path)
+
+def mp4_box(box_type: bytes, payload: bytes) -> bytes:
+    return struct.pack(">I4s", 8 + len(payload), box_type) + payload
+
+def ogg_page(packet: bytes, granule: int = 0, serial: bytes = b"\x01\x00\x00\x00") -> bytes:
+    return (
+        b"OggS\x00\x02" + struct.pack("<q", granule) + serial + b"\x00" * 8
+        + bytes([1, len(packet)]) + packet
+    )
+
+def wav(data_size: int) -> bytes:
+    fmt = struct.pack("<HHIIHH", 1, 1, 16000, 32000, 2, 16)
+    return (
+        b"RIFF" + struct.pack("<I", 36 + data_size) + b"WAVE"
+        + b"fmt " + struct.pack("<I", 16) + fmt
+        + b"data" + struct.pack("<I", data_size) + b"\x00" * data_size
+    )
+
+def test_wav_duration(tmp_path):
+    info = probe_audio(write(tmp_path, wav(32000)))
+    assert info == {"duration": 1.0, "sample_rate": 16000, "channels": 1, "codec": "pcm_s16le"}
+
+def test_opus_duration_from_last_page(tmp_path):
+    head = b"OpusHead\x01\x02" + struct.pack("<HIhB", 312, 48000, 0, 0)
+    data = ogg_page(head) + ogg_page(b"\x00", granule=48000 + 312)
+    info = probe_audio(write(tmp_path, data))
+    assert info == {"duration": 1.0, "sample_rate": 48000, "channels": 2, "codec": "opus"}
+
+@pytest.mark.parametrize("data", [
+    b"",
+    b"OggS\x00\x02",
+    # OpusHead cut off before the channel count
+    ogg_page(b"OpusHead"),
+    ogg_page(b"\x01vorbis\x00"),
+    # mvhd box with no payload at the end of the file
+    mp4_box(b"ftyp", b"M4A ") + struct.pack(">I4s", 16, b"moov") + struct.pack(">I4s", 8, b"mvhd"),
+    mp4_box(b"ftyp", b"M4A ") + mp4_box(b"moov", mp4_box(b"mvhd", b"\x00\x00")),
+    b"RIFF\x00\x00\x00\x00WAVEfmt \x10\x00\x00\x00",
+    b"ID3\x03\x00",
+    b"\xff\xfb",
+])
+def test_malformed_headers_are_not_recognised(tmp_path, data):
+    assert probe_audio(write(tmp_path, data)) is None
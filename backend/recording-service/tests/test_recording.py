@@ -0,0 +1,79 @@
+import asyncio
+from datetime import datetime
+
+from bson import ObjectId
+from mongomock_motor import AsyncMongoMockClient
+
+from app.models.recording import RecordingModel, RecordingService
+
+SHA256 = "ab" * 32
+
+async def summarized_recording(db) -> ObjectId:
+    """A recording that was transcribed and summarized, as the services leave it"""
+    # As created by mongo-init/init.js
+    await db.summaries.create_index(
+        [("cache_key", 1)],
+        unique=True,
+        partialFilterExpression={"cache_key": {"$type": "string"}}
+    )
+    service = RecordingService(db)
+    recording_id = await service.create_recording(recording())
+    transcription = await db.transcriptions.insert_one({
+        "recording_id": ObjectId(recording_id),
+        "text": "Hello there.",
+        "status": "completed",
+        "created_at": datetime.utcnow(),
+        "updated_at": datetime.utcnow()
+    })
+    await db.summaries.insert_one({
+        "transcription_id": transcription.inserted_id,
+        "overview": "A greeting.",
+        "cache_key": "cd" * 32,
+        "text_sha256": "ef" * 32,
+        "precision": "fp32",
+        "hits": 3,
+        "created_at": datetime.utcnow(),
+        "last_used_at": datetime.utcnow()
+    })
+    return transcription.inserted_id
+
+def recording() -> RecordingModel:
+    return RecordingModel(
+        workspace_id=ObjectId(),
+        user_id=ObjectId(),
+        filename="meeting.m4a",
+        file_path="blobs/ab/ab",
+        sha256=SHA256
+    )
+
+def test_duplicate_upload_after_summary_copies_results():
+    async def run():
+        db = AsyncMongoMockClient()["test"]
+        source_transcription_id = await summarized_recording(db)
+        service = RecordingService(db)
+
+        # Two later uploads of the same content both reuse the results
+        for _ in range(2):
+            recording_id = await service.create_recording(recording())
+            reused = await service.reuse_duplicate_results(recording_id, SHA256)
+            assert reused == {"transcriptions": 1, "summaries": 1}
+
+            transcription = await db.transcriptions.find_one({"recording_id": ObjectId(recording_id)})
+            summary = await db.summaries.find_one({"transcription_id": transcription["_id"]})
+            assert summary["overview"] == "A greeting."
+            assert summary["precision"] == "fp32"
+            for field in ("cache_key", "text_sha256", "hits", "last_used_at"):
+                assert field not in summary
+            assert (await service.get_recording(recording_id))["status"] == "completed"
+
+        source = await db.summaries.find_one({"transcription_id": source_transcription_id})
+        assert source["cache_key"] == "cd" * 32
+    asyncio.run(run())
+
+def test_unique_upload_reuses_nothing():
+    async def run():
+        db = AsyncMongoMockClient()["test"]
+        service = RecordingService(db)
+        recording_id = await service.create_recording(recording())
+        assert await service.reuse_duplicate_results(recording_id, SHA256) == {"transcriptions": 0, "summaries": 0}
+    asyncio.run(run())
@@ -0,0 +1,33 @@
+import pytest
+
+from app.streaming import RangeNotSatisfiable, parse_range_header
+
+@pytest.mark.parametrize("header, expected", [
+    ("bytes=0-99", (0, 100)),
+    ("bytes=100-", (100, 900)),
+    ("bytes=-10", (990, 10)),
+    ("bytes=-5000", (0, 1000)),
+    # An end past the file is clamped
+    ("bytes=900-5000", (900, 100)),
+    ("Bytes = 0-0", (0, 1)),
+])
+def test_satisfiable_ranges(header, expected):
+    assert parse_range_header(header, 1000) == expected
+
+@pytest.mark.parametrize("header", [
+    "items=0-10",
+    "bytes=0-10,20-30",
+    "bytes=10",
+    "bytes=a-b",
+])
+def test_other_headers_serve_the_whole_file(header):
+    assert parse_range_header(header, 1000) is None
+
+@pytest.mark.parametrize("header, size", [
+    ("bytes=1000-", 1000),
+    ("bytes=-0", 1000),
+    ("bytes=0-", 0),
+])
+def test_unsatisfiable_ranges(header, size):
+    with pytest.raises(RangeNotSatisfiable):
+        parse_range_header(header, size)
@@ -0,0 +1,28 @@
+import asyncio
+
+from bson import ObjectId
+from mongomock_motor import AsyncMongoMockClient
+
+from app.models.upload_session import UploadSessionModel, UploadSessionService
+
+def test_failed_completion_can_be_retried():
+    async def run():
+        service = UploadSessionService(AsyncMongoMockClient()["test"])
+        upload_id = await service.create_session(UploadSessionModel(
+            workspace_id=ObjectId(),
+            user_id=ObjectId(),
+            filename="meeting.m4a",
+            part_path="storage/uploads/meeting.part"
+        ))
+        assert await service.advance_offset(upload_id, 0, 10)
+
+        assert await service.mark_completing(upload_id)
+        assert not await service.mark_completing(upload_id)
+        # No more data is accepted while completing
+        assert not await service.advance_offset(upload_id, 10, 20)
+
+        await service.release_completing(upload_id)
+        session = await service.get_session(upload_id)
+        assert session["status"] == "uploading" and session["offset"] == 10
+        assert await service.mark_completing(upload_id)
+    asyncio.run(run())
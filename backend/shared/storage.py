@@ -0,0 +1,268 @@
+"""
+Recording storage shared by recording-service and transcription-service.
+
+Files are addressed by key (e.g. "blobs/ab/cd/abcd...") rather than by
+filesystem path. STORAGE_BACKEND selects where they live:
+
+- "local": under STORAGE_ROOT, sharded by hash prefix so no single
+  directory grows past a few hundred entries
+- "s3": in S3_BUCKET on any S3-compatible service (set S3_ENDPOINT_URL to
+  point at MinIO or another local stand-in)
+"""
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Optional
+import asyncio
+import logging
+import os
+import shutil
+import tempfile
+
+import aiofiles
+import aiofiles.os
+
+logger = logging.getLogger(__name__)
+
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "local")
+STORAGE_ROOT = os.getenv("STORAGE_ROOT", "storage")
+STORAGE_CHUNK_SIZE = int(os.getenv("STORAGE_CHUNK_SIZE", str(1024 * 1024)))
+S3_BUCKET = os.getenv("S3_BUCKET", "recordings")
+S3_ENDPOINT_URL = os.getenv("S3_ENDPOINT_URL")
+S3_REGION = os.getenv("S3_REGION", "us-east-1")
+# S3 multipart parts must be at least 5MB (except the last one)
+S3_PART_SIZE = max(int(os.getenv("S3_PART_SIZE", str(8 * 1024 * 1024))), 5 * 1024 * 1024)
+
+def blob_key(sha256: str) -> str:
+    """Sharded key for a content-addressed blob: blobs/ab/cd/abcd..."""
+    return f"blobs/{sha256[:2]}/{sha256[2:4]}/{sha256}"
+
+class LocalStorage:
+    def __init__(self, root: str = STORAGE_ROOT):
+        self.root = root
+
+    def local_path(self, key: str) -> str:
+        return os.path.join(self.root, key)
+
+    async def exists(self, key: str) -> bool:
+        return await aiofiles.os.path.exists(self.local_path(key))
+
+    async def size(self, key: str) -> int:
+        return (await aiofiles.os.stat(self.local_path(key))).st_size
+
+    async def put_file(self, key: str, source_path: str):
+        """Move a local file into storage; the source is consumed"""
+        path = self.local_path(key)
+        await aiofiles.os.makedirs(os.path.dirname(path), exist_ok=True)
+        await asyncio.to_thread(shutil.move, source_path, path)
+
+    async def write_stream(self, key: str, chunks: AsyncIterator[bytes]) -> int:
+        """Write chunks to key atomically; returns bytes written"""
+        path = self.local_path(key)
+        await aiofiles.os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp_path = f"{path}.part"
+        written = 0
+        try:
+            async with aiofiles.open(temp_path, "wb") as f:
+                async for chunk in chunks:
+                    await f.write(chunk)
+                    written += len(chunk)
+            await aiofiles.os.replace(temp_path, path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                await aiofiles.os.remove(temp_path)
+            raise
+        return written
+
+    async def read_stream(
+        self,
+        key: str,
+        start: int = 0,
+        length: Optional[int] = None,
+        chunk_size: int = STORAGE_CHUNK_SIZE
+    ) -> AsyncIterator[bytes]:
+        """Yield the bytes of key from start, up to length bytes if given"""
+        remaining = length
+        async with aiofiles.open(self.local_path(key), "rb") as f:
+            await f.seek(start)
+            while remaining is None or remaining > 0:
+                to_read = chunk_size if remaining is None else min(chunk_size, remaining)
+                chunk = await f.read(to_read)
+                if not chunk:
+                    break
+                if remaining is not None:
+                    remaining -= len(chunk)
+                yield chunk
+
+    async def delete(self, key: str):
+        path = self.local_path(key)
+        if os.path.exists(path):
+            await aiofiles.os.remove(path)
+
+    @asynccontextmanager
+    async def local_file(self, key: str):
+        """Yield a local filesystem path for key (the stored file itself)"""
+        yield self.local_path(key)
+
+    async def close(self):
+        pass
+
+class S3Storage:
+    def __init__(
+        self,
+        bucket: str = S3_BUCKET,
+        endpoint_url: Optional[str] = S3_ENDPOINT_URL,
+        region: str = S3_REGION
+    ):
+        try:
+            from aiobotocore.session import get_session
+        except ImportError:
+            raise RuntimeError("STORAGE_BACKEND=s3 requires the aiobotocore package")
+        self.bucket = bucket
+        self.endpoint_url = endpoint_url
+        self.region = region
+        self._session = get_session()
+        self._client_context = None
+        self._client = None
+        self._client_lock = asyncio.Lock()
+
+    async def _get_client(self):
+        async with self._client_lock:
+            if self._client is None:
+                self._client_context = self._session.create_client(
+                    "s3",
+                    endpoint_url=self.endpoint_url,
+                    region_name=self.region
+                )
+                self._client = await self._client_context.__aenter__()
+        return self._client
+
+    def local_path(self, key: str) -> Optional[str]:
+        return None
+
+    async def exists(self, key: str) -> bool:
+        client = await self._get_client()
+        try:
+            await client.head_object(Bucket=self.bucket, Key=key)
+            return True
+        except client.exceptions.ClientError as e:
+            if e.response["Error"]["Code"] in ("404", "NoSuchKey"):
+                return False
+            raise
+
+    async def size(self, key: str) -> int:
+        client = await self._get_client()
+        response = await client.head_object(Bucket=self.bucket, Key=key)
+        return response["ContentLength"]
+
+    async def put_file(self, key: str, source_path: str):
+        """Upload a local file; the source is removed once the upload succeeds"""
+        async def file_chunks():
+            async with aiofiles.open(source_path, "rb") as f:
+                while True:
+                    chunk = await f.read(S3_PART_SIZE)
+                    if not chunk:
+                        break
+                    yield chunk
+
+        await self.write_stream(key, file_chunks())
+        await aiofiles.os.remove(source_path)
+
+    async def write_stream(self, key: str, chunks: AsyncIterator[bytes]) -> int:
+        """
+        Multipart upload holding at most one S3_PART_SIZE part in memory.
+        Returns bytes written.
+        """
+        client = await self._get_client()
+        upload = await client.create_multipart_upload(Bucket=self.bucket, Key=key)
+        upload_id = upload["UploadId"]
+        parts = []
+        buffer = bytearray()
+        written = 0
+
+        async def upload_part(data: bytes):
+            part_number = len(parts) + 1
+            response = await client.upload_part(
+                Bucket=self.bucket,
+                Key=key,
+                UploadId=upload_id,
+                PartNumber=part_number,
+                Body=data
+            )
+            parts.append({"PartNumber": part_number, "ETag": response["ETag"]})
+
+        try:
+            async for chunk in chunks:
+                buffer.extend(chunk)
+                written += len(chunk)
+                while len(buffer) >= S3_PART_SIZE:
+                    await upload_part(bytes(buffer[:S3_PART_SIZE]))
+                    del buffer[:S3_PART_SIZE]
+            if buffer or not parts:
+                await upload_part(bytes(buffer))
+            await client.complete_multipart_upload(
+                Bucket=self.bucket,
+                Key=key,
+                UploadId=upload_id,
+                MultipartUpload={"Parts": parts}
+            )
+        except BaseException:
+            await client.abort_multipart_upload(Bucket=self.bucket, Key=key, UploadId=upload_id)
+            raise
+        return written
+
+    async def read_stream(
+        self,
+        key: str,
+        start: int = 0,
+        length: Optional[int] = None,
+        chunk_size: int = STORAGE_CHUNK_SIZE
+    ) -> AsyncIterator[bytes]:
+        """Yield the bytes of key from start, up to length bytes if given"""
+        if length == 0:
+            return
+        client = await self._get_client()
+        end = "" if length is None else str(start + length - 1)
+        response = await client.get_object(Bucket=self.bucket, Key=key, Range=f"bytes={start}-{end}")
+        async with response["Body"] as body:
+            while True:
+                chunk = await body.read(chunk_size)
+                if not chunk:
+                    break
+                yield chunk
+
+    async def delete(self, key: str):
+        client = await self._get_client()
+        await client.delete_object(Bucket=self.bucket, Key=key)
+
+    @asynccontextmanager
+    async def local_file(self, key: str):
+        """Download key to a temporary file for tools that need a real path"""
+        fd, temp_path = tempfile.mkstemp(suffix=os.path.splitext(key)[1])
+        os.close(fd)
+        try:
+            async with aiofiles.open(temp_path, "wb") as f:
+                async for chunk in self.read_stream(key):
+                    await f.write(chunk)
+            yield temp_path
+        finally:
+            os.remove(temp_path)
+
+    async def close(self):
+        if self._client_context is not None:
+            await self._client_context.__aexit__(None, None, None)
+            self._client_context = None
+            self._client = None
+
+_storage = None
+
+def get_storage():
+    """The process-wide storage backend selected by STORAGE_BACKEND"""
+    global _storage
+    if _storage is None:
+        if STORAGE_BACKEND == "local":
+            _storage = LocalStorage()
+        elif STORAGE_BACKEND == "s3":
+            _storage = S3Storage()
+        else:
+            raise ValueError(f"Unknown STORAGE_BACKEND: {STORAGE_BACKEND}")
+        logger.info(f"Using {STORAGE_BACKEND} storage backend")
+    return _storage
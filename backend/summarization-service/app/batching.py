@@ -0,0 +1,108 @@
+"""
+Dynamic micro-batching of summarization calls.
+
+Every text to summarize (a short request, or a chunk of a long one) joins a
+queue for its model; a batch runs as one pipeline call once it holds
+SUMMARY_BATCH_SIZE texts or its first text has waited
+SUMMARY_BATCH_MAX_WAIT_MS. Concurrent requests then share batched matrix
+multiplies instead of each paying for a generate call of its own. Texts are
+queued by length bucket (SUMMARY_BATCH_BUCKETS, in tokens) so a short text
+is not padded to the length of a long one. Batches run on the inference
+threads.
+"""
+import asyncio
+import logging
+import os
+from typing import Dict, List, Set, Tuple
+
+from app.inference import inference
+from app.summarizer import SUMMARY_GENERATION
+
+logger = logging.getLogger(__name__)
+
+# 1 turns batching off
+SUMMARY_BATCH_SIZE = int(os.getenv("SUMMARY_BATCH_SIZE", "4"))
+SUMMARY_BATCH_MAX_WAIT_MS = float(os.getenv("SUMMARY_BATCH_MAX_WAIT_MS", "20"))
+# Upper token bounds of the length buckets; longer texts share a last bucket
+SUMMARY_BATCH_BUCKETS = [int(b) for b in os.getenv("SUMMARY_BATCH_BUCKETS", "128,256,512").split(",") if b]
+
+def summarize_batch(summarizer, texts: List[str]) -> List[str]:
+    results = summarizer(texts, batch_size=len(texts), truncation=True, **SUMMARY_GENERATION)
+    return [result["summary_text"] for result in results]
+
+class SummaryBatcher:
+    def __init__(
+        self,
+        batch_size: int = SUMMARY_BATCH_SIZE,
+        max_wait: float = SUMMARY_BATCH_MAX_WAIT_MS / 1000,
+        buckets: List[int] = SUMMARY_BATCH_BUCKETS
+    ):
+        self.batch_size = batch_size
+        self.max_wait = max_wait
+        self.buckets = sorted(buckets)
+        # (pipeline, length bucket) -> texts waiting for a batch
+        self.pending: Dict[Tuple[object, int], List[Tuple[str, asyncio.Future]]] = {}
+        self.timers: Dict[Tuple[object, int], asyncio.TimerHandle] = {}
+        self.running: Set[asyncio.Task] = set()
+        self.batches = 0
+        self.texts = 0
+
+    def bucket(self, summarizer, text: str) -> int:
+        length = len(summarizer.tokenizer(text, add_special_tokens=False)["input_ids"])
+        for i, bound in enumerate(self.buckets):
+            if length <= bound:
+                return i
+        return len(self.buckets)
+
+    async def summarize(self, summarizer, text: str) -> str:
+        """Summarize text with summarizer as part of the next batch of similar length"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        key = (summarizer, self.bucket(summarizer, text))
+        waiting = self.pending.setdefault(key, [])
+        waiting.append((text, future))
+        if len(waiting) >= self.batch_size:
+            self._flush(key)
+        elif len(waiting) == 1:
+            self.timers[key] = loop.call_later(self.max_wait, self._flush, key)
+        return await future
+
+    def _flush(self, key: Tuple[object, int]):
+        timer = self.timers.pop(key, None)
+        if timer is not None:
+            timer.cancel()
+        batch = self.pending.pop(key, [])
+        if batch:
+            task = asyncio.ensure_future(self._run(key[0], batch))
+            self.running.add(task)
+            task.add_done_callback(self.running.discard)
+
+    async def _run(self, summarizer, batch: List[Tuple[str, asyncio.Future]]):
+        # Skip texts whose requests went away while waiting
+        batch = [(text, future) for text, future in batch if not future.done()]
+        if not batch:
+            return
+        try:
+            summaries = await inference.run(summarize_batch, summarizer, [text for text, _ in batch])
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        self.batches += 1
+        self.texts += len(batch)
+        for (_, future), summary in zip(batch, summaries):
+            if not future.done():
+                future.set_result(summary)
+
+    def stats(self) -> Dict:
+        return {
+            "batch_size": self.batch_size,
+            "max_wait_ms": self.max_wait * 1000,
+            "batches": self.batches,
+            "texts": self.texts,
+            "mean_batch_size": self.texts / self.batches if self.batches else 0.0,
+            "waiting": sum(len(waiting) for waiting in self.pending.values())
+        }
+
+batcher = SummaryBatcher()
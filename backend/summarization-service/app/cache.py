@@ -0,0 +1,217 @@
+"""
+Summaries cached by (normalized text hash, model, generation settings).
+
+Two tiers: an in-process LRU with a TTL for repeats within minutes, in front
+of the summaries collection, where each cache entry is a SummaryModel
+document with a cache_key and no transcription_id; that tier survives
+restarts and is shared by every replica. Identical requests that arrive
+while the first is still being generated wait for its result instead of
+generating again.
+
+Cache entries belong to the text, not to any transcription: two
+transcriptions with the same text share one. Each transcription also gets
+a summary record of its own (per precision), written from the cache on a
+hit; summarizing a transcription deletes its records of earlier versions
+of its text. Keys are content hashes, so an edited transcription never
+hits its old summary.
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import time
+import unicodedata
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from bson import ObjectId
+
+from app.longform import SUMMARY_CHUNK_OVERLAP, SUMMARY_CHUNK_TOKENS
+from app.models.summary import SummaryModel, SummaryService
+from app.summarizer import SUMMARIZATION_MODEL, SUMMARIZER_BACKEND, SUMMARY_GENERATION
+
+logger = logging.getLogger(__name__)
+
+SUMMARY_CACHE_ENABLED = os.getenv("SUMMARY_CACHE_ENABLED", "true").lower() == "true"
+SUMMARY_CACHE_MEMORY_ENTRIES = int(os.getenv("SUMMARY_CACHE_MEMORY_ENTRIES", "1024"))
+SUMMARY_CACHE_MEMORY_TTL = int(os.getenv("SUMMARY_CACHE_MEMORY_TTL", "3600"))
+SUMMARY_CACHE_TTL_DAYS = int(os.getenv("SUMMARY_CACHE_TTL_DAYS", "30"))
+SUMMARY_CACHE_TRIM_INTERVAL = int(os.getenv("SUMMARY_CACHE_TRIM_INTERVAL", "3600"))
+
+def normalize(units: List[str]) -> str:
+    """One unit per line, Unicode NFC, runs of whitespace collapsed"""
+    return "\n".join(" ".join(unicodedata.normalize("NFC", unit).split()) for unit in units)
+
+def text_hash(units: List[str]) -> str:
+    return hashlib.sha256(normalize(units).encode()).hexdigest()
+
+def generation_settings() -> Dict:
+    """Everything besides the text and model that changes the summary"""
+    return {**SUMMARY_GENERATION, "chunk_tokens": SUMMARY_CHUNK_TOKENS, "chunk_overlap": SUMMARY_CHUNK_OVERLAP}
+
+def cache_key(text_sha256: str, precision: str) -> str:
+    key = json.dumps(
+        {
+            "text": text_sha256,
+            "model": SUMMARIZATION_MODEL,
+            "backend": SUMMARIZER_BACKEND,
+            "precision": precision,
+            "generation": generation_settings()
+        },
+        sort_keys=True
+    )
+    return hashlib.sha256(key.encode()).hexdigest()
+
+class SummaryCache:
+    def __init__(self, memory_entries: int = SUMMARY_CACHE_MEMORY_ENTRIES, memory_ttl: int = SUMMARY_CACHE_MEMORY_TTL):
+        self.memory_entries = memory_entries
+        self.memory_ttl = memory_ttl
+        # key -> (result, time stored)
+        self.entries: "OrderedDict[str, tuple]" = OrderedDict()
+        # key -> generation in progress
+        self.inflight: Dict[str, asyncio.Future] = {}
+        self.memory_hits = 0
+        self.persistent_hits = 0
+        self.misses = 0
+        self.deduplicated = 0
+        self.invalidated = 0
+
+    async def summarize(
+        self,
+        db,
+        units: List[str],
+        precision: str,
+        generate: Callable[[], Awaitable[Dict]],
+        transcription_id: Optional[ObjectId] = None
+    ) -> Dict:
+        """
+        The summary of units at precision from the cache, or from generate()
+        (run once however many identical requests are waiting for it), also
+        stored as the summary of transcription_id if given. The result says
+        whether it was cached.
+        """
+        text_sha256 = text_hash(units)
+        if transcription_id is not None:
+            await self.invalidate(db, transcription_id, text_sha256)
+        if SUMMARY_CACHE_ENABLED:
+            result = await self._cached_or_generated(db, cache_key(text_sha256, precision), text_sha256, precision, generate)
+        else:
+            result = {**(await generate()), "cached": False}
+
+        if transcription_id is not None:
+            await SummaryService(db).store_for_transcription(SummaryModel(
+                transcription_id=transcription_id,
+                overview=result["summary"],
+                text_sha256=text_sha256,
+                model=SUMMARIZATION_MODEL,
+                precision=precision,
+                generation=generation_settings(),
+                chunks=result["chunks"],
+                passes=result["passes"]
+            ))
+        return result
+
+    async def _cached_or_generated(
+        self,
+        db,
+        key: str,
+        text_sha256: str,
+        precision: str,
+        generate: Callable[[], Awaitable[Dict]]
+    ) -> Dict:
+        cached = await self.get(db, key)
+        if cached is not None:
+            return {**cached, "cached": True}
+
+        pending = self.inflight.get(key)
+        if pending is None:
+            pending = asyncio.ensure_future(self._generate(db, key, generate, SummaryModel(
+                cache_key=key,
+                text_sha256=text_sha256,
+                model=SUMMARIZATION_MODEL,
+                precision=precision,
+                generation=generation_settings()
+            )))
+            self.inflight[key] = pending
+            pending.add_done_callback(lambda _: self.inflight.pop(key, None))
+        else:
+            self.deduplicated += 1
+        # One caller going away does not cancel the generation the others wait for
+        return {**(await asyncio.shield(pending)), "cached": False}
+
+    async def _generate(self, db, key: str, generate: Callable[[], Awaitable[Dict]], summary: SummaryModel) -> Dict:
+        result = await generate()
+        self._remember(key, result)
+        summary.overview = result["summary"]
+        summary.chunks = result["chunks"]
+        summary.passes = result["passes"]
+        try:
+            await SummaryService(db).store_cached(summary)
+        except Exception as e:
+            logger.error(f"Storing summary {key} failed: {str(e)}")
+        return result
+
+    async def get(self, db, key: str) -> Optional[Dict]:
+        entry = self.entries.get(key)
+        if entry is not None:
+            if time.monotonic() - entry[1] < self.memory_ttl:
+                self.entries.move_to_end(key)
+                self.memory_hits += 1
+                return entry[0]
+            self.entries.pop(key, None)
+
+        document = await SummaryService(db).use_cached(key, datetime.utcnow() - timedelta(days=SUMMARY_CACHE_TTL_DAYS))
+        if document is None:
+            self.misses += 1
+            return None
+        self.persistent_hits += 1
+        result = {"summary": document["overview"], "chunks": document.get("chunks", 1), "passes": document.get("passes", 1)}
+        self._remember(key, result)
+        return result
+
+    async def invalidate(self, db, transcription_id: ObjectId, text_sha256: str):
+        """Delete a transcription's summaries of text other than text_sha256"""
+        self.invalidated += await SummaryService(db).delete_outdated(transcription_id, text_sha256)
+
+    def _remember(self, key: str, result: Dict):
+        self.entries.pop(key, None)
+        self.entries[key] = (result, time.monotonic())
+        while len(self.entries) > self.memory_entries:
+            self.entries.popitem(last=False)
+
+    async def trim_periodically(self, db):
+        while True:
+            try:
+                await self.trim(db)
+            except Exception as e:
+                logger.error(f"Trimming the summary cache failed: {str(e)}")
+            await asyncio.sleep(SUMMARY_CACHE_TRIM_INTERVAL)
+
+    async def trim(self, db):
+        """
+        Delete cache entries older than SUMMARY_CACHE_TTL_DAYS; summaries of
+        transcriptions are records, not cache entries, and are kept
+        """
+        cutoff = datetime.utcnow() - timedelta(days=SUMMARY_CACHE_TTL_DAYS)
+        expired = await db.summaries.delete_many({"cache_key": {"$ne": None}, "created_at": {"$lt": cutoff}})
+        if expired.deleted_count:
+            logger.info(f"Trimmed summary cache: {expired.deleted_count} expired")
+
+    async def get_stats(self, db) -> Dict:
+        lookups = self.memory_hits + self.persistent_hits + self.misses
+        return {
+            "enabled": SUMMARY_CACHE_ENABLED,
+            "memory_hits": self.memory_hits,
+            "persistent_hits": self.persistent_hits,
+            "misses": self.misses,
+            "deduplicated": self.deduplicated,
+            "invalidated": self.invalidated,
+            "hit_rate": (self.memory_hits + self.persistent_hits) / lookups if lookups else 0.0,
+            "memory_entries": len(self.entries),
+            "inflight": len(self.inflight),
+            "persistent_entries": await db.summaries.count_documents({"cache_key": {"$ne": None}})
+        }
+
+summary_cache = SummaryCache()
@@ -0,0 +1,110 @@
+"""
+Where model inference runs, and how much of it is let in.
+
+Generation takes seconds of CPU; run on the event loop it stalls every other
+request, /health included, until the orchestrator restarts a container that
+is only busy. Pipeline calls therefore run on a dedicated pool of
+SUMMARY_PARALLELISM threads, and at most SUMMARY_QUEUE_SIZE summary
+requests are admitted (waiting or running) at once. Past that a request is
+refused straight away with 503 and a Retry-After of about one recent
+request time, so callers back off and autoscalers see the pressure instead
+of requests timing out in a queue.
+"""
+import asyncio
+import math
+import os
+import statistics
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from typing import Deque, Dict, List
+
+# Pipeline calls run at once
+SUMMARY_PARALLELISM = int(os.getenv("SUMMARY_PARALLELISM", "1"))
+# Summary requests admitted at once, waiting or running
+SUMMARY_QUEUE_SIZE = int(os.getenv("SUMMARY_QUEUE_SIZE", "32"))
+
+# Timings kept for the metrics and the Retry-After estimate
+TIMING_WINDOW = 1000
+
+class QueueFullError(Exception):
+    def __init__(self, retry_after: int):
+        super().__init__(f"Summarization queue is full; retry in {retry_after}s")
+        self.retry_after = retry_after
+
+def percentiles(values: Deque[float]) -> Dict:
+    ordered: List[float] = sorted(values)
+    return {
+        "p50": statistics.median(ordered) if ordered else None,
+        "p95": ordered[int(len(ordered) * 0.95)] if ordered else None,
+        "max": ordered[-1] if ordered else None
+    }
+
+class InferenceQueue:
+    def __init__(self, workers: int = SUMMARY_PARALLELISM, limit: int = SUMMARY_QUEUE_SIZE):
+        self.limit = limit
+        self.configure(workers)
+        self.depth = 0
+        # Pipeline calls in progress, counted from the inference threads
+        self.running = 0
+        self.running_lock = threading.Lock()
+        self.admitted = 0
+        self.rejected = 0
+        self.inference_times: Deque[float] = deque(maxlen=TIMING_WINDOW)
+        self.request_times: Deque[float] = deque(maxlen=TIMING_WINDOW)
+
+    def configure(self, workers: int):
+        self.workers = workers
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="summarizer")
+
+    def retry_after(self) -> int:
+        return max(1, math.ceil(statistics.median(self.request_times))) if self.request_times else 1
+
+    @asynccontextmanager
+    async def admit(self):
+        """Hold one of the SUMMARY_QUEUE_SIZE places for a request, or raise QueueFullError"""
+        if self.depth >= self.limit:
+            self.rejected += 1
+            raise QueueFullError(self.retry_after())
+        self.depth += 1
+        self.admitted += 1
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.depth -= 1
+            self.request_times.append(time.perf_counter() - start)
+
+    def _timed(self, function, args):
+        with self.running_lock:
+            self.running += 1
+        start = time.perf_counter()
+        try:
+            return function(*args)
+        finally:
+            self.inference_times.append(time.perf_counter() - start)
+            with self.running_lock:
+                self.running -= 1
+
+    async def run(self, function, *args):
+        """Run a pipeline call on the inference threads"""
+        return await asyncio.get_running_loop().run_in_executor(self.executor, self._timed, function, args)
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False)
+
+    def stats(self) -> Dict:
+        return {
+            "depth": self.depth,
+            "limit": self.limit,
+            "workers": self.workers,
+            "running": self.running,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "inference_seconds": percentiles(self.inference_times),
+            "request_seconds": percentiles(self.request_times)
+        }
+
+inference = InferenceQueue()
@@ -0,0 +1,97 @@
+"""
+Map-reduce summarization of transcripts longer than the model's window.
+
+distilbart reads at most 1024 tokens; past that the pipeline truncates (or
+fails), so most of a long meeting would never reach the model. Instead the
+transcript is packed into chunks of SUMMARY_CHUNK_TOKENS on segment (or
+sentence) boundaries, with SUMMARY_CHUNK_OVERLAP tokens of context repeated
+from the previous chunk. The chunks are summarized together (map), and the
+chunk summaries are packed and summarized again (reduce) until they fit one
+window, which gives the final summary. Model calls go through the batcher,
+which runs a long transcript's chunks SUMMARY_BATCH_SIZE to a call.
+Packing tokenizes the whole text, so it runs in a thread rather than on the
+event loop.
+"""
+import asyncio
+import logging
+import os
+import re
+from typing import Dict, List
+
+from app.batching import batcher
+
+logger = logging.getLogger(__name__)
+
+# Tokens per chunk; distilbart's window is 1024 including special tokens
+SUMMARY_CHUNK_TOKENS = int(os.getenv("SUMMARY_CHUNK_TOKENS", "960"))
+# Tokens of trailing context from the previous chunk that start each chunk
+SUMMARY_CHUNK_OVERLAP = int(os.getenv("SUMMARY_CHUNK_OVERLAP", "64"))
+
+# Reduce passes before whatever remains is truncated into one window
+MAX_ROUNDS = 6
+
+SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+
+def split_sentences(text: str) -> List[str]:
+    return [sentence for sentence in SENTENCE_END.split(text.strip()) if sentence]
+
+def pack_chunks(tokenizer, units: List[str], max_tokens: int, overlap: int) -> List[str]:
+    """
+    Join consecutive units (segments, sentences or summaries) into chunks of
+    at most max_tokens, each starting with up to overlap tokens of the
+    previous chunk's last units. A unit longer than a chunk is cut by tokens.
+    """
+    lengths = [len(ids) for ids in tokenizer(units, add_special_tokens=False)["input_ids"]] if units else []
+    pieces = []
+    for unit, length in zip(units, lengths):
+        if length <= max_tokens:
+            pieces.append((unit, length))
+            continue
+        ids = tokenizer(unit, add_special_tokens=False)["input_ids"]
+        for start in range(0, len(ids), max_tokens):
+            window = ids[start:start + max_tokens]
+            pieces.append((tokenizer.decode(window), len(window)))
+
+    chunks = []
+    current: List[tuple] = []
+    size = 0
+    for piece in pieces:
+        if current and size + piece[1] > max_tokens:
+            chunks.append(" ".join(text for text, _ in current))
+            # Carry the tail of this chunk into the next one
+            carried: List[tuple] = []
+            carried_size = 0
+            for previous in reversed(current):
+                if carried_size + previous[1] > overlap or carried_size + previous[1] + piece[1] > max_tokens:
+                    break
+                carried.insert(0, previous)
+                carried_size += previous[1]
+            current, size = carried, carried_size
+        current.append(piece)
+        size += piece[1]
+    if current:
+        chunks.append(" ".join(text for text, _ in current))
+    return chunks
+
+async def summarize_chunks(summarizer, chunks: List[str]) -> List[str]:
+    return list(await asyncio.gather(*(batcher.summarize(summarizer, chunk) for chunk in chunks)))
+
+async def summarize_document(summarizer, units: List[str]) -> Dict:
+    """
+    Summarize a document given as units (transcript segments or sentences).
+    Returns the summary, the number of first-pass chunks and of passes.
+    """
+    tokenizer = summarizer.tokenizer
+    chunks = await asyncio.to_thread(pack_chunks, tokenizer, units, SUMMARY_CHUNK_TOKENS, SUMMARY_CHUNK_OVERLAP)
+    first_pass = len(chunks)
+    rounds = 0
+    while len(chunks) > 1 and rounds < MAX_ROUNDS:
+        summaries = await summarize_chunks(summarizer, chunks)
+        rounds += 1
+        chunks = await asyncio.to_thread(pack_chunks, tokenizer, summaries, SUMMARY_CHUNK_TOKENS, 0)
+    if len(chunks) > 1:
+        logger.warning(f"Summary still spans {len(chunks)} chunks after {rounds} passes, truncating")
+    summary = (await summarize_chunks(summarizer, [" ".join(chunks)]))[0]
+    if first_pass > 1:
+        logger.info(f"Summarized {first_pass} chunks in {rounds + 1} passes")
+    return {"summary": summary, "chunks": first_pass, "passes": rounds + 1}
@@ -1,5 +1,5 @@
 from datetime import datetime
-from typing import List, Optional
+from typing import Dict, List, Optional
 from pydantic import BaseModel, Field
 from bson import ObjectId
 
@@ -9,14 +9,30 @@ class ActionItem(BaseModel):
     due_date: Optional[datetime] = None
 
 class SummaryModel(BaseModel):
-    transcription_id: ObjectId
+    # None for a summary of text that is not a stored transcription
+    transcription_id: Optional[ObjectId] = None
     overview: Optional[str] = None
     key_points: List[str] = []
     action_items: List[ActionItem] = []
     decisions: List[str] = []
     next_steps: List[str] = []
+    # A summary cache entry has a cache_key (hash of normalized text, model
+    # and generation settings) and no transcription_id; a transcription's
+    # summary has no cache_key and records the text and settings it is of
+    cache_key: Optional[str] = None
+    text_sha256: Optional[str] = None
+    model: Optional[str] = None
+    precision: Optional[str] = None
+    generation: Dict = {}
+    chunks: int = 1
+    passes: int = 1
+    hits: int = 0
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
+    last_used_at: datetime = Field(default_factory=datetime.utcnow)
+
+    class Config:
+        arbitrary_types_allowed = True
 
 class SummaryService:
     def __init__(self, db):
@@ -28,4 +44,34 @@ class SummaryService:
         return str(result.inserted_id)
 
     async def get_summary(self, summary_id: str):
-        return await self.collection.find_one({"_id": ObjectId(summary_id)}) 
\ No newline at end of file
+        return await self.collection.find_one({"_id": ObjectId(summary_id)})
+
+    async def use_cached(self, cache_key: str, created_after: datetime):
+        """The summary stored under cache_key since created_after, marked as used"""
+        return await self.collection.find_one_and_update(
+            {"cache_key": cache_key, "created_at": {"$gte": created_after}},
+            {"$set": {"last_used_at": datetime.utcnow()}, "$inc": {"hits": 1}},
+            {"overview": 1, "chunks": 1, "passes": 1}
+        )
+
+    async def store_cached(self, summary: SummaryModel):
+        """Insert the cache entry stored under summary.cache_key, or replace an expired one"""
+        await self.collection.update_one({"cache_key": summary.cache_key}, {"$set": summary.dict()}, upsert=True)
+
+    async def store_for_transcription(self, summary: SummaryModel):
+        """Insert or replace a transcription's summary at summary.precision"""
+        document = summary.dict(exclude={"cache_key", "hits", "last_used_at", "created_at"})
+        await self.collection.update_one(
+            {"transcription_id": summary.transcription_id, "precision": summary.precision, "cache_key": None},
+            {"$set": document, "$setOnInsert": {"created_at": summary.created_at}},
+            upsert=True
+        )
+
+    async def delete_outdated(self, transcription_id: ObjectId, text_sha256: str) -> int:
+        """Delete a transcription's summaries of an earlier version of its text; returns how many"""
+        result = await self.collection.delete_many({
+            "transcription_id": transcription_id,
+            "cache_key": None,
+            "text_sha256": {"$nin": [None, text_sha256]}
+        })
+        return result.deleted_count
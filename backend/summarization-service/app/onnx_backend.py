@@ -0,0 +1,84 @@
+"""
+The summarization model on ONNX Runtime.
+
+The first start with SUMMARIZER_BACKEND=onnx exports the encoder and
+decoders from the Hugging Face model cache to ONNX under SUMMARIZER_ONNX_DIR
+(on the model cache volume), and int8 dynamically quantizes that export on
+first use of the int8 precision; later starts load the files directly.
+optimum's ORTModelForSeq2SeqLM stands in for the PyTorch model inside the
+same transformers pipeline, so generation settings, batching and caching
+are unchanged.
+"""
+import logging
+import os
+import shutil
+from typing import Dict
+
+from transformers import AutoTokenizer, pipeline
+
+from app.summarizer import SUMMARIZATION_MODEL
+
+logger = logging.getLogger(__name__)
+
+SUMMARIZER_ONNX_DIR = os.getenv(
+    "SUMMARIZER_ONNX_DIR",
+    os.path.join("/app/model_cache/onnx", SUMMARIZATION_MODEL.replace("/", "--"))
+)
+# Instruction set the int8 export is quantized for: avx2, avx512, avx512_vnni or arm64
+SUMMARIZER_ONNX_INT8_TARGET = os.getenv("SUMMARIZER_ONNX_INT8_TARGET", "avx2")
+
+COMPONENTS = ("encoder_model", "decoder_model", "decoder_with_past_model")
+
+def file_names(precision: str) -> Dict[str, str]:
+    suffix = "_quantized" if precision == "int8" else ""
+    return {f"{component.replace('_model', '')}_file_name": f"{component}{suffix}.onnx" for component in COMPONENTS}
+
+def is_exported(directory: str, precision: str) -> bool:
+    return all(os.path.exists(os.path.join(directory, name)) for name in file_names(precision).values())
+
+def publish(staging: str, directory: str):
+    """Move a finished export into place; another replica may have got there first"""
+    try:
+        os.rename(staging, directory)
+    except OSError:
+        shutil.rmtree(staging, ignore_errors=True)
+
+def export_fp32(directory: str):
+    from optimum.onnxruntime import ORTModelForSeq2SeqLM
+
+    logger.info(f"Exporting {SUMMARIZATION_MODEL} to ONNX in {directory}")
+    staging = f"{directory}.part-{os.getpid()}"
+    model = ORTModelForSeq2SeqLM.from_pretrained(SUMMARIZATION_MODEL, export=True)
+    model.save_pretrained(staging)
+    publish(staging, directory)
+
+def export_int8(source: str, directory: str):
+    from optimum.onnxruntime import ORTQuantizer
+    from optimum.onnxruntime.configuration import AutoQuantizationConfig
+
+    logger.info(f"Quantizing the ONNX export to int8 ({SUMMARIZER_ONNX_INT8_TARGET}) in {directory}")
+    config = getattr(AutoQuantizationConfig, SUMMARIZER_ONNX_INT8_TARGET)(is_static=False, per_channel=False)
+    staging = f"{directory}.part-{os.getpid()}"
+    for component in COMPONENTS:
+        quantizer = ORTQuantizer.from_pretrained(source, file_name=f"{component}.onnx")
+        quantizer.quantize(save_dir=staging, quantization_config=config)
+    for name in os.listdir(source):
+        if name.endswith(".json") and not os.path.exists(os.path.join(staging, name)):
+            shutil.copy(os.path.join(source, name), staging)
+    publish(staging, directory)
+
+def load_onnx_summarizer(precision: str):
+    from optimum.onnxruntime import ORTModelForSeq2SeqLM
+
+    fp32_dir = os.path.join(SUMMARIZER_ONNX_DIR, "fp32")
+    if not is_exported(fp32_dir, "fp32"):
+        export_fp32(fp32_dir)
+    directory = fp32_dir
+    if precision == "int8":
+        directory = os.path.join(SUMMARIZER_ONNX_DIR, "int8")
+        if not is_exported(directory, "int8"):
+            export_int8(fp32_dir, directory)
+
+    model = ORTModelForSeq2SeqLM.from_pretrained(directory, **file_names(precision))
+    tokenizer = AutoTokenizer.from_pretrained(SUMMARIZATION_MODEL)
+    return pipeline("summarization", model=model, tokenizer=tokenizer)
@@ -0,0 +1,91 @@
+"""
+Throughput and latency of POST /summarize with dynamic micro-batching
+against one pipeline call per request (the previous path), at 1, 8 and 32
+concurrent clients.
+
+    python benchmarks/bench_batching.py --clients 1 8 32 --requests 4
+
+Each client sends --requests summaries back to back, cycling through the
+bundled evaluation meetings, so the mix of lengths is that of real
+meetings. The unbatched path runs each request's pipeline call alone, one
+at a time, as the service did when it generated on the event loop.
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import torch
+
+from app.batching import batcher, summarize_batch
+from app.summarizer import SUMMARIZATION_MODEL, load_summarizer
+
+EVAL_SET = os.path.join(os.path.dirname(os.path.abspath(__file__)), "eval_meetings.jsonl")
+
+async def load(summarize, texts, clients: int, requests: int):
+    latencies = []
+    feed = itertools.cycle(texts)
+
+    async def client():
+        for _ in range(requests):
+            text = next(feed)
+            start = time.perf_counter()
+            await summarize(text)
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(clients)))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return len(latencies) / elapsed, latencies[len(latencies) // 2], latencies[min(int(len(latencies) * 0.99), len(latencies) - 1)]
+
+async def run(summarizer, texts, client_counts, requests):
+    one_at_a_time = asyncio.Lock()
+
+    async def unbatched(text):
+        async with one_at_a_time:
+            return (await asyncio.to_thread(summarize_batch, summarizer, [text]))[0]
+
+    async def batched(text):
+        return await batcher.summarize(summarizer, text)
+
+    # Warm up so neither path is timed initialising kernels
+    await unbatched(texts[0])
+
+    print(f"{'clients':>7} {'path':>9} {'req/s':>7} {'p50 (s)':>8} {'p99 (s)':>8} {'speedup':>8}")
+    for clients in client_counts:
+        baseline = None
+        for name, summarize in (("unbatched", unbatched), ("batched", batched)):
+            throughput, p50, p99 = await load(summarize, texts, clients, requests)
+            baseline = baseline or throughput
+            print(f"{clients:>7} {name:>9} {throughput:>7.2f} {p50:>8.2f} {p99:>8.2f} {throughput / baseline:>7.2f}x")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--requests", type=int, default=4, help="Requests per client")
+    parser.add_argument("--batch-size", type=int, default=batcher.batch_size)
+    parser.add_argument("--max-wait-ms", type=float, default=batcher.max_wait * 1000)
+    parser.add_argument("--precision", default="fp32")
+    parser.add_argument("--threads", type=int, default=0, help="torch threads (0 keeps torch's default)")
+    args = parser.parse_args()
+
+    if args.threads:
+        torch.set_num_threads(args.threads)
+    with open(EVAL_SET) as f:
+        texts = [json.loads(line)["text"] for line in f if line.strip()]
+    summarizer = load_summarizer(args.precision)
+    batcher.batch_size, batcher.max_wait = args.batch_size, args.max_wait_ms / 1000
+    print(
+        f"{SUMMARIZATION_MODEL} ({args.precision}), batches of up to {args.batch_size} within "
+        f"{args.max_wait_ms:.0f} ms, {torch.get_num_threads()} torch threads"
+    )
+    asyncio.run(run(summarizer, texts, args.clients, args.requests))
+
+if __name__ == "__main__":
+    main()
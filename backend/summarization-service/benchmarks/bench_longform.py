@@ -0,0 +1,85 @@
+"""
+Latency of map-reduce summarization (what POST /summarize and
+POST /summarize/transcriptions/{id} do) against transcript length, up to a
+three-hour meeting.
+
+    python benchmarks/bench_longform.py --minutes 5 15 30 60 120 180 --parallelism 1 2
+
+Transcripts are built by cycling through the sentences of the bundled
+evaluation meetings at WORDS_PER_MINUTE, each sentence a segment, so the
+lengths match a real meeting of that duration. For every length it prints
+the first-pass chunk count, the number of passes and the wall time.
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import torch
+
+from app import longform
+from app.batching import batcher
+from app.inference import inference
+from app.longform import split_sentences, summarize_document
+from app.summarizer import SUMMARIZATION_MODEL, load_summarizer
+
+EVAL_SET = os.path.join(os.path.dirname(os.path.abspath(__file__)), "eval_meetings.jsonl")
+
+# Typical conversational speaking rate
+WORDS_PER_MINUTE = 150
+
+def transcript(sentences, minutes: int):
+    segments, words = [], 0
+    for sentence in itertools.cycle(sentences):
+        if words >= minutes * WORDS_PER_MINUTE:
+            return segments
+        segments.append(sentence)
+        words += len(sentence.split())
+
+async def run(summarizer, sentences, lengths, parallelisms):
+    # Warm up so the first length is not timed initialising kernels
+    await summarize_document(summarizer, sentences[:20])
+
+    print(f"{'minutes':>7} {'words':>7} {'tokens':>7} {'parallel':>8} {'chunks':>6} {'passes':>6} {'wall (s)':>9} {'s/chunk':>8}")
+    for minutes in lengths:
+        segments = transcript(sentences, minutes)
+        tokens = len(summarizer.tokenizer(" ".join(segments), add_special_tokens=False)["input_ids"])
+        for parallelism in parallelisms:
+            inference.configure(parallelism)
+            start = time.perf_counter()
+            result = await summarize_document(summarizer, segments)
+            elapsed = time.perf_counter() - start
+            print(
+                f"{minutes:>7} {sum(len(s.split()) for s in segments):>7} {tokens:>7} {parallelism:>8} "
+                f"{result['chunks']:>6} {result['passes']:>6} {elapsed:>9.1f} {elapsed / result['chunks']:>8.2f}"
+            )
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--minutes", type=int, nargs="+", default=[5, 15, 30, 60, 120, 180])
+    parser.add_argument("--parallelism", type=int, nargs="+", default=[inference.workers])
+    parser.add_argument("--batch-size", type=int, default=batcher.batch_size)
+    parser.add_argument("--precision", default="fp32")
+    parser.add_argument("--threads", type=int, default=0, help="torch threads (0 keeps torch's default)")
+    args = parser.parse_args()
+
+    if args.threads:
+        torch.set_num_threads(args.threads)
+    with open(EVAL_SET) as f:
+        sentences = [s for line in f if line.strip() for s in split_sentences(json.loads(line)["text"])]
+    summarizer = load_summarizer(args.precision)
+    batcher.batch_size = args.batch_size
+    print(
+        f"{SUMMARIZATION_MODEL} ({args.precision}), chunks of {longform.SUMMARY_CHUNK_TOKENS} tokens "
+        f"with {longform.SUMMARY_CHUNK_OVERLAP} overlap, batch size {args.batch_size}, "
+        f"{torch.get_num_threads()} torch threads"
+    )
+    asyncio.run(run(summarizer, sentences, args.minutes, args.parallelism))
+
+if __name__ == "__main__":
+    main()
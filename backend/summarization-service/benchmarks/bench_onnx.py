@@ -0,0 +1,89 @@
+"""
+Compare the ONNX Runtime backend (SUMMARIZER_BACKEND=onnx) with PyTorch on
+the bundled evaluation set: output parity, single-request latency and
+batched throughput, per precision.
+
+    python benchmarks/bench_onnx.py --precisions fp32 int8 --rounds 3
+
+Parity is ROUGE-L F1 of each ONNX summary against the PyTorch summary of
+the same precision, plus the share of summaries that are identical. The
+script exits non-zero when mean parity falls below --min-parity (fp32 only;
+int8 quantizes differently on each backend, so its parity is reported
+but not enforced). The first ONNX run exports the model under
+SUMMARIZER_ONNX_DIR, which is not timed. Generation settings match
+POST /summarize.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import torch
+
+from app.batching import summarize_batch
+from app.summarizer import SUMMARIZATION_MODEL, load_summarizer, weights_size
+from bench_quantization import EVAL_SET, rouge_l, tokens
+
+def evaluate(summarizer, texts, rounds: int, batch_size: int):
+    # Warm up so neither backend is timed initialising kernels
+    summarize_batch(summarizer, texts[:1])
+
+    start = time.perf_counter()
+    for _ in range(rounds):
+        summaries = [summarize_batch(summarizer, [text])[0] for text in texts]
+    latency = (time.perf_counter() - start) / (rounds * len(texts))
+
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for i in range(0, len(texts), batch_size):
+            summarize_batch(summarizer, texts[i:i + batch_size])
+    throughput = rounds * len(texts) / (time.perf_counter() - start)
+    return summaries, latency, throughput, weights_size(summarizer.model) / 1024 / 1024
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--eval-set", default=EVAL_SET)
+    parser.add_argument("--precisions", nargs="+", default=["fp32", "int8"])
+    parser.add_argument("--rounds", type=int, default=3, help="Times to summarize the set")
+    parser.add_argument("--batch-size", type=int, default=4, help="Texts per call when measuring throughput")
+    parser.add_argument("--min-parity", type=float, default=0.95, help="Lowest acceptable mean fp32 ROUGE-L against PyTorch")
+    parser.add_argument("--threads", type=int, default=0, help="torch threads (0 keeps torch's default)")
+    args = parser.parse_args()
+
+    if args.threads:
+        torch.set_num_threads(args.threads)
+    with open(args.eval_set) as f:
+        texts = [json.loads(line)["text"] for line in f if line.strip()]
+    print(f"{SUMMARIZATION_MODEL}, {len(texts)} transcripts x {args.rounds} rounds, {torch.get_num_threads()} torch threads")
+
+    print(
+        f"{'precision':>9} {'backend':>8} {'latency (s)':>11} {'speedup':>8} {'texts/s':>8} "
+        f"{'weights (MB)':>12} {'parity':>7} {'identical':>9}"
+    )
+    failed = False
+    for precision in args.precisions:
+        results = {}
+        for backend in ("pytorch", "onnx"):
+            summarizer = load_summarizer(precision, backend)
+            results[backend] = evaluate(summarizer, texts, args.rounds, args.batch_size)
+            del summarizer
+
+        reference = results["pytorch"][0]
+        for backend, (summaries, latency, throughput, weights) in results.items():
+            parity = sum(rouge_l(tokens(ref), tokens(summary)) for ref, summary in zip(reference, summaries)) / len(texts)
+            identical = sum(ref == summary for ref, summary in zip(reference, summaries)) / len(texts)
+            print(
+                f"{precision:>9} {backend:>8} {latency:>11.2f} {results['pytorch'][1] / latency:>7.2f}x {throughput:>8.2f} "
+                f"{weights:>12.0f} {parity:>7.3f} {identical:>9.0%}"
+            )
+            if backend == "onnx" and precision == "fp32" and parity < args.min_parity:
+                failed = True
+    if failed:
+        print(f"FAIL: fp32 ONNX summaries diverge from PyTorch (ROUGE-L below {args.min_parity})")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
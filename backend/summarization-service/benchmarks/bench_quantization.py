@@ -0,0 +1,111 @@
+"""
+Compare the fp32 summarization model with its int8 dynamically quantized
+copy on the bundled evaluation set (meeting transcripts with reference
+summaries in eval_meetings.jsonl): latency, speedup, weight and resident
+memory, and ROUGE-1/2/L F1 against the references.
+
+    python benchmarks/bench_quantization.py --rounds 3
+
+Generation settings match POST /summarize.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from typing import List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import torch
+
+from app.summarizer import SUMMARIZATION_MODEL, SUMMARY_GENERATION, load_summarizer, weights_size
+
+EVAL_SET = os.path.join(os.path.dirname(os.path.abspath(__file__)), "eval_meetings.jsonl")
+
+def rss_mb() -> float:
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return float("nan")
+
+def tokens(text: str) -> List[str]:
+    return [w.strip(".,!?;:\"'()").lower() for w in text.split() if w.strip(".,!?;:\"'()")]
+
+def f1(overlap: int, reference: int, candidate: int) -> float:
+    if not overlap:
+        return 0.0
+    precision, recall = overlap / candidate, overlap / reference
+    return 2 * precision * recall / (precision + recall)
+
+def rouge_n(reference: List[str], candidate: List[str], n: int) -> float:
+    def grams(words):
+        counts = {}
+        for i in range(len(words) - n + 1):
+            gram = tuple(words[i:i + n])
+            counts[gram] = counts.get(gram, 0) + 1
+        return counts
+    ref, cand = grams(reference), grams(candidate)
+    overlap = sum(min(count, cand.get(gram, 0)) for gram, count in ref.items())
+    return f1(overlap, sum(ref.values()), sum(cand.values()))
+
+def rouge_l(reference: List[str], candidate: List[str]) -> float:
+    previous = [0] * (len(candidate) + 1)
+    for ref_word in reference:
+        current = [0]
+        for j, cand_word in enumerate(candidate, 1):
+            current.append(previous[j - 1] + 1 if ref_word == cand_word else max(previous[j], current[j - 1]))
+        previous = current
+    return f1(previous[-1], len(reference), len(candidate))
+
+def evaluate(precision: str, items, rounds: int):
+    before = rss_mb()
+    summarizer = load_summarizer(precision)
+    memory = rss_mb() - before
+    summarize = lambda text: summarizer(text, **SUMMARY_GENERATION)[0]["summary_text"]
+    # Warm up so neither side is timed initialising kernels
+    summarize(items[0]["text"])
+
+    start = time.perf_counter()
+    for _ in range(rounds):
+        summaries = [summarize(item["text"]) for item in items]
+    latency = (time.perf_counter() - start) / (rounds * len(items))
+
+    scores = [
+        (rouge_n(tokens(item["summary"]), tokens(summary), 1),
+         rouge_n(tokens(item["summary"]), tokens(summary), 2),
+         rouge_l(tokens(item["summary"]), tokens(summary)))
+        for item, summary in zip(items, summaries)
+    ]
+    rouge = [sum(score[i] for score in scores) / len(scores) for i in range(3)]
+    weights = weights_size(summarizer.model) / 1024 / 1024
+    del summarizer
+    return latency, weights, memory, rouge
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--eval-set", default=EVAL_SET)
+    parser.add_argument("--rounds", type=int, default=3, help="Times to summarize the set")
+    parser.add_argument("--threads", type=int, default=0, help="torch threads (0 keeps torch's default)")
+    args = parser.parse_args()
+
+    if args.threads:
+        torch.set_num_threads(args.threads)
+    with open(args.eval_set) as f:
+        items = [json.loads(line) for line in f if line.strip()]
+    print(f"{SUMMARIZATION_MODEL}, {len(items)} transcripts x {args.rounds} rounds, {torch.get_num_threads()} torch threads")
+
+    results = {precision: evaluate(precision, items, args.rounds) for precision in ("fp32", "int8")}
+    baseline = results["fp32"]
+    print(f"{'precision':>9} {'latency (s)':>11} {'speedup':>8} {'weights (MB)':>12} {'RSS +MB':>8} {'ROUGE-1':>8} {'ROUGE-2':>8} {'ROUGE-L':>8}")
+    for precision, (latency, weights, memory, rouge) in results.items():
+        print(
+            f"{precision:>9} {latency:>11.2f} {baseline[0] / latency:>7.2f}x {weights:>12.0f} {memory:>8.0f} "
+            f"{rouge[0]:>8.3f} {rouge[1]:>8.3f} {rouge[2]:>8.3f}"
+        )
+    print(f"int8 weights are {1 - results['int8'][1] / baseline[1]:.0%} smaller; "
+          f"ROUGE-L delta {results['int8'][3][2] - baseline[3][2]:+.3f}")
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,14 @@
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from transformers import pipeline
-from typing import Dict
+from typing import Dict, List, Optional
+from bson import ObjectId
 from shared.database import Database
+from app.batching import batcher
+from app.cache import summary_cache
+from app.inference import QueueFullError, inference
+from app.longform import split_sentences, summarize_document
+from app.summarizer import SUMMARIZER_PRECISION, UnknownPrecisionError, summarizers
+import asyncio
 import logging
 import warnings
 import os
@@ -21,9 +27,6 @@ os.environ['HF_HUB_DOWNLOAD_TIMEOUT'] = '500'
 
 app = FastAPI(title="Summarization Service")
 
-# Initialize models as None
-summarizer = None
-
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -34,7 +37,6 @@ app.add_middleware(
 
 @app.on_event("startup")
 async def startup():
-    global summarizer
     try:
         # Connect to database
         await Database.connect_db()
@@ -42,18 +44,16 @@ async def startup():
         # Create cache directory
         os.makedirs('/app/model_cache', exist_ok=True)
         
-        # Load models with offline mode if download fails
+        # Load the default precision; others load on first request
         logger.info("Loading summarization model...")
         try:
-            # Use a smaller model by default
-            summarizer = pipeline("summarization",
-                                model="sshleifer/distilbart-cnn-12-6",
-                                tokenizer="sshleifer/distilbart-cnn-12-6")
+            await summarizers.get(SUMMARIZER_PRECISION)
         except Exception as e:
             logger.error(f"Failed to load model: {str(e)}")
             raise e
             
         logger.info("Model loaded successfully")
+        app.state.cache_trim = asyncio.create_task(summary_cache.trim_periodically(await Database.get_db()))
     except Exception as e:
         logger.error(f"Error during startup: {str(e)}")
         raise e
@@ -61,24 +61,95 @@ async def startup():
 @app.on_event("shutdown")
 async def shutdown_db_client():
     await Database.close_db()
+    inference.shutdown()
+
+async def summarize_units(units: List[str], precision: Optional[str], transcription_id: Optional[ObjectId] = None) -> Dict:
+    precision = summarizers.validate(precision or SUMMARIZER_PRECISION)
+    if not summarizers.is_loaded(SUMMARIZER_PRECISION):
+        raise HTTPException(status_code=503, detail="Model not loaded")
+    if not units:
+        raise HTTPException(status_code=422, detail="Nothing to summarize")
+
+    async def generate() -> Dict:
+        async with inference.admit():
+            summarizer = await summarizers.get(precision)
+            return await summarize_document(summarizer, units)
+
+    try:
+        db = await Database.get_db()
+        result = await summary_cache.summarize(db, units, precision, generate, transcription_id)
+    except QueueFullError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+    return {
+        **result,
+        "precision": precision,
+        "status": "completed"
+    }
 
 @app.post("/summarize")
-async def generate_summary(text: str) -> Dict:
+async def generate_summary(text: str, precision: Optional[str] = None) -> Dict:
+    """
+    Summarize text with the model at the given precision (fp32 or int8;
+    SUMMARIZER_PRECISION if omitted). Text longer than the model's window
+    is summarized in chunks, split between sentences. Repeated text is
+    answered from the summary cache.
+    """
     try:
-        if summarizer is None:
-            raise HTTPException(status_code=503, detail="Model not loaded")
-            
-        summary = summarizer(text, 
-                           max_length=130,
-                           min_length=30,
-                           do_sample=False)[0]['summary_text']
-        
+        return await summarize_units(split_sentences(text), precision)
+    except HTTPException:
+        raise
+    except UnknownPrecisionError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error generating summary: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/summarize/transcriptions/{transcription_id}")
+async def summarize_transcription(transcription_id: str, precision: Optional[str] = None) -> Dict:
+    """
+    Summarize a stored transcription, chunked on its segment boundaries;
+    cached until the transcription's text changes
+    """
+    try:
+        if not ObjectId.is_valid(transcription_id):
+            raise HTTPException(status_code=422, detail="Invalid transcription_id format")
+        db = await Database.get_db()
+        transcription = await db.transcriptions.find_one(
+            {"_id": ObjectId(transcription_id)},
+            {"text": 1, "segments.text": 1}
+        )
+        if not transcription:
+            raise HTTPException(status_code=404, detail="Transcription not found")
+
+        units = [segment["text"].strip() for segment in transcription.get("segments", []) if segment.get("text", "").strip()]
+        return await summarize_units(
+            units or split_sentences(transcription.get("text") or ""),
+            precision,
+            transcription["_id"]
+        )
+    except HTTPException:
+        raise
+    except UnknownPrecisionError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error summarizing transcription {transcription_id}: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/metrics")
+async def get_metrics():
+    """
+    Summary cache counters, admission queue depth and inference times,
+    batching counters and resident models
+    """
+    try:
+        db = await Database.get_db()
         return {
-            "summary": summary,
-            "status": "completed"
+            "cache": await summary_cache.get_stats(db),
+            "queue": inference.stats(),
+            "batching": batcher.stats(),
+            "models": summarizers.stats()
         }
     except Exception as e:
-        logger.error(f"Error generating summary: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/health")
@@ -92,13 +163,14 @@ async def health_check():
         await db.command("ping")
         
         # Check if model is loaded
-        if summarizer is None:
+        if not summarizers.is_loaded(SUMMARIZER_PRECISION):
             raise Exception("Model not loaded")
             
         return {
             "status": "healthy",
             "database": "connected",
-            "model": "loaded"
+            "model": "loaded",
+            "models": summarizers.stats()
         }
     except Exception as e:
         logger.error(f"Health check failed: {str(e)}")
@@ -0,0 +1,66 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("torch")
+pytest.importorskip("transformers")
+
+from bson import ObjectId
+from mongomock_motor import AsyncMongoMockClient
+
+from app.cache import SummaryCache, cache_key, normalize, text_hash
+
+def generator(summary: str, calls: list):
+    async def generate():
+        calls.append(summary)
+        await asyncio.sleep(0.01)
+        return {"summary": summary, "chunks": 1, "passes": 1}
+    return generate
+
+def test_normalize_collapses_whitespace_per_unit():
+    assert normalize(["  Hello\tthere.  ", "Good   day."]) == "Hello there.\nGood day."
+    assert text_hash(["Hello  there."]) == text_hash(["Hello there."])
+    assert text_hash(["Hello there."]) != text_hash(["Hello", "there."])
+
+def test_cache_key_depends_on_precision():
+    digest = text_hash(["Hello there."])
+    assert cache_key(digest, "fp32") == cache_key(digest, "fp32")
+    assert cache_key(digest, "fp32") != cache_key(digest, "int8")
+
+def test_identical_requests_generate_once():
+    async def run():
+        db = AsyncMongoMockClient()["test"]
+        cache, calls = SummaryCache(), []
+        results = await asyncio.gather(*(
+            cache.summarize(db, ["Same text."], "fp32", generator("summary", calls)) for _ in range(3)
+        ))
+        assert calls == ["summary"]
+        assert [result["summary"] for result in results] == ["summary"] * 3
+        assert cache.deduplicated == 2
+
+        cache.entries.clear()
+        again = await cache.summarize(db, ["Same  text."], "fp32", generator("other", calls))
+        assert again == {"summary": "summary", "chunks": 1, "passes": 1, "cached": True}
+        assert cache.persistent_hits == 1
+    asyncio.run(run())
+
+def test_transcriptions_with_the_same_text_keep_their_own_summaries():
+    async def run():
+        db = AsyncMongoMockClient()["test"]
+        cache, calls = SummaryCache(), []
+        first, second = ObjectId(), ObjectId()
+        await cache.summarize(db, ["Shared text."], "fp32", generator("shared", calls), first)
+        shared = await cache.summarize(db, ["Shared text."], "fp32", generator("unused", calls), second)
+        assert shared["cached"] and calls == ["shared"]
+
+        # Editing the first transcription replaces only its own summary
+        await cache.summarize(db, ["Edited text."], "fp32", generator("edited", calls), first)
+        assert (await db.summaries.find_one({"transcription_id": first}))["overview"] == "edited"
+        assert (await db.summaries.find_one({"transcription_id": second}))["overview"] == "shared"
+        assert await db.summaries.count_documents({"transcription_id": first}) == 1
+        assert cache.invalidated == 1
+
+        # Cache entries are never tied to a transcription
+        async for entry in db.summaries.find({"cache_key": {"$ne": None}}):
+            assert entry["transcription_id"] is None
+    asyncio.run(run())
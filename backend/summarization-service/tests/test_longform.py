@@ -0,0 +1,46 @@
+import pytest
+
+pytest.importorskip("torch")
+pytest.importorskip("transformers")
+
+from app.longform import pack_chunks, split_sentences
+
+class WordTokenizer:
+    """One token per word, enough to check the packing arithmetic"""
+    def __call__(self, text, add_special_tokens=True):
+        if isinstance(text, list):
+            return {"input_ids": [self(item)["input_ids"] for item in text]}
+        return {"input_ids": text.split()}
+
+    def decode(self, ids):
+        return " ".join(ids)
+
+def words(chunk: str) -> int:
+    return len(chunk.split())
+
+def test_split_sentences():
+    assert split_sentences(" Hello there.  How are you?\nFine! ") == ["Hello there.", "How are you?", "Fine!"]
+    assert split_sentences("") == []
+
+def test_short_text_is_one_chunk():
+    assert pack_chunks(WordTokenizer(), ["a b c", "d e"], 10, 2) == ["a b c d e"]
+    assert pack_chunks(WordTokenizer(), [], 10, 2) == []
+
+def test_chunks_respect_the_limit_and_carry_overlap():
+    units = [f"u{i} x x" for i in range(10)]
+    chunks = pack_chunks(WordTokenizer(), units, 9, 3)
+    assert all(words(chunk) <= 9 for chunk in chunks)
+    # Each chunk starts with the last unit of the one before it
+    for previous, chunk in zip(chunks, chunks[1:]):
+        assert chunk.startswith(" ".join(previous.split()[-3:]))
+    assert chunks[-1].endswith("u9 x x")
+
+def test_no_overlap_when_it_would_not_fit():
+    chunks = pack_chunks(WordTokenizer(), ["a a a a", "b b b b b b"], 8, 4)
+    assert chunks == ["a a a a", "b b b b b b"]
+
+def test_long_unit_is_cut_by_tokens():
+    unit = " ".join(str(i) for i in range(25))
+    chunks = pack_chunks(WordTokenizer(), [unit], 10, 0)
+    assert [words(chunk) for chunk in chunks] == [10, 10, 5]
+    assert " ".join(chunks) == unit
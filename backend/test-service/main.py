@@ -216,11 +216,25 @@ class TestService:
             if not self.recording_id:
                 raise Exception("No recording ID available")
 
+            headers = {"Authorization": f"Bearer {self.auth_token}"}
             response = await self.client.post(
                 f"{self.api_gateway}/api/v1/meetings/transcribe/{self.recording_id}",
-                headers={"Authorization": f"Bearer {self.auth_token}"}
+                headers=headers
             )
-            assert response.status_code == 200
+            # Transcription is queued; poll the job until it finishes
+            assert response.status_code == 202
+            job = response.json()
+            for _ in range(60):
+                if job["status"] not in ("pending", "processing"):
+                    break
+                await asyncio.sleep(2)
+                response = await self.client.get(
+                    f"{self.api_gateway}/api/v1/meetings/transcribe/jobs/{job['job_id']}",
+                    headers=headers
+                )
+                assert response.status_code == 200
+                job = response.json()
+            assert job["status"] == "completed", f"Transcription job ended as {job['status']}: {job.get('error')}"
             self.log_result("Transcription Service", True)
         except Exception as e:
             logger.error(f"Transcription Service test failed: {str(e)}")
@@ -0,0 +1,88 @@
+"""
+Micro-batching of short recordings.
+
+A voice note of a few seconds still pays for Whisper's full 30-second
+encoder window and a decoder call of its own. Short recordings submitted
+within TRANSCRIPTION_BATCH_MAX_WAIT of each other (the queue workers claim
+pending short jobs together) are transcribed as one batch of up to
+TRANSCRIPTION_BATCH_SIZE mel spectrograms per model.
+"""
+import asyncio
+import logging
+import os
+from typing import Dict, List, Set, Tuple
+
+from app import pool
+from app.pcm import PcmSlice
+
+logger = logging.getLogger(__name__)
+
+# 1 turns batching off
+TRANSCRIPTION_BATCH_SIZE = int(os.getenv("TRANSCRIPTION_BATCH_SIZE", "8"))
+TRANSCRIPTION_BATCH_MAX_WAIT = float(os.getenv("TRANSCRIPTION_BATCH_MAX_WAIT", "0.5"))
+BATCH_MAX_SECONDS = pool.BATCH_WINDOW_SECONDS
+
+def is_batchable(duration: float) -> bool:
+    return TRANSCRIPTION_BATCH_SIZE > 1 and 0 < duration <= BATCH_MAX_SECONDS
+
+class ClipBatcher:
+    def __init__(self, batch_size: int = TRANSCRIPTION_BATCH_SIZE, max_wait: float = TRANSCRIPTION_BATCH_MAX_WAIT):
+        self.batch_size = batch_size
+        self.max_wait = max_wait
+        # model name -> clips waiting for a batch
+        self.pending: Dict[str, List[Tuple[PcmSlice, asyncio.Future]]] = {}
+        self.timers: Dict[str, asyncio.TimerHandle] = {}
+        self.running: Set[asyncio.Task] = set()
+        self.batches = 0
+        self.clips = 0
+
+    async def transcribe(self, clip: PcmSlice, model_name: str) -> Dict:
+        """Transcribe a clip of up to BATCH_MAX_SECONDS as part of the next batch for its model"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        waiting = self.pending.setdefault(model_name, [])
+        waiting.append((clip, future))
+        if len(waiting) >= self.batch_size:
+            self._flush(model_name)
+        elif len(waiting) == 1:
+            self.timers[model_name] = loop.call_later(self.max_wait, self._flush, model_name)
+        return await future
+
+    def _flush(self, model_name: str):
+        timer = self.timers.pop(model_name, None)
+        if timer is not None:
+            timer.cancel()
+        batch = self.pending.pop(model_name, [])
+        if batch:
+            task = asyncio.ensure_future(self._run(model_name, batch))
+            self.running.add(task)
+            task.add_done_callback(self.running.discard)
+
+    async def _run(self, model_name: str, batch: List[Tuple[PcmSlice, asyncio.Future]]):
+        # Skip clips whose jobs were cancelled while waiting
+        batch = [(clip, future) for clip, future in batch if not future.done()]
+        if not batch:
+            return
+        try:
+            results = await pool.transcribe_batch([clip for clip, _ in batch], model_name)
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        self.batches += 1
+        self.clips += len(batch)
+        logger.info(f"Transcribed a batch of {len(batch)} short recordings with {model_name}")
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+    def stats(self) -> Dict:
+        return {
+            "batch_size": self.batch_size,
+            "batches": self.batches,
+            "clips": self.clips,
+            "mean_batch_size": self.clips / self.batches if self.batches else 0.0
+        }
+
+batcher = ClipBatcher()
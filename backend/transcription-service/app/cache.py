@@ -0,0 +1,175 @@
+"""
+Transcription results cached by (audio content hash, model, decoding options).
+
+Two tiers: an in-process LRU for repeats within minutes (client retries,
+duplicate jobs), in front of the transcription_cache collection, which
+survives restarts and is shared by every replica. Both tiers are bounded by
+size and age. Hits skip Whisper entirely.
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+
+import bson
+
+from app.chunking import decoding_options
+
+logger = logging.getLogger(__name__)
+
+TRANSCRIPTION_CACHE_ENABLED = os.getenv("TRANSCRIPTION_CACHE_ENABLED", "true").lower() == "true"
+TRANSCRIPTION_CACHE_MEMORY_MB = int(os.getenv("TRANSCRIPTION_CACHE_MEMORY_MB", "64"))
+TRANSCRIPTION_CACHE_MEMORY_TTL = int(os.getenv("TRANSCRIPTION_CACHE_MEMORY_TTL", "3600"))
+TRANSCRIPTION_CACHE_MAX_MB = int(os.getenv("TRANSCRIPTION_CACHE_MAX_MB", "1024"))
+TRANSCRIPTION_CACHE_TTL_DAYS = int(os.getenv("TRANSCRIPTION_CACHE_TTL_DAYS", "30"))
+TRANSCRIPTION_CACHE_TRIM_INTERVAL = int(os.getenv("TRANSCRIPTION_CACHE_TRIM_INTERVAL", "3600"))
+
+# Entries deleted per round trip while trimming the persistent tier
+TRIM_BATCH_SIZE = 500
+
+def cache_key(sha256: str, model: str, options: Dict) -> str:
+    key = json.dumps({"audio": sha256, "model": model, "options": options}, sort_keys=True)
+    return hashlib.sha256(key.encode()).hexdigest()
+
+def recording_cache_key(recording: Dict, model: str) -> Optional[str]:
+    """Cache key for transcribing a recording with model; None if caching does not apply"""
+    if not TRANSCRIPTION_CACHE_ENABLED or not recording.get("sha256"):
+        return None
+    return cache_key(recording["sha256"], model, decoding_options())
+
+class TranscriptionCache:
+    def __init__(
+        self,
+        memory_bytes: int = TRANSCRIPTION_CACHE_MEMORY_MB * 1024 * 1024,
+        memory_ttl: int = TRANSCRIPTION_CACHE_MEMORY_TTL
+    ):
+        self.memory_bytes = memory_bytes
+        self.memory_ttl = memory_ttl
+        # key -> (fields, size in bytes, time stored)
+        self.entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self.memory_used = 0
+        self.memory_hits = 0
+        self.persistent_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    async def get(self, db, key: str) -> Optional[Dict]:
+        """Cached TranscriptionModel fields for key, or None"""
+        entry = self.entries.get(key)
+        if entry is not None:
+            if time.monotonic() - entry[2] < self.memory_ttl:
+                self.entries.move_to_end(key)
+                self.memory_hits += 1
+                return entry[0]
+            self._drop(key)
+
+        now = datetime.utcnow()
+        document = await db.transcription_cache.find_one_and_update(
+            {"_id": key, "created_at": {"$gte": now - timedelta(days=TRANSCRIPTION_CACHE_TTL_DAYS)}},
+            {"$set": {"last_used_at": now}, "$inc": {"hits": 1}},
+            {"result": 1, "size": 1}
+        )
+        if document is None:
+            self.misses += 1
+            return None
+        self.persistent_hits += 1
+        self._remember(key, document["result"], document["size"])
+        return document["result"]
+
+    async def put(self, db, key: str, recording: Dict, model: str, fields: Dict):
+        size = len(bson.encode({"result": fields}))
+        now = datetime.utcnow()
+        await db.transcription_cache.replace_one(
+            {"_id": key},
+            {
+                "sha256": recording["sha256"],
+                "model": model,
+                "options": decoding_options(),
+                "result": fields,
+                "size": size,
+                "hits": 0,
+                "created_at": now,
+                "last_used_at": now
+            },
+            upsert=True
+        )
+        self._remember(key, fields, size)
+
+    def _remember(self, key: str, fields: Dict, size: int):
+        if size > self.memory_bytes:
+            return
+        self._drop(key)
+        self.entries[key] = (fields, size, time.monotonic())
+        self.memory_used += size
+        while self.memory_used > self.memory_bytes:
+            oldest = next(iter(self.entries))
+            self._drop(oldest)
+            self.evictions += 1
+
+    def _drop(self, key: str):
+        entry = self.entries.pop(key, None)
+        if entry is not None:
+            self.memory_used -= entry[1]
+
+    async def trim_periodically(self, db):
+        while True:
+            try:
+                await self.trim(db)
+            except Exception as e:
+                logger.error(f"Trimming the transcription cache failed: {str(e)}")
+            await asyncio.sleep(TRANSCRIPTION_CACHE_TRIM_INTERVAL)
+
+    async def trim(self, db):
+        """
+        Delete persistent entries older than TRANSCRIPTION_CACHE_TTL_DAYS, then
+        the least recently used ones until the tier fits TRANSCRIPTION_CACHE_MAX_MB
+        """
+        collection = db.transcription_cache
+        cutoff = datetime.utcnow() - timedelta(days=TRANSCRIPTION_CACHE_TTL_DAYS)
+        expired = await collection.delete_many({"created_at": {"$lt": cutoff}})
+
+        totals = await collection.aggregate([
+            {"$group": {"_id": None, "bytes": {"$sum": "$size"}}}
+        ]).to_list(length=1)
+        excess = (totals[0]["bytes"] if totals else 0) - TRANSCRIPTION_CACHE_MAX_MB * 1024 * 1024
+        removed = 0
+        while excess > 0:
+            batch = await collection.find({}, {"size": 1}).sort("last_used_at", 1).limit(TRIM_BATCH_SIZE).to_list(length=TRIM_BATCH_SIZE)
+            if not batch:
+                break
+            victims = []
+            for document in batch:
+                if excess <= 0:
+                    break
+                victims.append(document["_id"])
+                excess -= document["size"]
+            await collection.delete_many({"_id": {"$in": victims}})
+            removed += len(victims)
+
+        if expired.deleted_count or removed:
+            logger.info(f"Trimmed transcription cache: {expired.deleted_count} expired, {removed} over size")
+
+    async def get_stats(self, db) -> Dict:
+        totals = await db.transcription_cache.aggregate([
+            {"$group": {"_id": None, "entries": {"$sum": 1}, "bytes": {"$sum": "$size"}}}
+        ]).to_list(length=1)
+        lookups = self.memory_hits + self.persistent_hits + self.misses
+        return {
+            "enabled": TRANSCRIPTION_CACHE_ENABLED,
+            "memory_hits": self.memory_hits,
+            "persistent_hits": self.persistent_hits,
+            "misses": self.misses,
+            "hit_rate": (self.memory_hits + self.persistent_hits) / lookups if lookups else 0.0,
+            "memory_entries": len(self.entries),
+            "memory_bytes": self.memory_used,
+            "memory_evictions": self.evictions,
+            "persistent_entries": totals[0]["entries"] if totals else 0,
+            "persistent_bytes": totals[0]["bytes"] if totals else 0
+        }
+
+transcription_cache = TranscriptionCache()
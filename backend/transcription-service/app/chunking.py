@@ -0,0 +1,177 @@
+"""
+Chunked transcription of long recordings.
+
+The decoded audio is cut into chunks of CHUNK_MIN_SECONDS to
+CHUNK_MAX_SECONDS, each cut placed at the quietest point of its search
+window (a pause between words where there is one), so no word straddles a
+seam. Chunks are transcribed on the worker pool and their segments are
+shifted back to absolute timestamps, so results can be published chunk by
+chunk while the rest of the recording is still being transcribed.
+"""
+import asyncio
+import logging
+import os
+from typing import Awaitable, Callable, Dict, List, Tuple
+
+import numpy as np
+from whisper.audio import SAMPLE_RATE
+
+from app import pool
+from app.batching import TRANSCRIPTION_BATCH_SIZE, batcher, is_batchable
+from app.pcm import PcmSlice, load_pcm
+
+logger = logging.getLogger(__name__)
+
+TRANSCRIPTION_CHUNKING = os.getenv("TRANSCRIPTION_CHUNKING", "false").lower() == "true"
+# Recordings shorter than this are transcribed in one piece
+CHUNKING_MIN_DURATION = float(os.getenv("CHUNKING_MIN_DURATION", "120"))
+CHUNK_MIN_SECONDS = float(os.getenv("CHUNK_MIN_SECONDS", "30"))
+CHUNK_MAX_SECONDS = float(os.getenv("CHUNK_MAX_SECONDS", "60"))
+# Context carried into the next chunk when chunks run one after another
+PROMPT_CHARS = 200
+
+# Energy is measured over 20ms frames and smoothed over 200ms, so a cut lands
+# in a pause rather than a brief dip inside a word
+FRAME_SECONDS = 0.02
+SMOOTHING_FRAMES = 10
+
+def decoding_options() -> Dict:
+    """Settings that change what transcribe_incrementally produces for the same audio and model"""
+    return {
+        "chunking": TRANSCRIPTION_CHUNKING,
+        "chunking_min_duration": CHUNKING_MIN_DURATION,
+        "chunk_min_seconds": CHUNK_MIN_SECONDS,
+        "chunk_max_seconds": CHUNK_MAX_SECONDS,
+        "batching": TRANSCRIPTION_BATCH_SIZE > 1
+    }
+
+def frame_energy(audio: np.ndarray) -> np.ndarray:
+    """Smoothed RMS energy (dB) per FRAME_SECONDS frame"""
+    frame = int(SAMPLE_RATE * FRAME_SECONDS)
+    count = len(audio) // frame
+    frames = audio[:count * frame].reshape(count, frame)
+    rms = np.sqrt(np.mean(frames.astype(np.float32) ** 2, axis=1) + 1e-10)
+    energy = 20 * np.log10(rms)
+    if count >= SMOOTHING_FRAMES:
+        kernel = np.ones(SMOOTHING_FRAMES) / SMOOTHING_FRAMES
+        energy = np.convolve(energy, kernel, mode="same")
+    return energy
+
+def find_split_points(
+    audio: np.ndarray,
+    min_seconds: float = CHUNK_MIN_SECONDS,
+    max_seconds: float = CHUNK_MAX_SECONDS
+) -> List[int]:
+    """Sample offsets where chunks start (the first is always 0)"""
+    total = len(audio)
+    min_samples = int(min_seconds * SAMPLE_RATE)
+    max_samples = int(max_seconds * SAMPLE_RATE)
+    energy = frame_energy(audio)
+    frame = int(SAMPLE_RATE * FRAME_SECONDS)
+
+    points = [0]
+    start = 0
+    while total - start > max_samples:
+        window_start = (start + min_samples) // frame
+        # Leave at least min_seconds for the final chunk where possible
+        window_end = min(start + max_samples, total - min_samples) // frame
+        if window_end <= window_start:
+            window_end = (start + max_samples) // frame
+        quietest = window_start + int(np.argmin(energy[window_start:window_end]))
+        start = quietest * frame + frame // 2
+        points.append(start)
+    return points
+
+def split_audio(audio: np.ndarray) -> List[Tuple[float, np.ndarray]]:
+    """(offset in seconds, samples) for each chunk"""
+    points = find_split_points(audio)
+    bounds = points + [len(audio)]
+    return [
+        (bounds[i] / SAMPLE_RATE, audio[bounds[i]:bounds[i + 1]])
+        for i in range(len(points))
+    ]
+
+def shift_segments(result: Dict, offset: float) -> List[Dict]:
+    """A chunk's segments moved to absolute timestamps"""
+    return [
+        {**segment, "start": segment["start"] + offset, "end": segment["end"] + offset}
+        for segment in result.get("segments", [])
+    ]
+
+def stitch(results: List[Tuple[float, Dict]], language: str) -> Dict:
+    """Merge per-chunk Whisper results into one, with absolute segment times"""
+    segments = []
+    texts = []
+    for offset, result in results:
+        for segment in shift_segments(result, offset):
+            segments.append({**segment, "id": len(segments)})
+        text = result["text"].strip()
+        if text:
+            texts.append(text)
+    return {"text": " ".join(texts), "segments": segments, "language": language}
+
+async def transcribe_incrementally(
+    pcm_path: str,
+    model_name: str,
+    publish: Callable[[List[Dict], float], Awaitable[None]]
+) -> Dict:
+    """
+    Transcribe a recording, passing each chunk's segments and the progress
+    (percent of the duration) to publish as soon as they are available.
+
+    Recordings shorter than CHUNKING_MIN_DURATION are transcribed in one
+    call, batched with other short recordings if they fit one Whisper
+    window. Longer ones are split into chunks, which run in parallel with
+    TRANSCRIPTION_CHUNKING (published in order as they finish) or one after
+    another, each prompted with the end of the previous chunk's text.
+    Chunks are passed to the workers as slices of the memory-mapped PCM
+    file at pcm_path, not as samples.
+    """
+    audio = load_pcm(pcm_path)
+    duration = len(audio) / SAMPLE_RATE
+    if duration < CHUNKING_MIN_DURATION:
+        clip = PcmSlice(pcm_path, 0, len(audio))
+        if is_batchable(duration):
+            result = await batcher.transcribe(clip, model_name)
+        else:
+            result = await pool.transcribe(clip, model_name)
+        await publish(result.get("segments", []), 100.0)
+        return result
+
+    points = await asyncio.to_thread(find_split_points, audio)
+    bounds = points + [len(audio)]
+    chunks = [
+        (bounds[i] / SAMPLE_RATE, PcmSlice(pcm_path, bounds[i], bounds[i + 1]))
+        for i in range(len(points))
+    ]
+    # Detect the language once so every chunk decodes the same way
+    language = await pool.detect_language(chunks[0][1], model_name)
+    logger.info(f"Transcribing {duration:.0f}s of audio as {len(chunks)} chunks ({language})")
+
+    results = []
+    if TRANSCRIPTION_CHUNKING:
+        # Only as many chunks in flight as the pool can run, so a long
+        # recording does not queue all its chunks ahead of other jobs
+        slots = asyncio.Semaphore(pool.parallelism())
+
+        async def transcribe_chunk(samples: PcmSlice) -> Dict:
+            async with slots:
+                return await pool.transcribe(samples, model_name, language=language)
+
+        tasks = [asyncio.ensure_future(transcribe_chunk(samples)) for _, samples in chunks]
+    try:
+        prompt = None
+        for index, (offset, samples) in enumerate(chunks):
+            if TRANSCRIPTION_CHUNKING:
+                result = await tasks[index]
+            else:
+                result = await pool.transcribe(samples, model_name, language=language, initial_prompt=prompt)
+                prompt = result["text"][-PROMPT_CHARS:].strip() or None
+            results.append((offset, result))
+            progress = min((offset + samples.duration) / duration * 100, 100.0)
+            await publish(shift_segments(result, offset), progress)
+    finally:
+        if TRANSCRIPTION_CHUNKING:
+            for task in tasks:
+                task.cancel()
+    return stitch(results, language)
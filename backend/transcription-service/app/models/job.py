@@ -0,0 +1,146 @@
+from datetime import datetime, timedelta
+from typing import Optional
+from pydantic import BaseModel, Field
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+from bson import ObjectId
+
+class TranscriptionJobModel(BaseModel):
+    recording_id: ObjectId
+    transcription_id: ObjectId
+    # Whisper model to transcribe with
+    model: str = "base"
+    # Seconds, from the recording's probe; the scheduler's cost estimate, and
+    # short jobs are claimed and transcribed in batches
+    duration: Optional[float] = None
+    # Scheduling class ("interactive" or "backfill") and the workspace it is shared fairly within
+    priority: str = "interactive"
+    workspace_id: Optional[ObjectId] = None
+    status: str = "pending"
+    # True while pending or processing; a partial unique index allows one
+    # active job per recording
+    active: bool = True
+    attempts: int = 0
+    max_attempts: int = 3
+    run_after: datetime = Field(default_factory=datetime.utcnow)
+    lease_owner: Optional[str] = None
+    lease_expires_at: Optional[datetime] = None
+    last_error: Optional[str] = None
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
+
+    class Config:
+        arbitrary_types_allowed = True
+
+class JobService:
+    """
+    Transcription jobs queued in Mongo. Workers claim a job by taking a lease
+    that they renew with heartbeats while transcribing; a job whose lease
+    runs out (its worker crashed or hung) becomes claimable again.
+    """
+    def __init__(self, db):
+        self.db = db
+        self.collection = db.transcription_jobs
+
+    async def enqueue(self, job: TranscriptionJobModel) -> Optional[str]:
+        """Insert a job; returns None if the recording already has an active job"""
+        try:
+            result = await self.collection.insert_one(job.dict())
+        except DuplicateKeyError:
+            return None
+        return str(result.inserted_id)
+
+    async def get_job(self, job_id: str):
+        if not ObjectId.is_valid(job_id):
+            return None
+        return await self.collection.find_one({"_id": ObjectId(job_id)})
+
+    async def get_active_job(self, recording_id: str):
+        return await self.collection.find_one({"recording_id": ObjectId(recording_id), "active": True})
+
+    async def get_latest_job(self, recording_id: str):
+        """The recording's most recently queued job, finished or not"""
+        return await self.collection.find_one(
+            {"recording_id": ObjectId(recording_id)},
+            sort=[("created_at", -1), ("_id", -1)]
+        )
+
+    def runnable(self, now: datetime) -> dict:
+        """Jobs a worker may claim at now: due pending jobs and expired leases"""
+        return {
+            "$or": [
+                {"status": "pending", "run_after": {"$lte": now}},
+                {"status": "processing", "lease_expires_at": {"$lt": now}}
+            ]
+        }
+
+    async def claim(self, worker_id: str, lease_seconds: int, filters: Optional[dict] = None):
+        """
+        Lease the next runnable job to worker_id: a pending job that is due,
+        or a processing job whose lease has expired. Counts an attempt.
+        filters narrows the jobs considered.
+        """
+        now = datetime.utcnow()
+        runnable = self.runnable(now)
+        return await self.collection.find_one_and_update(
+            {"$and": [runnable, filters]} if filters else runnable,
+            {
+                "$set": {
+                    "status": "processing",
+                    "lease_owner": worker_id,
+                    "lease_expires_at": now + timedelta(seconds=lease_seconds),
+                    "updated_at": now
+                },
+                "$inc": {"attempts": 1}
+            },
+            sort=[("run_after", 1)],
+            return_document=ReturnDocument.AFTER
+        )
+
+    async def heartbeat(self, job_id: ObjectId, worker_id: str, lease_seconds: int) -> bool:
+        """Extend the lease; False if worker_id no longer holds it"""
+        now = datetime.utcnow()
+        result = await self.collection.update_one(
+            {"_id": job_id, "status": "processing", "lease_owner": worker_id},
+            {"$set": {"lease_expires_at": now + timedelta(seconds=lease_seconds), "updated_at": now}}
+        )
+        return result.matched_count == 1
+
+    async def complete(self, job_id: ObjectId, worker_id: str) -> bool:
+        return await self._finish(job_id, worker_id, {"status": "completed", "active": False, "last_error": None})
+
+    async def retry(self, job_id: ObjectId, worker_id: str, error: str, delay_seconds: float) -> bool:
+        """Put the job back in the queue, runnable again after delay_seconds"""
+        return await self._finish(job_id, worker_id, {
+            "status": "pending",
+            "run_after": datetime.utcnow() + timedelta(seconds=delay_seconds),
+            "last_error": error
+        })
+
+    async def fail(self, job_id: ObjectId, worker_id: str, error: str) -> bool:
+        """Give up on the job for good"""
+        return await self._finish(job_id, worker_id, {"status": "error", "active": False, "last_error": error})
+
+    async def release(self, job_id: ObjectId, worker_id: str) -> bool:
+        """Hand the job back without counting the attempt (e.g. on shutdown)"""
+        return await self._finish(
+            job_id,
+            worker_id,
+            {"status": "pending", "run_after": datetime.utcnow()},
+            {"$inc": {"attempts": -1}}
+        )
+
+    async def _finish(self, job_id: ObjectId, worker_id: str, fields: dict, extra: Optional[dict] = None) -> bool:
+        result = await self.collection.update_one(
+            {"_id": job_id, "status": "processing", "lease_owner": worker_id},
+            {
+                "$set": {
+                    **fields,
+                    "lease_owner": None,
+                    "lease_expires_at": None,
+                    "updated_at": datetime.utcnow()
+                },
+                **(extra or {})
+            }
+        )
+        return result.matched_count == 1
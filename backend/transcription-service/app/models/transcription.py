@@ -3,6 +3,10 @@ from typing import List, Optional
 from pydantic import BaseModel, Field
 from bson import ObjectId
 
+# Upper bound on segments fetched per read when streaming; large enough
+# that one read covers any realistic backlog
+MAX_SEGMENTS_PER_READ = 100000
+
 class TranscriptionSegment(BaseModel):
     start: float
     end: float
@@ -13,11 +17,19 @@ class TranscriptionModel(BaseModel):
     text: Optional[str] = None
     language: Optional[str] = None
     confidence: Optional[float] = None
+    model: Optional[str] = None
     status: str = "pending"
     segments: List[TranscriptionSegment] = []
+    # Percent of the recording transcribed so far
+    progress: float = 0.0
+    # Job attempt that produced the segments; streams restart when it changes
+    attempt: int = 0
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
 
+    class Config:
+        arbitrary_types_allowed = True
+
 class TranscriptionService:
     def __init__(self, db):
         self.db = db
@@ -27,6 +39,33 @@ class TranscriptionService:
         result = await self.collection.insert_one(transcription.dict())
         return str(result.inserted_id)
 
+    async def get_transcription(self, transcription_id: str):
+        return await self.collection.find_one({"_id": ObjectId(transcription_id)})
+
+    async def get_new_segments(self, transcription_id: str, skip: int):
+        """The transcription with only the segments after the first skip"""
+        return await self.collection.find_one(
+            {"_id": ObjectId(transcription_id)},
+            {
+                "segments": {"$slice": [skip, MAX_SEGMENTS_PER_READ]},
+                "status": 1,
+                "progress": 1,
+                "attempt": 1,
+                "text": 1,
+                "language": 1
+            }
+        )
+
+    async def append_segments(self, transcription_id: str, segments: List[dict], progress: float):
+        """Add a batch of segments as soon as they are transcribed"""
+        await self.collection.update_one(
+            {"_id": ObjectId(transcription_id)},
+            {
+                "$push": {"segments": {"$each": segments}},
+                "$set": {"progress": progress, "updated_at": datetime.utcnow()}
+            }
+        )
+
     async def update_transcription(self, transcription_id: str, update_data: dict):
         await self.collection.update_one(
             {"_id": ObjectId(transcription_id)},
@@ -36,4 +75,17 @@ class TranscriptionService:
                     "updated_at": datetime.utcnow()
                 }
             }
-        ) 
\ No newline at end of file
+        )
+
+    async def update_for_attempt(self, transcription_id: str, attempt: int, update_data: dict) -> bool:
+        """Update unless a later attempt of the job has started; False if it has"""
+        result = await self.collection.update_one(
+            {"_id": ObjectId(transcription_id), "attempt": {"$not": {"$gt": attempt}}},
+            {
+                "$set": {
+                    **update_data,
+                    "updated_at": datetime.utcnow()
+                }
+            }
+        )
+        return result.matched_count == 1
@@ -0,0 +1,166 @@
+"""
+Recordings decoded once to 16kHz mono PCM and kept as .npy files.
+
+Whisper otherwise runs ffmpeg over the original file on every attempt,
+retry and model comparison. The first transcription of a recording decodes
+it into PCM_CACHE_DIR (next to the blobs with local storage, sharded the
+same way); later ones, and every chunk of a chunked job, memory-map that
+file, so workers read the samples straight from the page cache without
+decoding or copying them. The directory is kept under PCM_CACHE_MAX_MB by
+deleting the least recently used files.
+"""
+import asyncio
+import logging
+import os
+import time
+from typing import Dict, Union
+
+import numpy as np
+from whisper.audio import SAMPLE_RATE, load_audio
+
+from shared.storage import STORAGE_ROOT, get_storage
+
+logger = logging.getLogger(__name__)
+
+PCM_CACHE_DIR = os.getenv("PCM_CACHE_DIR", os.path.join(STORAGE_ROOT, "pcm"))
+# float32 is what Whisper consumes; int16 halves the disk use but converts each chunk on read
+PCM_CACHE_DTYPE = os.getenv("PCM_CACHE_DTYPE", "float32")
+PCM_CACHE_MAX_MB = int(os.getenv("PCM_CACHE_MAX_MB", "10240"))
+PCM_CACHE_TRIM_INTERVAL = int(os.getenv("PCM_CACHE_TRIM_INTERVAL", "600"))
+
+# Partial files older than this were left by a crashed decode
+STALE_PART_SECONDS = 3600
+
+if PCM_CACHE_DTYPE not in ("float32", "int16"):
+    raise ValueError(f"Unknown PCM_CACHE_DTYPE: {PCM_CACHE_DTYPE}")
+
+def pcm_path(recording: Dict) -> str:
+    name = recording.get("sha256") or str(recording["_id"])
+    return os.path.join(PCM_CACHE_DIR, name[:2], name[2:4], f"{name}.npy")
+
+def decode_to_pcm(audio_path: str, path: str):
+    """Decode a recording with ffmpeg and write it to path atomically"""
+    samples = load_audio(audio_path)
+    if PCM_CACHE_DTYPE == "int16":
+        # load_audio decodes to int16 and scales by 1/32768, so this is lossless
+        samples = np.clip(np.round(samples * 32768), -32768, 32767).astype(np.int16)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temp_path = f"{path}.{os.getpid()}.part"
+    try:
+        with open(temp_path, "wb") as f:
+            np.save(f, samples)
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+def load_pcm(path: str) -> np.ndarray:
+    """Memory-map a PCM file. Copy-on-write, so torch can wrap it without a read-only warning."""
+    return np.load(path, mmap_mode="c")
+
+class PcmSlice:
+    """
+    Samples start:stop of a PCM file. Sent to worker processes instead of the
+    samples themselves, which would be pickled (copied) into the worker.
+    """
+    __slots__ = ("path", "start", "stop")
+
+    def __init__(self, path: str, start: int, stop: int):
+        self.path = path
+        self.start = start
+        self.stop = stop
+
+    @property
+    def duration(self) -> float:
+        return (self.stop - self.start) / SAMPLE_RATE
+
+    def samples(self) -> np.ndarray:
+        """float32 samples, read from the mapped file"""
+        samples = load_pcm(self.path)[self.start:self.stop]
+        if samples.dtype == np.int16:
+            samples = samples.astype(np.float32) / 32768.0
+        return samples
+
+def resolve(audio: Union[str, np.ndarray, PcmSlice]) -> Union[str, np.ndarray]:
+    """What Whisper accepts: a file path or float32 samples"""
+    return audio.samples() if isinstance(audio, PcmSlice) else audio
+
+class PcmCache:
+    def __init__(self, root: str = PCM_CACHE_DIR, max_mb: int = PCM_CACHE_MAX_MB):
+        self.root = root
+        self.max_bytes = max_mb * 1024 * 1024
+        self.locks: Dict[str, asyncio.Lock] = {}
+        self.hits = 0
+        self.decodes = 0
+        self.evictions = 0
+        self.disk_bytes = 0
+
+    async def ensure(self, recording: Dict) -> str:
+        """Path of the recording's PCM file, decoding it first if it is not cached"""
+        path = pcm_path(recording)
+        lock = self.locks.setdefault(path, asyncio.Lock())
+        async with lock:
+            if os.path.exists(path):
+                # Mark it recently used for trimming
+                os.utime(path)
+                self.hits += 1
+            else:
+                start = time.perf_counter()
+                async with get_storage().local_file(recording["file_path"]) as audio_path:
+                    await asyncio.to_thread(decode_to_pcm, audio_path, path)
+                self.decodes += 1
+                logger.info(f"Decoded recording {recording['_id']} to PCM in {time.perf_counter() - start:.1f}s")
+        if not lock.locked():
+            self.locks.pop(path, None)
+        return path
+
+    def trim(self):
+        """Delete stale partial files, then the least recently used files until under PCM_CACHE_MAX_MB"""
+        now = time.time()
+        files = []
+        for directory, _, names in os.walk(self.root):
+            for name in names:
+                path = os.path.join(directory, name)
+                try:
+                    stat = os.stat(path)
+                    if name.endswith(".part"):
+                        if now - stat.st_mtime > STALE_PART_SECONDS:
+                            os.remove(path)
+                        continue
+                except FileNotFoundError:
+                    continue
+                files.append((stat.st_mtime, stat.st_size, path))
+
+        files.sort()
+        total = sum(size for _, size, _ in files)
+        for _, size, path in files:
+            if total <= self.max_bytes:
+                break
+            try:
+                # Workers still mapping the file keep reading it until they unmap it
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+            self.evictions += 1
+        self.disk_bytes = total
+
+    async def trim_periodically(self):
+        while True:
+            try:
+                await asyncio.to_thread(self.trim)
+            except Exception as e:
+                logger.error(f"Trimming the PCM cache failed: {str(e)}")
+            await asyncio.sleep(PCM_CACHE_TRIM_INTERVAL)
+
+    def stats(self) -> Dict:
+        return {
+            "hits": self.hits,
+            "decodes": self.decodes,
+            "evictions": self.evictions,
+            "disk_mb": round(self.disk_bytes / 1024 / 1024),
+            "max_mb": round(self.max_bytes / 1024 / 1024)
+        }
+
+pcm_cache = PcmCache()
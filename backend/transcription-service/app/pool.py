@@ -0,0 +1,229 @@
+"""
+Where Whisper inference runs.
+
+TRANSCRIPTION_EXECUTOR=thread (the default) runs model.transcribe in a
+thread of the service process, which keeps the event loop free but uses one
+set of torch threads. TRANSCRIPTION_EXECUTOR=process runs it in a pool of
+TRANSCRIPTION_PROCESSES forked workers so several recordings decode on
+separate cores at once.
+
+Models are loaded by the registry in the service process. In process mode
+their weights are moved to shared memory, and a worker receives a model
+(as shared-memory handles, not a copy) the first time it runs a call that
+needs it, so every worker maps the same tensors.
+"""
+import asyncio
+import functools
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, List, Optional, Tuple, Union
+
+import numpy as np
+import torch
+import torch.multiprocessing  # registers shared-memory pickling of tensors
+import whisper
+
+from app.pcm import PcmSlice, resolve
+from app.registry import registry
+
+logger = logging.getLogger(__name__)
+
+TRANSCRIPTION_EXECUTOR = os.getenv("TRANSCRIPTION_EXECUTOR", "thread")
+TRANSCRIPTION_PROCESSES = int(os.getenv("TRANSCRIPTION_PROCESSES", str(os.cpu_count() or 1)))
+# torch intra-op threads per worker process (or for the thread executor); 0 keeps torch's default
+TORCH_THREADS = int(os.getenv("TORCH_THREADS", "0"))
+
+# Clips up to one Whisper window can share a batched forward pass
+BATCH_WINDOW_SECONDS = whisper.audio.CHUNK_LENGTH
+# model.transcribe's defaults: a batched result past these thresholds is
+# treated as silence, or redone with model.transcribe's temperature fallback
+LOGPROB_THRESHOLD = -1.0
+COMPRESSION_RATIO_THRESHOLD = 2.4
+NO_SPEECH_THRESHOLD = 0.6
+# Seconds per timestamp token
+TIME_PRECISION = 0.02
+
+_pool: Optional[ProcessPoolExecutor] = None
+# Whisper installs decoding hooks on the model for each call, so calls on
+# one in-process model must not overlap
+_model_locks: Dict[int, threading.Lock] = {}
+
+# Worker process state: model name -> (registry version, model)
+_worker_models: Dict[str, Tuple[int, object]] = {}
+
+class ModelNotLoaded(Exception):
+    """The worker process does not hold the requested model version"""
+
+def _init_process(threads: int):
+    if threads:
+        torch.set_num_threads(threads)
+
+def _process_ready(_) -> int:
+    return os.getpid()
+
+def _transcribe(model, audio: Union[str, np.ndarray, PcmSlice], options: Dict) -> Dict:
+    return model.transcribe(resolve(audio), **options)
+
+def _detect_language(model, audio: Union[np.ndarray, PcmSlice]) -> str:
+    """Most likely language of the first 30 seconds of 16kHz samples"""
+    if not model.is_multilingual:
+        return "en"
+    mel = whisper.log_mel_spectrogram(whisper.pad_or_trim(resolve(audio))).to(model.device)
+    _, probs = model.detect_language(mel)
+    return max(probs, key=probs.get)
+
+def _segments(tokenizer, tokens: List[int], duration: float, result) -> List[Dict]:
+    """Split decoded tokens into segments at their timestamp tokens"""
+    segments = []
+    start = None
+    text_tokens: List[int] = []
+
+    def add(end: float):
+        segments.append({
+            "id": len(segments),
+            "start": start or 0.0,
+            "end": end,
+            "text": tokenizer.decode(text_tokens),
+            "avg_logprob": result.avg_logprob,
+            "no_speech_prob": result.no_speech_prob
+        })
+
+    for token in tokens:
+        if token >= tokenizer.timestamp_begin:
+            time = (token - tokenizer.timestamp_begin) * TIME_PRECISION
+            if start is None or not text_tokens:
+                start = time
+            else:
+                add(time)
+                start = None
+                text_tokens = []
+        else:
+            text_tokens.append(token)
+    if text_tokens:
+        add(duration)
+    return segments
+
+def _transcribe_batch(model, clips: List[Union[np.ndarray, PcmSlice]]) -> List[Dict]:
+    """
+    Transcribe clips of up to BATCH_WINDOW_SECONDS with one encoder pass and
+    one greedy decode over the whole batch. Clips whose decode looks
+    unreliable are redone one by one with model.transcribe.
+    """
+    samples = [resolve(clip) for clip in clips]
+    mel = torch.stack([
+        whisper.log_mel_spectrogram(whisper.pad_or_trim(audio), model.dims.n_mels)
+        for audio in samples
+    ]).to(model.device)
+    options = whisper.DecodingOptions(without_timestamps=False, fp16=model.device.type == "cuda")
+    decoded = whisper.decode(model, mel, options)
+    tokenizer = whisper.tokenizer.get_tokenizer(model.is_multilingual)
+
+    results = []
+    for audio, result in zip(samples, decoded):
+        if result.no_speech_prob > NO_SPEECH_THRESHOLD and result.avg_logprob < LOGPROB_THRESHOLD:
+            results.append({"text": "", "segments": [], "language": result.language})
+        elif result.avg_logprob < LOGPROB_THRESHOLD or result.compression_ratio > COMPRESSION_RATIO_THRESHOLD:
+            results.append(model.transcribe(audio))
+        else:
+            results.append({
+                "text": result.text,
+                "segments": _segments(tokenizer, result.tokens, len(audio) / whisper.audio.SAMPLE_RATE, result),
+                "language": result.language
+            })
+    return results
+
+def _call_in_process(name: str, version: int, model, resident: Dict[str, int], function, args):
+    """Run function(model, *args) in a worker, keeping its models in step with the registry"""
+    for cached in list(_worker_models):
+        if resident.get(cached) != _worker_models[cached][0]:
+            del _worker_models[cached]
+    if model is not None:
+        _worker_models[name] = (version, model)
+    cached = _worker_models.get(name)
+    if cached is None or cached[0] != version:
+        raise ModelNotLoaded(name)
+    return function(cached[1], *args)
+
+def _call_locked(model, function, args):
+    with _model_locks.setdefault(id(model), threading.Lock()):
+        return function(model, *args)
+
+def create_process_pool(processes: int, threads: int) -> ProcessPoolExecutor:
+    """
+    Fork a pool of workers. Call this before the service starts other
+    threads (the Mongo client's, the default executor's): forking a
+    multi-threaded process can copy locks in a held state.
+    """
+    registry.on_load = lambda model: model.share_memory()
+    pool = ProcessPoolExecutor(
+        max_workers=processes,
+        mp_context=multiprocessing.get_context("fork"),
+        initializer=_init_process,
+        initargs=(threads,)
+    )
+    # All workers are forked on the first submit; do it now rather than on the first job
+    pids = set(pool.map(_process_ready, range(processes)))
+    logger.info(f"Started {len(pids)} transcription worker processes with {threads or 'default'} torch threads each")
+    return pool
+
+def start():
+    """Set up the configured executor"""
+    global _pool
+    if TRANSCRIPTION_EXECUTOR == "process":
+        _pool = create_process_pool(TRANSCRIPTION_PROCESSES, TORCH_THREADS)
+    elif TRANSCRIPTION_EXECUTOR == "thread":
+        if TORCH_THREADS:
+            torch.set_num_threads(TORCH_THREADS)
+    else:
+        raise ValueError(f"Unknown TRANSCRIPTION_EXECUTOR: {TRANSCRIPTION_EXECUTOR}")
+
+def parallelism() -> int:
+    """Calls that can run at once: one per worker process, or one with the thread executor (calls hold the model's lock)"""
+    return TRANSCRIPTION_PROCESSES if _pool is not None else 1
+
+async def run_with_model(model_name: str, function, *args):
+    """Run function(model, *args) for the named model on the configured executor"""
+    async with registry.use(model_name) as entry:
+        if _pool is None:
+            return await asyncio.to_thread(_call_locked, entry.model, function, args)
+
+        resident = registry.resident()
+        try:
+            return await _run_in_pool(_call_in_process, model_name, entry.version, None, resident, function, args)
+        except ModelNotLoaded:
+            # First call on this worker: send the model along (shared, not copied)
+            return await _run_in_pool(_call_in_process, model_name, entry.version, entry.model, resident, function, args)
+
+async def transcribe(audio: Union[str, np.ndarray, PcmSlice], model_name: str, **options) -> Dict:
+    """Run model.transcribe on a file path, 16kHz samples or a slice of a PCM file"""
+    return await run_with_model(model_name, _transcribe, audio, options)
+
+async def transcribe_batch(clips: List[Union[np.ndarray, PcmSlice]], model_name: str) -> List[Dict]:
+    """Transcribe short clips in one batched forward pass; results in clip order"""
+    return await run_with_model(model_name, _transcribe_batch, clips)
+
+async def detect_language(audio: Union[np.ndarray, PcmSlice], model_name: str) -> str:
+    return await run_with_model(model_name, _detect_language, audio)
+
+async def _run_in_pool(function, *args):
+    global _pool
+    loop = asyncio.get_running_loop()
+    try:
+        return await loop.run_in_executor(_pool, functools.partial(function, *args))
+    except BrokenProcessPool:
+        # A worker died (e.g. OOM-killed). Forking now is riskier than at
+        # startup, but beats a service with no workers; the job queue retries.
+        logger.error("Transcription worker process died, restarting the pool")
+        _pool.shutdown(wait=False)
+        _pool = create_process_pool(TRANSCRIPTION_PROCESSES, TORCH_THREADS)
+        raise
+
+def shutdown():
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
@@ -0,0 +1,175 @@
+"""
+Whisper models loaded on first use and kept resident under a memory budget.
+
+Models are loaded by name in a thread, so the service answers requests
+(and liveness checks) while a model loads. Once the resident models exceed
+WHISPER_MEMORY_BUDGET_MB, the least recently used ones that are not in use
+are dropped. Each load gets a new version number, which the worker pool
+uses to tell whether a worker process still holds the current copy.
+
+A model is named by its Whisper size, with ":int8" for a dynamically
+quantized copy (int8 weights in the Linear layers, for CPU inference), so
+"base" and "base:int8" are separate models to the registry, the worker
+pool and the result cache.
+"""
+import asyncio
+import logging
+import os
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import Dict, List
+
+import torch
+import whisper
+
+logger = logging.getLogger(__name__)
+
+WHISPER_MODEL = os.getenv("WHISPER_MODEL", "base")
+# Models requests may ask for; defaults to every model Whisper knows
+WHISPER_MODELS = [
+    name.strip() for name in os.getenv("WHISPER_MODELS", ",".join(whisper.available_models())).split(",")
+    if name.strip()
+]
+WHISPER_MEMORY_BUDGET_MB = int(os.getenv("WHISPER_MEMORY_BUDGET_MB", "2048"))
+WHISPER_DEVICE = os.getenv("WHISPER_DEVICE", "cpu")
+# Default precision: fp32, or int8 for dynamically quantized models
+WHISPER_PRECISION = os.getenv("WHISPER_PRECISION", "fp32")
+PRECISIONS = ("fp32", "int8")
+
+def model_key(name: str, precision: str) -> str:
+    """Registry name for a Whisper model at a precision"""
+    return name if precision == "fp32" else f"{name}:{precision}"
+
+def model_size(model) -> int:
+    """Bytes held by a model's weights, including quantized (packed) ones"""
+    total = 0
+    for value in model.state_dict().values():
+        for tensor in value if isinstance(value, tuple) else (value,):
+            if torch.is_tensor(tensor):
+                total += tensor.numel() * tensor.element_size()
+    return total
+
+def quantize(model):
+    """Quantize a model's Linear layers to int8 weights, in place"""
+    for module in model.modules():
+        if isinstance(module, torch.nn.Linear):
+            # Whisper's Linear subclass only adds a cast for fp16; the
+            # quantizer converts exact nn.Linear modules
+            module.__class__ = torch.nn.Linear
+    return torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8, inplace=True)
+
+class UnknownModelError(ValueError):
+    pass
+
+class ModelEntry:
+    def __init__(self, model, version: int):
+        self.model = model
+        self.version = version
+        self.size = model_size(model)
+        self.in_use = 0
+
+class ModelRegistry:
+    def __init__(self, budget_mb: int = WHISPER_MEMORY_BUDGET_MB, device: str = WHISPER_DEVICE):
+        self.budget = budget_mb * 1024 * 1024
+        self.device = device
+        self.entries: "OrderedDict[str, ModelEntry]" = OrderedDict()
+        self.load_locks: Dict[str, asyncio.Lock] = {}
+        self.versions = 0
+        self.loads = 0
+        self.evictions = 0
+        # Called with each newly loaded model, in the loading thread
+        self.on_load = None
+
+    def validate(self, name: str) -> str:
+        size, _, precision = name.partition(":")
+        if size not in WHISPER_MODELS:
+            raise UnknownModelError(f"Unknown model {size}; available: {', '.join(WHISPER_MODELS)}")
+        if precision and precision not in PRECISIONS:
+            raise UnknownModelError(f"Unknown precision {precision}; available: {', '.join(PRECISIONS)}")
+        if precision == "int8" and self.device != "cpu":
+            raise UnknownModelError("int8 models need WHISPER_DEVICE=cpu")
+        return model_key(size, precision or "fp32")
+
+    def is_loaded(self, name: str) -> bool:
+        return name in self.entries
+
+    async def get(self, name: str) -> ModelEntry:
+        """The resident entry for name, loading it first if needed"""
+        # "base" and "base:fp32" are the same model
+        key = self.validate(name)
+        entry = self.entries.get(key)
+        if entry is None:
+            lock = self.load_locks.setdefault(key, asyncio.Lock())
+            async with lock:
+                entry = self.entries.get(key)
+                if entry is None:
+                    entry = await self._load(key)
+        self.entries.move_to_end(key)
+        return entry
+
+    @asynccontextmanager
+    async def use(self, name: str):
+        """Hold a model for the duration of a call so it cannot be evicted"""
+        entry = await self.get(name)
+        entry.in_use += 1
+        try:
+            yield entry
+        finally:
+            entry.in_use -= 1
+
+    async def _load(self, name: str) -> ModelEntry:
+        logger.info(f"Loading Whisper model {name}")
+        model = await asyncio.to_thread(self._load_model, name)
+        self.versions += 1
+        self.loads += 1
+        entry = ModelEntry(model, self.versions)
+        self._make_room(entry.size)
+        self.entries[name] = entry
+        logger.info(f"Loaded Whisper model {name} ({entry.size / 1024 / 1024:.0f} MB)")
+        return entry
+
+    def _load_model(self, name: str):
+        size, _, precision = name.partition(":")
+        model = whisper.load_model(size, device=self.device)
+        if precision == "int8":
+            model = quantize(model)
+        if self.on_load:
+            self.on_load(model)
+        return model
+
+    def _make_room(self, size: int):
+        for name in list(self.entries):
+            if self.resident_bytes() + size <= self.budget:
+                return
+            if self.entries[name].in_use == 0:
+                logger.info(f"Evicting Whisper model {name}")
+                del self.entries[name]
+                self.evictions += 1
+        if self.resident_bytes() + size > self.budget:
+            logger.warning("Whisper models in use exceed WHISPER_MEMORY_BUDGET_MB")
+
+    def resident_bytes(self) -> int:
+        return sum(entry.size for entry in self.entries.values())
+
+    def resident(self) -> Dict[str, int]:
+        """Versions of the resident models, by name"""
+        return {name: entry.version for name, entry in self.entries.items()}
+
+    async def warm_up(self, names: List[str]):
+        for name in names:
+            try:
+                await self.get(name)
+            except Exception as e:
+                logger.error(f"Warm-up of model {name} failed: {str(e)}")
+
+    def stats(self) -> Dict:
+        return {
+            "default": model_key(WHISPER_MODEL, WHISPER_PRECISION),
+            "loaded": {name: round(entry.size / 1024 / 1024) for name, entry in self.entries.items()},
+            "resident_mb": round(self.resident_bytes() / 1024 / 1024),
+            "budget_mb": round(self.budget / 1024 / 1024),
+            "loads": self.loads,
+            "evictions": self.evictions
+        }
+
+registry = ModelRegistry()
@@ -0,0 +1,180 @@
+"""
+Which queued transcription job a worker takes next.
+
+Jobs have a priority class: "interactive" (the default, e.g. a meeting that
+just ended) or "backfill" (bulk imports and reprocessing). Interactive jobs
+always go first, and each process keeps SCHEDULER_RESERVED_WORKERS of its
+worker loops free of backfill work, so an interactive job waits for a free
+worker rather than behind a bulk import. The reservation is strict: a
+process with no more worker loops than it reserves runs no backfill jobs
+(and logs a warning at startup), leaving them to other replicas. The
+default worker count is one more than the reservation for that reason.
+
+Within a class, workspaces share the workers by start-time fair queuing:
+each (class, workspace) has a virtual time in transcription_fair_share that
+advances by the duration of every recording it starts, divided by the
+workspace's weight (1 unless set on that document). The workspace with the
+lowest virtual time goes next, so one workspace's 500 recordings do not
+delay another's first one, and a workspace that was idle starts at the
+current virtual time rather than with banked credit.
+"""
+import logging
+import os
+import statistics
+from collections import deque
+from datetime import datetime
+from typing import Deque, Dict, List, Optional
+
+from app.models.job import JobService
+
+logger = logging.getLogger(__name__)
+
+PRIORITIES = ("interactive", "backfill")
+TRANSCRIPTION_DEFAULT_PRIORITY = os.getenv("TRANSCRIPTION_DEFAULT_PRIORITY", "interactive")
+# Worker loops per process that only take interactive jobs
+SCHEDULER_RESERVED_WORKERS = int(os.getenv("SCHEDULER_RESERVED_WORKERS", "1"))
+# Cost, in seconds of audio, of a recording whose duration is unknown
+SCHEDULER_DEFAULT_COST = float(os.getenv("SCHEDULER_DEFAULT_COST", "300"))
+
+# Queue waits kept per class for the metrics
+WAIT_WINDOW = 1000
+# Times to pick again when another worker claims the chosen workspace's last job first
+CLAIM_RACE_RETRIES = 3
+
+class UnknownPriorityError(ValueError):
+    pass
+
+def class_filter(priority: str) -> Dict:
+    # Jobs queued before priorities existed count as interactive
+    return {"priority": {"$ne": "backfill"}} if priority == "interactive" else {"priority": priority}
+
+def share_key(priority: str, workspace_id) -> str:
+    return f"{priority}:{workspace_id}"
+
+class Scheduler:
+    def __init__(self, reserved_workers: int = SCHEDULER_RESERVED_WORKERS):
+        self.reserved_workers = reserved_workers
+        # Backfill jobs this process may run at once; set from the worker count at startup
+        self.backfill_slots = 0
+        self.running = {priority: 0 for priority in PRIORITIES}
+        self.claimed = {priority: 0 for priority in PRIORITIES}
+        self.waits: Dict[str, Deque[float]] = {priority: deque(maxlen=WAIT_WINDOW) for priority in PRIORITIES}
+
+    def configure(self, workers: int):
+        self.backfill_slots = max(workers - self.reserved_workers, 0)
+        if workers and not self.backfill_slots:
+            logger.warning(
+                f"All {workers} worker loops are reserved for interactive jobs "
+                f"(SCHEDULER_RESERVED_WORKERS={self.reserved_workers}); this process will not run backfill jobs"
+            )
+
+    def validate(self, priority: str) -> str:
+        if priority not in PRIORITIES:
+            raise UnknownPriorityError(f"Unknown priority {priority}; available: {', '.join(PRIORITIES)}")
+        return priority
+
+    async def claim(
+        self,
+        db,
+        worker_id: str,
+        lease_seconds: int,
+        filters: Optional[Dict] = None,
+        priority: Optional[str] = None
+    ) -> Optional[Dict]:
+        """
+        Lease the next job for worker_id: interactive before backfill (if a
+        backfill slot is free), fairly across workspaces. filters and
+        priority narrow the jobs considered.
+        """
+        classes = [priority] if priority else list(PRIORITIES)
+        for job_class in classes:
+            if job_class == "backfill" and self.running["backfill"] >= self.backfill_slots:
+                continue
+            job = await self._claim_fairly(db, worker_id, lease_seconds, job_class, filters)
+            if job is not None:
+                job_class = job.get("priority", "interactive")
+                self.running[job_class] += 1
+                self.claimed[job_class] += 1
+                if job["attempts"] == 1:
+                    self.waits[job_class].append((datetime.utcnow() - job["created_at"]).total_seconds())
+                return job
+        return None
+
+    def finished(self, job: Dict):
+        """A claimed job is no longer running in this process"""
+        self.running[job.get("priority", "interactive")] -= 1
+
+    async def _claim_fairly(self, db, worker_id: str, lease_seconds: int, priority: str, filters: Optional[Dict]):
+        job_service = JobService(db)
+        for _ in range(CLAIM_RACE_RETRIES):
+            query = {"$and": [job_service.runnable(datetime.utcnow()), class_filter(priority), filters or {}]}
+            workspaces = await db.transcription_jobs.distinct("workspace_id", query)
+            if not workspaces:
+                return None
+
+            shares = {
+                share["workspace_id"]: share
+                async for share in db.transcription_fair_share.find({
+                    "_id": {"$in": [share_key(priority, workspace) for workspace in workspaces]}
+                })
+            }
+            # A workspace starts at its own virtual time, or the class's
+            # (the start of the last job dispatched) if it has fallen behind
+            # by being idle
+            clock = await db.transcription_fair_share.find_one({"_id": share_key(priority, "clock")})
+            system_time = clock["virtual_time"] if clock else 0.0
+            starts = {
+                workspace: max(shares[workspace]["virtual_time"], system_time) if workspace in shares else system_time
+                for workspace in workspaces
+            }
+            workspace = min(workspaces, key=lambda w: starts[w])
+
+            job = await job_service.claim(
+                worker_id,
+                lease_seconds,
+                {"$and": [class_filter(priority), {"workspace_id": workspace}, filters or {}]}
+            )
+            if job is None:
+                continue
+            weight = shares.get(workspace, {}).get("weight") or 1.0
+            await self._charge(db, priority, workspace, starts[workspace], (job.get("duration") or SCHEDULER_DEFAULT_COST) / weight)
+            return job
+        return None
+
+    async def _charge(self, db, priority: str, workspace_id, start: float, cost: float):
+        await db.transcription_fair_share.update_one(
+            {"_id": share_key(priority, "clock")},
+            {"$max": {"virtual_time": start}, "$setOnInsert": {"priority": priority}},
+            upsert=True
+        )
+        key = share_key(priority, workspace_id)
+        # Two updates so concurrent charges to one workspace both count
+        await db.transcription_fair_share.update_one(
+            {"_id": key},
+            {
+                "$max": {"virtual_time": start},
+                "$setOnInsert": {"priority": priority, "workspace_id": workspace_id}
+            },
+            upsert=True
+        )
+        await db.transcription_fair_share.update_one(
+            {"_id": key},
+            {"$inc": {"virtual_time": cost}, "$set": {"updated_at": datetime.utcnow()}}
+        )
+
+    async def get_stats(self, db) -> Dict:
+        stats = {}
+        for priority in PRIORITIES:
+            waits: List[float] = sorted(self.waits[priority])
+            stats[priority] = {
+                "pending": await db.transcription_jobs.count_documents({"status": "pending", **class_filter(priority)}),
+                "running": self.running[priority],
+                "claimed": self.claimed[priority],
+                "wait_p50": statistics.median(waits) if waits else None,
+                "wait_p95": waits[int(len(waits) * 0.95)] if waits else None,
+                "wait_max": waits[-1] if waits else None
+            }
+        stats["backfill_slots"] = self.backfill_slots
+        return stats
+
+scheduler = Scheduler()
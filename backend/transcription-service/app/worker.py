@@ -0,0 +1,213 @@
+"""
+Transcription queue workers.
+
+Each worker loop claims a job from transcription_jobs, keeps its lease alive
+with heartbeats while the recording is transcribed, writes the result to the
+job's transcription document and marks the job completed. Failures are
+retried with exponential backoff up to the job's max_attempts.
+"""
+import asyncio
+import logging
+import math
+import os
+import socket
+from datetime import datetime
+from typing import Awaitable, Callable, Dict, List
+
+from bson import ObjectId
+from shared.database import Database
+from app.models.job import JobService
+from app.models.transcription import TranscriptionService
+from app.cache import recording_cache_key, transcription_cache
+from app.batching import BATCH_MAX_SECONDS, TRANSCRIPTION_BATCH_SIZE, is_batchable
+from app.scheduler import scheduler
+from app.registry import WHISPER_MODEL
+
+logger = logging.getLogger(__name__)
+
+JOB_LEASE_SECONDS = int(os.getenv("JOB_LEASE_SECONDS", "60"))
+JOB_HEARTBEAT_INTERVAL = int(os.getenv("JOB_HEARTBEAT_INTERVAL", "20"))
+JOB_POLL_INTERVAL = float(os.getenv("JOB_POLL_INTERVAL", "2.0"))
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+JOB_RETRY_BASE_DELAY = float(os.getenv("JOB_RETRY_BASE_DELAY", "30.0"))
+JOB_RETRY_MAX_DELAY = float(os.getenv("JOB_RETRY_MAX_DELAY", "900.0"))
+
+# Identifies this process in job leases
+WORKER_ID = f"{socket.gethostname()}-{os.getpid()}"
+
+class PermanentJobError(Exception):
+    """A failure that retrying cannot fix"""
+
+def retry_delay(attempts: int) -> float:
+    return min(JOB_RETRY_BASE_DELAY * 2 ** (attempts - 1), JOB_RETRY_MAX_DELAY)
+
+def format_segment(segment: Dict) -> Dict:
+    """A Whisper segment as a TranscriptionSegment"""
+    return {"start": float(segment["start"]), "end": float(segment["end"]), "text": segment["text"].strip()}
+
+def transcription_fields(result: Dict) -> Dict:
+    """Map a Whisper result onto TranscriptionModel fields"""
+    segments = result.get("segments") or []
+    log_probs = [s["avg_logprob"] for s in segments if s.get("avg_logprob") is not None]
+    return {
+        "text": result["text"].strip(),
+        "language": result.get("language"),
+        "confidence": math.exp(sum(log_probs) / len(log_probs)) if log_probs else None,
+        "segments": [format_segment(s) for s in segments],
+        "progress": 100.0
+    }
+
+async def keep_lease(job_service: JobService, job_id: ObjectId, worker_id: str):
+    while True:
+        await asyncio.sleep(JOB_HEARTBEAT_INTERVAL)
+        if not await job_service.heartbeat(job_id, worker_id, JOB_LEASE_SECONDS):
+            logger.warning(f"Worker {worker_id} lost the lease on job {job_id}")
+            return
+
+async def set_recording_status(db, recording_id: ObjectId, status: str):
+    await db.recordings.update_one(
+        {"_id": recording_id},
+        {"$set": {"status": status, "updated_at": datetime.utcnow()}}
+    )
+
+async def process_job(db, job: Dict, worker_id: str, transcribe: Callable[..., Awaitable[Dict]]):
+    job_service = JobService(db)
+    transcription_service = TranscriptionService(db)
+    job_id = job["_id"]
+    transcription_id = str(job["transcription_id"])
+
+    if job["attempts"] > job["max_attempts"]:
+        # Reclaimed after its workers kept dying mid-job
+        error = f"Gave up after {job['max_attempts']} attempts"
+        await job_service.fail(job_id, worker_id, error)
+        await transcription_service.update_transcription(transcription_id, {"status": "error"})
+        await set_recording_status(db, job["recording_id"], "error")
+        return
+
+    model_name = job.get("model", WHISPER_MODEL)
+    recording = await db.recordings.find_one({"_id": job["recording_id"]})
+    cache_key = recording_cache_key(recording, model_name) if recording else None
+    cached = await transcription_cache.get(db, cache_key) if cache_key else None
+    if cached is not None:
+        # Same audio transcribed earlier (a duplicate upload or a reprocess)
+        logger.info(f"Job {job_id} served from the transcription cache")
+        await finish_job(db, job, worker_id, {**cached, "attempt": job["attempts"]})
+        return
+
+    logger.info(f"Worker {worker_id} processing job {job_id} (attempt {job['attempts']})")
+    # A retried job starts its segments over
+    await transcription_service.update_transcription(
+        transcription_id,
+        {"status": "processing", "segments": [], "progress": 0.0, "attempt": job["attempts"]}
+    )
+    await set_recording_status(db, job["recording_id"], "processing")
+
+    async def publish(segments: List[Dict], progress: float):
+        await transcription_service.append_segments(
+            transcription_id,
+            [format_segment(s) for s in segments],
+            progress
+        )
+
+    heartbeat = asyncio.create_task(keep_lease(job_service, job_id, worker_id))
+    try:
+        if not recording:
+            raise PermanentJobError("Recording not found")
+        result = await transcribe(recording, model_name, publish)
+    except asyncio.CancelledError:
+        await job_service.release(job_id, worker_id)
+        await transcription_service.update_transcription(transcription_id, {"status": "pending"})
+        raise
+    except Exception as e:
+        error = str(e) or type(e).__name__
+        if isinstance(e, PermanentJobError) or job["attempts"] >= job["max_attempts"]:
+            logger.error(f"Job {job_id} failed: {error}")
+            await job_service.fail(job_id, worker_id, error)
+            await transcription_service.update_transcription(transcription_id, {"status": "error"})
+            await set_recording_status(db, job["recording_id"], "error")
+        else:
+            delay = retry_delay(job["attempts"])
+            logger.warning(f"Job {job_id} failed, retrying in {delay:.0f}s: {error}")
+            await job_service.retry(job_id, worker_id, error, delay)
+            await transcription_service.update_transcription(transcription_id, {"status": "pending"})
+        return
+    finally:
+        heartbeat.cancel()
+
+    fields = transcription_fields(result)
+    if cache_key:
+        try:
+            await transcription_cache.put(db, cache_key, recording, model_name, fields)
+        except Exception as e:
+            logger.warning(f"Could not cache the transcription of job {job_id}: {str(e)}")
+    await finish_job(db, job, worker_id, fields)
+
+async def finish_job(db, job: Dict, worker_id: str, fields: Dict):
+    """
+    Store the transcription and mark the job and its recording completed.
+    Nothing is written if a later attempt has taken the job over.
+    """
+    stored = await TranscriptionService(db).update_for_attempt(
+        str(job["transcription_id"]),
+        job["attempts"],
+        {**fields, "status": "completed"}
+    )
+    if not stored:
+        logger.warning(f"Job {job['_id']} was taken over by a later attempt, discarding attempt {job['attempts']}")
+        return
+    if not await JobService(db).complete(job["_id"], worker_id):
+        logger.warning(f"Job {job['_id']} finished after its lease was lost")
+        return
+    await set_recording_status(db, job["recording_id"], "completed")
+    logger.info(f"Job {job['_id']} completed")
+
+async def claim_short_jobs(db, jobs: List[Dict], worker_id: str):
+    """
+    Add to jobs other pending short jobs of the same class for the same
+    model as the first, so they can be transcribed in one batch
+    """
+    job = jobs[0]
+    while len(jobs) < TRANSCRIPTION_BATCH_SIZE:
+        other = await scheduler.claim(
+            db,
+            worker_id,
+            JOB_LEASE_SECONDS,
+            {"model": job.get("model", WHISPER_MODEL), "duration": {"$gt": 0, "$lte": BATCH_MAX_SECONDS}},
+            job.get("priority", "interactive")
+        )
+        if other is None:
+            break
+        jobs.append(other)
+
+async def run_worker(worker_id: str, transcribe: Callable[..., Awaitable[Dict]]):
+    """Claim and process jobs, in the scheduler's order, until cancelled"""
+    logger.info(f"Transcription worker {worker_id} started")
+    while True:
+        try:
+            db = await Database.get_db()
+            job = await scheduler.claim(db, worker_id, JOB_LEASE_SECONDS)
+            if job is None:
+                await asyncio.sleep(JOB_POLL_INTERVAL)
+                continue
+            jobs = [job]
+            try:
+                if not is_batchable(job.get("duration") or 0):
+                    await process_job(db, job, worker_id, transcribe)
+                    continue
+
+                await claim_short_jobs(db, jobs, worker_id)
+                outcomes = await asyncio.gather(
+                    *(process_job(db, claimed, worker_id, transcribe) for claimed in jobs),
+                    return_exceptions=True
+                )
+                for claimed, outcome in zip(jobs, outcomes):
+                    if isinstance(outcome, Exception):
+                        logger.error(f"Worker {worker_id} error on job {claimed['_id']}: {str(outcome)}")
+            finally:
+                for claimed in jobs:
+                    scheduler.finished(claimed)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Worker {worker_id} error: {str(e)}")
+            await asyncio.sleep(JOB_POLL_INTERVAL)
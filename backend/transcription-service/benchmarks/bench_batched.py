@@ -0,0 +1,66 @@
+"""
+Compare batched transcription of short clips (one encoder pass and one
+greedy decode per batch, as TRANSCRIPTION_BATCH_SIZE does) with one
+model.transcribe call per clip: clips per hour, speedup, and word error
+rate against the per-clip transcripts.
+
+    python benchmarks/bench_batched.py --audio notes/*.m4a --batch-sizes 1 4 8 16
+
+Clips longer than one Whisper window (30s) are skipped. Audio is decoded
+up front, so neither side is timed decoding it. Runs in this process with
+TORCH_THREADS threads (torch's default if 0), like the thread executor.
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import torch
+import whisper
+from whisper.audio import SAMPLE_RATE, load_audio
+
+from app import pool
+from bench_chunked import word_error_rate, words
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--audio", nargs="+", required=True, help="Short recordings to transcribe")
+    parser.add_argument("--batch-sizes", nargs="+", type=int, default=[1, 4, 8, 16])
+    parser.add_argument("--model", default="base")
+    args = parser.parse_args()
+
+    if pool.TORCH_THREADS:
+        torch.set_num_threads(pool.TORCH_THREADS)
+    clips = [load_audio(path) for path in args.audio]
+    clips = [clip for clip in clips if len(clip) <= pool.BATCH_WINDOW_SECONDS * SAMPLE_RATE]
+    if not clips:
+        sys.exit("No clips of 30 seconds or less")
+    model = whisper.load_model(args.model)
+    seconds = sum(len(clip) for clip in clips) / SAMPLE_RATE
+    print(f"{len(clips)} clips, {seconds:.0f}s of audio, model {args.model}, {torch.get_num_threads()} torch threads")
+
+    # Warm up kernels so neither side is timed initialising them
+    model.transcribe(clips[0])
+
+    start = time.perf_counter()
+    reference = [model.transcribe(clip)["text"] for clip in clips]
+    per_clip = time.perf_counter() - start
+    print(f"{'batch size':>10} {'clips/h':>9} {'wall (s)':>9} {'speedup':>8} {'WER':>6}")
+    print(f"{'per clip':>10} {len(clips) / per_clip * 3600:>9.0f} {per_clip:>9.1f} {1:>7.2f}x {0:>6.1%}")
+
+    for batch_size in args.batch_sizes:
+        start = time.perf_counter()
+        results = []
+        for i in range(0, len(clips), batch_size):
+            results.extend(pool._transcribe_batch(model, clips[i:i + batch_size]))
+        elapsed = time.perf_counter() - start
+        error = word_error_rate(
+            words(" ".join(reference)),
+            words(" ".join(result["text"] for result in results))
+        )
+        print(f"{batch_size:>10} {len(clips) / elapsed * 3600:>9.0f} {elapsed:>9.1f} {per_clip / elapsed:>7.2f}x {error:>6.1%}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+Compare chunked parallel transcription with one sequential model.transcribe
+call on long recordings: wall time, speedup, and how far the chunked text
+drifts from the sequential one, overall and in the words around each seam.
+
+    python benchmarks/bench_chunked.py --audio meeting.m4a --processes 1 2 4 8
+
+The sequential transcript is the reference, so the word error rates measure
+what chunking changes rather than absolute accuracy.
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from whisper.audio import SAMPLE_RATE, load_audio
+
+from app import chunking, pool
+from app.registry import registry
+
+# Words within this many seconds of a seam count as seam words
+SEAM_WINDOW = 5.0
+
+def words(text: str):
+    return [w.strip(".,!?;:\"'").lower() for w in text.split() if w.strip(".,!?;:\"'")]
+
+def word_error_rate(reference, hypothesis) -> float:
+    if not reference:
+        return 0.0 if not hypothesis else 1.0
+    previous = list(range(len(hypothesis) + 1))
+    for i, ref_word in enumerate(reference, 1):
+        current = [i] + [0] * len(hypothesis)
+        for j, hyp_word in enumerate(hypothesis, 1):
+            current[j] = min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (ref_word != hyp_word)
+            )
+        previous = current
+    return previous[-1] / len(reference)
+
+def text_near(segments, seams, window: float) -> str:
+    return " ".join(
+        segment["text"] for segment in segments
+        if any(segment["start"] - window <= seam <= segment["end"] + window for seam in seams)
+    )
+
+async def transcribe_chunked(audio, model_name: str):
+    chunks = chunking.split_audio(audio)
+    language = await pool.detect_language(chunks[0][1], model_name)
+    results = await asyncio.gather(*(
+        pool.transcribe(samples, model_name, language=language)
+        for _, samples in chunks
+    ))
+    seams = [offset for offset, _ in chunks[1:]]
+    return chunking.stitch([(offset, result) for (offset, _), result in zip(chunks, results)], language), seams
+
+async def benchmark(args, executors):
+    audio = {path: load_audio(path) for path in args.audio}
+    entry = await registry.get(args.model)
+
+    chunked = {}
+    for processes, executor in executors.items():
+        pool._pool = executor
+        for path, samples in audio.items():
+            start = time.perf_counter()
+            result, seams = await transcribe_chunked(samples, args.model)
+            chunked[path, processes] = (result, seams, time.perf_counter() - start)
+
+    # Sequential reference runs last, in this process
+    for path, samples in audio.items():
+        start = time.perf_counter()
+        reference = entry.model.transcribe(samples)
+        sequential = time.perf_counter() - start
+        print(f"\n{path}: {len(samples) / SAMPLE_RATE:.0f}s audio, sequential {sequential:.1f}s")
+        print(f"{'processes':>9} {'wall (s)':>9} {'speedup':>8} {'WER':>6} {'seam WER':>9} {'chunks':>7}")
+
+        for processes in executors:
+            result, seams, elapsed = chunked[path, processes]
+            overall = word_error_rate(words(reference["text"]), words(result["text"]))
+            seam = word_error_rate(
+                words(text_near(reference["segments"], seams, SEAM_WINDOW)),
+                words(text_near(result["segments"], seams, SEAM_WINDOW))
+            )
+            print(f"{processes:>9} {elapsed:>9.1f} {sequential / elapsed:>7.2f}x {overall:>6.1%} {seam:>9.1%} {len(seams) + 1:>7}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--audio", nargs="+", required=True, help="Long recordings to transcribe")
+    parser.add_argument("--processes", nargs="+", type=int, default=[1, 2, 4, 8])
+    parser.add_argument("--threads", type=int, default=1, help="torch threads per worker process")
+    parser.add_argument("--model", default="base")
+    args = parser.parse_args()
+
+    # Fork every pool before loading the model or running inference in this
+    # process: forking after torch has started threads can hang the workers
+    executors = {processes: pool.create_process_pool(processes, args.threads) for processes in args.processes}
+    try:
+        asyncio.run(benchmark(args, executors))
+    finally:
+        for executor in executors.values():
+            executor.shutdown()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Compare a Whisper model with its int8 dynamically quantized copy (what
+WHISPER_PRECISION=int8 or ?precision=int8 loads): transcription time,
+speedup, weight memory, and word error rate.
+
+    python benchmarks/bench_quantization.py --audio a.m4a b.m4a --model base
+
+WER is measured against a reference transcript in a .txt file next to each
+recording (a.m4a -> a.txt) when there is one, and always against the fp32
+transcript, which shows what quantization alone changes. Audio is decoded
+up front, so decoding is not timed.
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import torch
+import whisper
+from whisper.audio import SAMPLE_RATE, load_audio
+
+from app.registry import model_size, quantize
+from bench_chunked import word_error_rate, words
+
+def reference_for(path: str):
+    text_path = os.path.splitext(path)[0] + ".txt"
+    if os.path.exists(text_path):
+        with open(text_path) as f:
+            return f.read()
+    return None
+
+def run(model, audio):
+    model.transcribe(audio[0])
+    start = time.perf_counter()
+    texts = [model.transcribe(samples)["text"] for samples in audio]
+    return texts, time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--audio", nargs="+", required=True, help="Recordings to transcribe")
+    parser.add_argument("--model", default="base")
+    parser.add_argument("--threads", type=int, default=0, help="torch threads (0 keeps torch's default)")
+    args = parser.parse_args()
+
+    if args.threads:
+        torch.set_num_threads(args.threads)
+    audio = [load_audio(path) for path in args.audio]
+    references = [reference_for(path) for path in args.audio]
+    seconds = sum(len(samples) for samples in audio) / SAMPLE_RATE
+    print(f"model {args.model}, {len(audio)} recordings, {seconds:.0f}s of audio, {torch.get_num_threads()} torch threads")
+
+    model = whisper.load_model(args.model, device="cpu")
+    fp32_size = model_size(model)
+    fp32_texts, fp32_time = run(model, audio)
+
+    model = quantize(model)
+    int8_size = model_size(model)
+    int8_texts, int8_time = run(model, audio)
+
+    def error(reference_texts, texts):
+        pairs = [(ref, text) for ref, text in zip(reference_texts, texts) if ref is not None]
+        if not pairs:
+            return None
+        return word_error_rate(words(" ".join(ref for ref, _ in pairs)), words(" ".join(text for _, text in pairs)))
+
+    print(f"{'precision':>9} {'wall (s)':>9} {'x realtime':>10} {'speedup':>8} {'weights (MB)':>12} {'WER vs fp32':>12} {'WER vs ref':>11}")
+    for precision, texts, elapsed, size in (
+        ("fp32", fp32_texts, fp32_time, fp32_size),
+        ("int8", int8_texts, int8_time, int8_size)
+    ):
+        versus_reference = error(references, texts)
+        print(
+            f"{precision:>9} {elapsed:>9.1f} {seconds / elapsed:>10.1f} {fp32_time / elapsed:>7.2f}x "
+            f"{size / 1024 / 1024:>12.0f} {error(fp32_texts, texts):>12.1%} "
+            f"{'-' if versus_reference is None else f'{versus_reference:.1%}':>11}"
+        )
+    print(f"int8 weights are {1 - int8_size / fp32_size:.0%} smaller")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Measure transcription throughput (recordings per hour) for combinations of
+worker processes and torch threads per process, using the same forked,
+shared-weight pool as TRANSCRIPTION_EXECUTOR=process. Also reports the
+proportional memory (PSS) of the workers, which stays close to one copy of
+the weights when sharing works.
+
+Run on the target box with a handful of representative recordings:
+
+    python benchmarks/bench_worker_pool.py --audio a.m4a b.m4a c.m4a \\
+        --processes 1 2 4 8 --threads 1 2 4 --model base
+
+Combinations using more processes x threads than available cores are
+skipped unless --oversubscribe is given.
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import torch
+
+from app import pool
+from app.registry import registry
+
+def pss_mb(pid: int) -> float:
+    """Proportional set size: shared pages are split between the processes mapping them"""
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            for line in f:
+                if line.startswith("Pss:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return float("nan")
+
+def transcribe_with_threads(model, audio: str, threads: int):
+    torch.set_num_threads(threads)
+    return model.transcribe(audio)
+
+async def run(executor, model_name: str, audio, processes: int, threads: int, rounds: int):
+    pool._pool = executor
+    # Warm up each worker so sharing the model and kernel initialisation are not timed
+    await asyncio.gather(*(
+        pool.run_with_model(model_name, transcribe_with_threads, audio[0], threads)
+        for _ in range(processes)
+    ))
+
+    jobs = [path for _ in range(rounds) for path in audio]
+    start = time.perf_counter()
+    await asyncio.gather(*(
+        pool.run_with_model(model_name, transcribe_with_threads, path, threads)
+        for path in jobs
+    ))
+    elapsed = time.perf_counter() - start
+
+    worker_pss = sum(pss_mb(pid) for pid in executor._processes)
+    return len(jobs) / elapsed * 3600, elapsed, worker_pss
+
+async def benchmark(args, executors):
+    cores = os.cpu_count() or 1
+    await registry.get(args.model)
+    print(f"{cores} cores, model {args.model}, {len(args.audio)} recordings x {args.rounds} rounds")
+    print(f"parent PSS {pss_mb(os.getpid()):.0f} MB")
+    print(f"{'processes':>9} {'threads':>7} {'recordings/h':>13} {'wall (s)':>9} {'workers PSS (MB)':>17}")
+
+    for processes, executor in executors.items():
+        for threads in args.threads:
+            if processes * threads > cores and not args.oversubscribe:
+                continue
+            per_hour, elapsed, worker_pss = await run(executor, args.model, args.audio, processes, threads, args.rounds)
+            print(f"{processes:>9} {threads:>7} {per_hour:>13.1f} {elapsed:>9.1f} {worker_pss:>17.0f}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--audio", nargs="+", required=True, help="Recordings to transcribe")
+    parser.add_argument("--processes", nargs="+", type=int, default=[1, 2, 4, 8])
+    parser.add_argument("--threads", nargs="+", type=int, default=[1, 2, 4])
+    parser.add_argument("--rounds", type=int, default=2, help="Times to transcribe the set per combination")
+    parser.add_argument("--model", default="base")
+    parser.add_argument("--oversubscribe", action="store_true")
+    args = parser.parse_args()
+
+    # Fork every pool up front, before loading the model starts any threads
+    executors = {processes: pool.create_process_pool(processes, 0) for processes in args.processes}
+    try:
+        asyncio.run(benchmark(args, executors))
+    finally:
+        for executor in executors.values():
+            executor.shutdown()
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,26 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Header, Request
 from fastapi.middleware.cors import CORSMiddleware
-import whisper
-from typing import Dict
+from fastapi.responses import StreamingResponse
+import asyncio
+import numpy as np
+from typing import Awaitable, Callable, Dict, List, Optional
 from shared.database import Database
+from shared.storage import get_storage
+from app.models.job import TranscriptionJobModel, JobService
+from app.models.transcription import TranscriptionModel, TranscriptionService
+from app import pool
+from app.registry import WHISPER_MODEL, WHISPER_PRECISION, UnknownModelError, model_key, registry
+from app.chunking import transcribe_incrementally
+from app.cache import recording_cache_key, transcription_cache
+from app.pcm import pcm_cache
+from app.batching import batcher
+from app.scheduler import SCHEDULER_RESERVED_WORKERS, TRANSCRIPTION_DEFAULT_PRIORITY, UnknownPriorityError, scheduler
+from app.worker import JOB_MAX_ATTEMPTS, WORKER_ID, run_worker
+from bson import ObjectId
+from datetime import datetime
+import json
 import logging
+import os
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -19,39 +36,318 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Number of queue workers in this process; 0 makes it an enqueue-only API.
+# With the process executor, one per worker process keeps every process busy.
+# The default leaves at least one worker free for backfill jobs.
+TRANSCRIPTION_WORKERS = int(os.getenv(
+    "TRANSCRIPTION_WORKERS",
+    str(max(
+        pool.TRANSCRIPTION_PROCESSES if pool.TRANSCRIPTION_EXECUTOR == "process" else 1,
+        SCHEDULER_RESERVED_WORKERS + 1
+    ))
+))
+
+# Server-sent event streams of transcription progress
+STREAM_POLL_INTERVAL = float(os.getenv("STREAM_POLL_INTERVAL", "1.0"))
+STREAM_KEEPALIVE_INTERVAL = float(os.getenv("STREAM_KEEPALIVE_INTERVAL", "15.0"))
+
+# Models loaded in the background at startup; empty loads only on first use
+WHISPER_WARMUP = [
+    name.strip()
+    for name in os.getenv("WHISPER_WARMUP", model_key(WHISPER_MODEL, WHISPER_PRECISION)).split(",")
+    if name.strip()
+]
+# Also run a second of silence through each warm-up model
+WHISPER_WARMUP_INFERENCE = os.getenv("WHISPER_WARMUP_INFERENCE", "false").lower() == "true"
+
+async def warm_up():
+    await registry.warm_up(WHISPER_WARMUP)
+    if WHISPER_WARMUP_INFERENCE:
+        for name in WHISPER_WARMUP:
+            try:
+                await pool.transcribe(np.zeros(16000, dtype=np.float32), name)
+            except Exception as e:
+                logger.error(f"Warm-up inference on model {name} failed: {str(e)}")
+    logger.info("Warm-up finished")
+
 @app.on_event("startup")
 async def startup_db_client():
     await Database.connect_db()
+    scheduler.configure(TRANSCRIPTION_WORKERS)
+    app.state.warm_up = asyncio.create_task(warm_up())
+    app.state.cache_trim = asyncio.create_task(transcription_cache.trim_periodically(await Database.get_db()))
+    app.state.pcm_trim = asyncio.create_task(pcm_cache.trim_periodically())
+    app.state.workers = [
+        asyncio.create_task(run_worker(f"{WORKER_ID}-{i}", transcribe_recording))
+        for i in range(TRANSCRIPTION_WORKERS)
+    ]
 
 @app.on_event("shutdown")
 async def shutdown_db_client():
+    app.state.warm_up.cancel()
+    app.state.cache_trim.cancel()
+    app.state.pcm_trim.cancel()
+    for worker in app.state.workers:
+        worker.cancel()
+    await asyncio.gather(*app.state.workers, return_exceptions=True)
+    pool.shutdown()
+    await get_storage().close()
     await Database.close_db()
 
-# Load Whisper model at startup
-model = whisper.load_model("base")
+# Fork the worker pool (if configured) now, while this process has no other threads.
+# Models are loaded later, by the registry.
+pool.start()
+
+async def transcribe_recording(
+    recording: Dict,
+    model_name: str,
+    publish: Callable[[List[Dict], float], Awaitable[None]]
+) -> Dict:
+    """Run Whisper on a recording off the event loop, publishing segments as they come"""
+    pcm_path = await pcm_cache.ensure(recording)
+    return await transcribe_incrementally(pcm_path, model_name, publish)
+
+def job_response(job: Dict) -> Dict:
+    return {
+        "job_id": str(job["_id"]),
+        "recording_id": str(job["recording_id"]),
+        "transcription_id": str(job["transcription_id"]),
+        "status": job["status"],
+        "model": job.get("model", WHISPER_MODEL),
+        "priority": job.get("priority", "interactive"),
+        "attempts": job["attempts"],
+        "error": job.get("last_error")
+    }
 
-@app.post("/transcribe/{recording_id}")
-async def transcribe_audio(recording_id: str) -> Dict:
+@app.post("/transcribe/{recording_id}", status_code=202)
+async def transcribe_audio(
+    recording_id: str,
+    model: Optional[str] = None,
+    precision: Optional[str] = None,
+    priority: Optional[str] = None
+) -> Dict:
+    """
+    Queue a recording for transcription with the given Whisper model,
+    precision (fp32 or int8) and priority class (interactive or backfill),
+    the defaults for any omitted, and return the job right away. A
+    recording that is already queued or being transcribed returns its
+    existing job. Audio already transcribed with the same model and options
+    is answered from the cache with a completed job and its transcription.
+    """
     try:
-        # TODO: Get audio file path from recording ID
-        audio_path = f"storage/{recording_id}.m4a"
-        
-        # Transcribe audio
-        result = model.transcribe(audio_path)
-        
+        if not ObjectId.is_valid(recording_id):
+            raise HTTPException(status_code=422, detail="Invalid recording_id format")
+        model_name = registry.validate(model_key(model or WHISPER_MODEL, precision or WHISPER_PRECISION))
+        priority = scheduler.validate(priority or TRANSCRIPTION_DEFAULT_PRIORITY)
+
+        db = await Database.get_db()
+        recording = await db.recordings.find_one(
+            {"_id": ObjectId(recording_id)},
+            {"sha256": 1, "duration": 1, "workspace_id": 1}
+        )
+        if not recording:
+            raise HTTPException(status_code=404, detail="Recording not found")
+
+        job_service = JobService(db)
+        job = await job_service.get_active_job(recording_id)
+        if job:
+            return job_response(job)
+
+        transcription_service = TranscriptionService(db)
+        cache_key = recording_cache_key(recording, model_name)
+        cached = await transcription_cache.get(db, cache_key) if cache_key else None
+        if cached is not None:
+            return await complete_from_cache(db, recording_id, model_name, cached)
+
+        transcription_id = await transcription_service.create_transcription(
+            TranscriptionModel(recording_id=ObjectId(recording_id), model=model_name)
+        )
+        job = TranscriptionJobModel(
+            recording_id=ObjectId(recording_id),
+            transcription_id=ObjectId(transcription_id),
+            model=model_name,
+            duration=recording.get("duration") or None,
+            priority=priority,
+            workspace_id=recording.get("workspace_id"),
+            max_attempts=JOB_MAX_ATTEMPTS
+        )
+        job_id = await job_service.enqueue(job)
+        if job_id is None:
+            # Lost a race with a concurrent request for the same recording,
+            # whose job may already have finished
+            await db.transcriptions.delete_one({"_id": ObjectId(transcription_id)})
+            winner = await job_service.get_active_job(recording_id) or await job_service.get_latest_job(recording_id)
+            return job_response(winner)
+
+        logger.info(f"Queued transcription job {job_id} for recording {recording_id}")
+        return job_response({**job.dict(), "_id": job_id})
+    except HTTPException:
+        raise
+    except (UnknownModelError, UnknownPriorityError) as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+async def complete_from_cache(db, recording_id: str, model_name: str, fields: Dict) -> Dict:
+    """Record a cached transcription as a finished job, so /status and the event stream see it"""
+    transcription_id = await TranscriptionService(db).create_transcription(
+        TranscriptionModel(recording_id=ObjectId(recording_id), model=model_name, **fields, status="completed")
+    )
+    job = TranscriptionJobModel(
+        recording_id=ObjectId(recording_id),
+        transcription_id=ObjectId(transcription_id),
+        model=model_name,
+        status="completed",
+        active=False,
+        max_attempts=JOB_MAX_ATTEMPTS
+    )
+    job_id = await JobService(db).enqueue(job)
+    await db.recordings.update_one(
+        {"_id": ObjectId(recording_id)},
+        {"$set": {"status": "completed", "updated_at": datetime.utcnow()}}
+    )
+    logger.info(f"Transcription of recording {recording_id} served from the cache")
+    return with_transcript(job_response({**job.dict(), "_id": job_id}), fields)
+
+def with_transcript(response: Dict, transcription: Dict) -> Dict:
+    response.update(
+        text=transcription.get("text"),
+        language=transcription.get("language"),
+        confidence=transcription.get("confidence"),
+        segments=transcription.get("segments", [])
+    )
+    return response
+
+@app.get("/status/{job_id}")
+async def get_job_status(job_id: str) -> Dict:
+    """
+    Current state of a transcription job, with the transcription once it
+    has completed
+    """
+    db = await Database.get_db()
+    job = await JobService(db).get_job(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    response = job_response(job)
+    if job["status"] == "completed":
+        transcription = await TranscriptionService(db).get_transcription(str(job["transcription_id"]))
+        if transcription:
+            with_transcript(response, transcription)
+    return response
+
+def sse_event(event: str, data, event_id: Optional[str] = None) -> str:
+    lines = [f"event: {event}"]
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"data: {json.dumps(data)}")
+    return "\n".join(lines) + "\n\n"
+
+async def transcription_events(request: Request, transcription_id: str, attempt: Optional[int], sent: int):
+    """
+    Yield SSE events for a transcription until it completes or fails:
+    "segments" with each new batch, "progress" as it advances, "reset" if a
+    retry restarts it, then "completed" or "error". Event ids are
+    "{attempt}-{segments sent}", so a reconnecting client resumes from its
+    Last-Event-ID.
+    """
+    transcription_service = TranscriptionService(await Database.get_db())
+    progress = None
+    idle = 0.0
+    while not await request.is_disconnected():
+        transcription = await transcription_service.get_new_segments(transcription_id, sent)
+        if transcription is None:
+            yield sse_event("error", {"detail": "Transcription not found"})
+            return
+
+        if attempt is not None and transcription.get("attempt", 0) != attempt:
+            sent = 0
+            yield sse_event("reset", {"attempt": transcription.get("attempt", 0)}, f"{transcription.get('attempt', 0)}-0")
+            transcription = await transcription_service.get_new_segments(transcription_id, 0)
+        attempt = transcription.get("attempt", 0)
+
+        segments = transcription.get("segments", [])
+        if segments:
+            sent += len(segments)
+            idle = 0.0
+            yield sse_event("segments", segments, f"{attempt}-{sent}")
+        if transcription.get("progress") != progress:
+            progress = transcription.get("progress")
+            idle = 0.0
+            yield sse_event("progress", {"progress": progress, "status": transcription["status"]})
+
+        if transcription["status"] == "completed":
+            yield sse_event("completed", {"text": transcription.get("text"), "language": transcription.get("language")})
+            return
+        if transcription["status"] == "error":
+            yield sse_event("error", {"detail": "Transcription failed"})
+            return
+
+        await asyncio.sleep(STREAM_POLL_INTERVAL)
+        idle += STREAM_POLL_INTERVAL
+        if idle >= STREAM_KEEPALIVE_INTERVAL:
+            # Comment line keeps proxies from timing out a quiet stream
+            idle = 0.0
+            yield ": keep-alive\n\n"
+
+@app.get("/transcriptions/{transcription_id}/events")
+async def stream_transcription(
+    request: Request,
+    transcription_id: str,
+    last_event_id: Optional[str] = Header(None)
+):
+    """
+    Stream a transcription's segments and progress as server-sent events
+    while it is being transcribed
+    """
+    if not ObjectId.is_valid(transcription_id):
+        raise HTTPException(status_code=422, detail="Invalid transcription_id format")
+    db = await Database.get_db()
+    if not await db.transcriptions.find_one({"_id": ObjectId(transcription_id)}, {"_id": 1}):
+        raise HTTPException(status_code=404, detail="Transcription not found")
+
+    attempt, sent = None, 0
+    if last_event_id:
+        try:
+            attempt, sent = (int(part) for part in last_event_id.split("-"))
+        except ValueError:
+            pass
+    return StreamingResponse(
+        transcription_events(request, transcription_id, attempt, sent),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.get("/metrics")
+async def get_metrics():
+    """
+    Transcription and PCM cache counters and sizes, batching, queue waits
+    per priority class, and resident models
+    """
+    try:
+        db = await Database.get_db()
         return {
-            "recording_id": recording_id,
-            "text": result["text"],
-            "language": result["language"],
-            "status": "completed"
+            "cache": await transcription_cache.get_stats(db),
+            "pcm": pcm_cache.stats(),
+            "batching": batcher.stats(),
+            "scheduler": await scheduler.get_stats(db),
+            "models": registry.stats()
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/health/live")
+async def liveness_check():
+    """
+    The process is up and serving; answers while models are still loading
+    """
+    return {"status": "alive"}
+
 @app.get("/health")
+@app.get("/health/ready")
 async def health_check():
     """
-    Check service and database health
+    Check service and database health, and that warm-up has finished
     """
     try:
         # Check database connection
@@ -59,18 +355,17 @@ async def health_check():
         # Don't check if db is None, just try to ping
         await db.command("ping")
         
-        # Check if Whisper model is loaded
-        if model is None:  # This is safe to check since model is a regular Python object
-            raise Exception("Whisper model not loaded")
+        if not app.state.warm_up.done():
+            raise Exception("Whisper models still loading")
             
         return {
             "status": "healthy",
             "database": "connected",
-            "model": "loaded"
+            "models": registry.stats()
         }
     except Exception as e:
         logger.error(f"Health check failed: {str(e)}")
         raise HTTPException(
             status_code=503,
             detail=f"Service unhealthy: {str(e)}"
-        ) 
\ No newline at end of file
+        )
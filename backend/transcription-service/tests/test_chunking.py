@@ -0,0 +1,48 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("whisper")
+
+from app.chunking import SAMPLE_RATE, find_split_points, shift_segments, stitch
+
+def speech_with_pauses(seconds: int, pauses) -> "np.ndarray":
+    """Noise standing in for speech, silent for half a second at each pause (in seconds)"""
+    audio = np.random.default_rng(0).normal(0, 0.1, seconds * SAMPLE_RATE).astype(np.float32)
+    for pause in pauses:
+        audio[int(pause * SAMPLE_RATE):int((pause + 0.5) * SAMPLE_RATE)] = 0
+    return audio
+
+def test_short_audio_is_one_chunk():
+    assert find_split_points(speech_with_pauses(50, []), 30, 60) == [0]
+
+def test_cuts_land_in_pauses():
+    audio = speech_with_pauses(150, [42, 97])
+    points = find_split_points(audio, 30, 60)
+    assert len(points) == 3 and points[0] == 0
+    for point, pause in zip(points[1:], (42, 97)):
+        assert pause * SAMPLE_RATE <= point <= (pause + 0.5) * SAMPLE_RATE
+
+def test_chunks_stay_within_bounds():
+    audio = speech_with_pauses(300, [])
+    points = find_split_points(audio, 30, 60)
+    bounds = points + [len(audio)]
+    for start, end in zip(bounds, bounds[1:]):
+        assert end - start <= 60 * SAMPLE_RATE
+    for start, end in zip(bounds[:-2], bounds[1:-1]):
+        assert end - start >= 30 * SAMPLE_RATE
+
+def test_shift_segments():
+    result = {"segments": [{"start": 0.0, "end": 2.5, "text": "Hello"}]}
+    assert shift_segments(result, 60.0) == [{"start": 60.0, "end": 62.5, "text": "Hello"}]
+    assert shift_segments({}, 60.0) == []
+
+def test_stitch_numbers_segments_and_joins_text():
+    results = [
+        (0.0, {"text": " Hello there.", "segments": [{"id": 0, "start": 0.0, "end": 1.0, "text": " Hello there."}]}),
+        (30.0, {"text": " ", "segments": []}),
+        (60.0, {"text": "Bye. ", "segments": [{"id": 0, "start": 0.5, "end": 1.5, "text": "Bye."}]}),
+    ]
+    stitched = stitch(results, "en")
+    assert stitched["text"] == "Hello there. Bye."
+    assert stitched["language"] == "en"
+    assert [(s["id"], s["start"], s["end"]) for s in stitched["segments"]] == [(0, 0.0, 1.0), (1, 60.5, 61.5)]
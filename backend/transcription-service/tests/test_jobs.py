@@ -0,0 +1,41 @@
+import asyncio
+from datetime import datetime, timedelta
+
+from bson import ObjectId
+from mongomock_motor import AsyncMongoMockClient
+
+from app.models.job import JobService, TranscriptionJobModel
+
+def job(recording_id: ObjectId, age: int = 0) -> TranscriptionJobModel:
+    return TranscriptionJobModel(
+        recording_id=recording_id,
+        transcription_id=ObjectId(),
+        created_at=datetime.utcnow() - timedelta(seconds=age)
+    )
+
+def test_one_active_job_per_recording_and_latest_after_it_finishes():
+    async def run():
+        db = AsyncMongoMockClient()["test"]
+        # As created by mongo-init/init.js
+        await db.transcription_jobs.create_index(
+            [("recording_id", 1)],
+            unique=True,
+            partialFilterExpression={"active": True}
+        )
+        service = JobService(db)
+        recording_id = ObjectId()
+        await service.enqueue(job(recording_id, age=60))
+        first = await service.claim("worker", 60)
+        await service.complete(first["_id"], "worker")
+
+        second_id = await service.enqueue(job(recording_id))
+        assert await service.enqueue(job(recording_id)) is None
+        assert str((await service.get_active_job(str(recording_id)))["_id"]) == second_id
+
+        second = await service.claim("worker", 60)
+        await service.fail(second["_id"], "worker", "broken")
+        # A request that lost the enqueue race finds the finished job
+        assert await service.get_active_job(str(recording_id)) is None
+        latest = await service.get_latest_job(str(recording_id))
+        assert str(latest["_id"]) == second_id and latest["status"] == "error"
+    asyncio.run(run())
@@ -0,0 +1,32 @@
+import asyncio
+
+import pytest
+
+torch = pytest.importorskip("torch")
+pytest.importorskip("whisper")
+
+from app.registry import ModelRegistry
+
+def small_registry() -> ModelRegistry:
+    registry = ModelRegistry(budget_mb=1, device="cpu")
+    # A tiny stand-in for a Whisper checkpoint, so nothing is downloaded
+    registry._load_model = lambda name: torch.nn.Linear(4, 4)
+    return registry
+
+def test_aliases_share_one_entry():
+    async def run():
+        registry = small_registry()
+        entry = await registry.get("base")
+        assert await registry.get("base:fp32") is entry
+        assert list(registry.entries) == ["base"]
+        assert registry.loads == 1
+    asyncio.run(run())
+
+def test_get_marks_the_model_recently_used():
+    async def run():
+        registry = small_registry()
+        await registry.get("base")
+        await registry.get("tiny")
+        await registry.get("base:fp32")
+        assert list(registry.entries) == ["tiny", "base"]
+    asyncio.run(run())
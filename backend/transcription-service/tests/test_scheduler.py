@@ -0,0 +1,89 @@
+import asyncio
+from datetime import datetime, timedelta
+
+from bson import ObjectId
+from mongomock_motor import AsyncMongoMockClient
+
+from app.models.job import JobService, TranscriptionJobModel
+from app.scheduler import Scheduler
+
+async def enqueue(db, workspace_id, priority: str = "interactive", duration: float = 60.0, age: int = 0):
+    created = datetime.utcnow() - timedelta(seconds=age)
+    await JobService(db).enqueue(TranscriptionJobModel(
+        recording_id=ObjectId(),
+        transcription_id=ObjectId(),
+        workspace_id=workspace_id,
+        priority=priority,
+        duration=duration,
+        run_after=created,
+        created_at=created
+    ))
+
+async def claim_all(db, scheduler: Scheduler) -> list:
+    claimed = []
+    while True:
+        job = await scheduler.claim(db, "worker", 60)
+        if job is None:
+            return claimed
+        claimed.append(job)
+        scheduler.finished(job)
+
+def test_backfill_slots_honour_the_reservation():
+    scheduler = Scheduler(reserved_workers=1)
+    scheduler.configure(1)
+    assert scheduler.backfill_slots == 0
+    scheduler.configure(3)
+    assert scheduler.backfill_slots == 2
+    scheduler.configure(0)
+    assert scheduler.backfill_slots == 0
+
+def test_workspaces_share_workers_fairly():
+    async def run():
+        db = AsyncMongoMockClient()["test"]
+        bulk, other = ObjectId(), ObjectId()
+        for i in range(5):
+            await enqueue(db, bulk, age=100 - i)
+        await enqueue(db, other)
+
+        order = [job["workspace_id"] for job in await claim_all(db, Scheduler())]
+        # The other workspace's job is not queued behind the bulk import
+        assert order.index(other) <= 1
+        assert order.count(bulk) == 5
+    asyncio.run(run())
+
+def test_weight_and_duration_set_the_share():
+    async def run():
+        db = AsyncMongoMockClient()["test"]
+        heavy, light = ObjectId(), ObjectId()
+        await db.transcription_fair_share.insert_one({
+            "_id": f"interactive:{heavy}", "workspace_id": heavy, "virtual_time": 0.0, "weight": 2.0
+        })
+        for _ in range(4):
+            await enqueue(db, heavy)
+            await enqueue(db, light)
+
+        order = [job["workspace_id"] for job in await claim_all(db, Scheduler())]
+        # Twice the weight takes about two jobs for each of the other's
+        assert order[:6].count(heavy) == 4
+    asyncio.run(run())
+
+def test_interactive_before_backfill_and_backfill_limited_to_free_slots():
+    async def run():
+        db = AsyncMongoMockClient()["test"]
+        workspace = ObjectId()
+        await enqueue(db, workspace, priority="backfill", age=60)
+        await enqueue(db, workspace)
+
+        scheduler = Scheduler(reserved_workers=1)
+        scheduler.configure(1)
+        first = await scheduler.claim(db, "worker", 60)
+        assert first["priority"] == "interactive"
+        scheduler.finished(first)
+        # Every worker is reserved, so the backfill job stays queued
+        assert await scheduler.claim(db, "worker", 60) is None
+
+        scheduler.configure(2)
+        second = await scheduler.claim(db, "worker", 60)
+        assert second["priority"] == "backfill"
+        assert scheduler.running["backfill"] == 1
+    asyncio.run(run())
@@ -0,0 +1,48 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("whisper")
+pytest.importorskip("shared.database")
+
+from mongomock_motor import AsyncMongoMockClient
+
+from app import worker
+from app.models.job import JobService, TranscriptionJobModel
+from app.worker import finish_job, retry_delay
+
+def test_retry_delay_backs_off_exponentially_up_to_the_cap(monkeypatch):
+    monkeypatch.setattr(worker, "JOB_RETRY_BASE_DELAY", 30.0)
+    monkeypatch.setattr(worker, "JOB_RETRY_MAX_DELAY", 900.0)
+    assert [retry_delay(attempts) for attempts in range(1, 8)] == [30, 60, 120, 240, 480, 900, 900]
+
+async def claimed_job(db, worker_id: str):
+    recording_id = (await db.recordings.insert_one({"status": "processing"})).inserted_id
+    transcription_id = (await db.transcriptions.insert_one({"recording_id": recording_id, "attempt": 1})).inserted_id
+    await JobService(db).enqueue(TranscriptionJobModel(recording_id=recording_id, transcription_id=transcription_id))
+    return await JobService(db).claim(worker_id, 60)
+
+def test_finish_job_completes_the_job():
+    async def run():
+        db = AsyncMongoMockClient()["test"]
+        job = await claimed_job(db, "a")
+        await finish_job(db, job, "a", {"text": "Hello."})
+
+        assert (await db.transcriptions.find_one({"_id": job["transcription_id"]}))["text"] == "Hello."
+        assert (await db.transcription_jobs.find_one({"_id": job["_id"]}))["status"] == "completed"
+        assert (await db.recordings.find_one({"_id": job["recording_id"]}))["status"] == "completed"
+    asyncio.run(run())
+
+def test_superseded_attempt_writes_nothing():
+    async def run():
+        db = AsyncMongoMockClient()["test"]
+        stale = await claimed_job(db, "a")
+        # The lease ran out and another worker took the job over
+        await db.transcription_jobs.update_one({"_id": stale["_id"]}, {"$set": {"lease_owner": "b", "attempts": 2}})
+        await db.transcriptions.update_one({"_id": stale["transcription_id"]}, {"$set": {"attempt": 2, "text": ""}})
+
+        await finish_job(db, stale, "a", {"text": "Stale."})
+        assert (await db.transcriptions.find_one({"_id": stale["transcription_id"]}))["text"] == ""
+        assert (await db.transcription_jobs.find_one({"_id": stale["_id"]}))["status"] == "processing"
+        assert (await db.recordings.find_one({"_id": stale["recording_id"]}))["status"] == "processing"
+    asyncio.run(run())